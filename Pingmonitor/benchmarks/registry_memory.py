@@ -0,0 +1,89 @@
+"""
+Registry Memory Benchmark
+Compares per-host memory of HostRegistry with one PingStats per host
+
+Usage:
+    python benchmarks/registry_memory.py [--hosts 100000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from models import HostRegistry, PingStats  # noqa: E402
+
+
+def measure(build: Callable[[], object]) -> int:
+    """Get the bytes still allocated by an object after building it"""
+    tracemalloc.start()
+    obj = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del obj
+    return current
+
+
+def build_registry(hosts: int, seed: int) -> HostRegistry:
+    """Register hosts and record one probe for each"""
+    rng = random.Random(seed)
+    now = time.time()
+    registry = HostRegistry({})
+    for index in range(hosts):
+        view = registry.add(f"10.{index >> 16}.{(index >> 8) & 255}."
+                            f"{index & 255}", 10.0, now + rng.random() * 10)
+        registry.record(view.id, now, rng.random() > 0.01,
+                        rng.uniform(1, 100))
+    return registry
+
+
+def build_stats(hosts: int, seed: int) -> dict:
+    """Create one PingStats per host, as one PingService per host does"""
+    rng = random.Random(seed)
+    stats = {}
+    for index in range(hosts):
+        host_stats = PingStats({})
+        host_stats.total_pings += 1
+        if rng.random() > 0.01:
+            host_stats.record_rtt(rng.uniform(1, 100))
+        else:
+            host_stats.failed_pings += 1
+        stats[f"10.{index >> 16}.{(index >> 8) & 255}.{index & 255}"] = (
+            host_stats)
+    return stats
+
+
+def timed(label: str, func: Callable[[], object]) -> None:
+    start = time.perf_counter()
+    func()
+    print(f"  {label:<22} {(time.perf_counter() - start) * 1000:8.1f} ms")
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument('--hosts', type=int, default=100_000)
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args(argv)
+
+    registry_bytes = measure(lambda: build_registry(args.hosts, args.seed))
+    stats_bytes = measure(lambda: build_stats(args.hosts, args.seed))
+    print(f"{args.hosts} hosts")
+    print(f"  HostRegistry           {registry_bytes / args.hosts:8.0f} "
+          f"bytes/host")
+    print(f"  PingStats per host     {stats_bytes / args.hosts:8.0f} "
+          f"bytes/host (without the thread and event of a PingService)")
+
+    registry = build_registry(args.hosts, args.seed)
+    print("Bulk operations")
+    timed("aggregate()", registry.aggregate)
+    timed("down_hosts()", registry.down_hosts)
+    timed("reset()", registry.reset)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
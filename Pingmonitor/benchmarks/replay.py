@@ -0,0 +1,71 @@
+"""
+Replay Benchmark
+Times run_until() against the batched replay_until() on a simulated fleet
+
+Usage:
+    python benchmarks/replay.py [--hosts 50000] [--hours 24] [--interval 60]
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from services import (NetworkSimulator, ProbeScheduler,  # noqa: E402
+                      SimulatedProber)
+from utils.clock import VirtualClock  # noqa: E402
+
+
+def build(hosts: int, duration: float, interval: float,
+          seed: int) -> ProbeScheduler:
+    """Create a scheduler over a generated fleet"""
+    clock = VirtualClock(0.0)
+    simulator = NetworkSimulator(seed=seed, clock=clock)
+    fleet = simulator.generate_fleet(hosts, duration)
+    scheduler = ProbeScheduler(SimulatedProber(simulator), clock=clock)
+    scheduler.add_hosts({host: interval for host in fleet})
+    return scheduler
+
+
+def timed(label: str, scheduler: ProbeScheduler, method: str,
+          end: float) -> None:
+    start = time.perf_counter()
+    probes = getattr(scheduler, method)(end)
+    elapsed = time.perf_counter() - start
+    summary = scheduler.summary()
+    print(f"  {label:<14} {probes:>11} probes {elapsed:8.2f} s "
+          f"({elapsed / max(probes, 1) * 1e6:5.2f} us/probe), "
+          f"success {summary['success_rate']:.3f}%, "
+          f"avg RTT {summary['avg_rtt'] or 0:.2f} ms")
+
+
+def main(argv: Optional[list] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[2])
+    parser.add_argument('--hosts', type=int, default=50_000)
+    parser.add_argument('--hours', type=float, default=24.0)
+    parser.add_argument('--interval', type=float, default=60.0)
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--run-until-hosts', type=int, default=1000,
+                        help="Fleet size for the per-probe run_until() "
+                             "comparison")
+    args = parser.parse_args(argv)
+    duration = args.hours * 3600
+
+    print(f"{args.run_until_hosts} hosts, {args.hours:g} h "
+          f"at {args.interval:g} s")
+    for label, method in (('run_until()', 'run_until'),
+                          ('replay_until()', 'replay_until')):
+        scheduler = build(args.run_until_hosts, duration, args.interval,
+                          args.seed)
+        timed(label, scheduler, method, duration)
+
+    print(f"{args.hosts} hosts, {args.hours:g} h at {args.interval:g} s")
+    scheduler = build(args.hosts, duration, args.interval, args.seed)
+    timed('replay_until()', scheduler, 'replay_until', duration)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -47,7 +47,7 @@ class PingMonitorApp:
         # Initialize main window
         try:
             self.root = tk.Tk()
-            self.main_window = MainWindow(self.root)
+            self.main_window = MainWindow(self.root, self.config)
         except Exception as e:
             print(f"Error creating main window: {e}")
             return False
@@ -2,11 +2,225 @@
 Application Entry Point
 Starts the Ping Monitor application
 """
+import argparse
+import os
 import sys
+import time
 import logging
-from typing import Optional
+from typing import List, Optional
 
 from app import PingMonitorApp
+from models import ProbeHistory
+from services import (Aggregator, CheckpointManager, ControlServer,
+                      DependencyMap, HistoryArchive, PingService, ProbeAgent,
+                      ProbeBudget, ProbeScheduler, SlaReportEngine,
+                      SuppressionGroup, TargetProber, build_dependencies)
+from utils.config import Config
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description="Ping Monitor")
+    parser.add_argument('--agent', metavar='NAME',
+                        help="Run headless as a probe agent with this name")
+    parser.add_argument('--aggregator', metavar='HOST:PORT',
+                        default='127.0.0.1:9100',
+                        help="Aggregator to report to in agent mode")
+    parser.add_argument('--control-port', type=int, metavar='PORT',
+                        help="Run headless as a multi-host scheduler "
+                             "managed through the control API on this port")
+    parser.add_argument('--control-host', default='127.0.0.1',
+                        help="Address the control API binds to")
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help="Scheduler state file, restored on start and "
+                             "saved periodically")
+    parser.add_argument('--report', metavar='PERIOD',
+                        help="Write an SLA report of the saved history by "
+                             "day, week, month or a period in seconds")
+    parser.add_argument('--history-dir', metavar='DIR',
+                        help="History directory to report on (default "
+                             "from the config)")
+    parser.add_argument('--output', default='sla_report.csv',
+                        help="Report file, JSON if it ends in .json")
+    parser.add_argument('--target', nargs='+', default=[],
+                        help="Hosts to monitor in agent or scheduler mode")
+    parser.add_argument('--interval', type=int, default=2,
+                        help="Ping interval in seconds in agent or "
+                             "scheduler mode")
+    return parser.parse_args(argv)
+
+
+def load_dependencies(config: Config,
+                      targets: List[str]) -> Optional[DependencyMap]:
+    """
+    Build the configured host dependencies
+
+    Returns:
+        DependencyMap: Relations between the targets, or None if none are
+            configured or the settings are invalid
+    """
+    try:
+        dependencies = build_dependencies(
+            targets,
+            parents=config.get('host_parents'),
+            auto_group=config.get('auto_group_subnets', False),
+            gateways=config.get('subnet_gateways'),
+            prefix=int(config.get('subnet_prefix', 24)))
+    except (TypeError, ValueError) as e:
+        logging.error(f"Invalid host dependencies: {e}")
+        return None
+    return dependencies if dependencies.parents else None
+
+
+def configure_budget(config: Config) -> bool:
+    """
+    Apply the configured probe budget shared by all monitors
+
+    Returns:
+        bool: False if the settings are invalid
+    """
+    try:
+        ProbeBudget.default().configure(
+            rate=config.get('probe_rate'),
+            max_in_flight=config.get('max_concurrent_probes'),
+            subnet_rates=config.get('subnet_probe_rates'))
+    except ValueError as e:
+        logging.error(f"Invalid probe budget: {e}")
+        return False
+    return True
+
+
+def run_agent(args: argparse.Namespace) -> int:
+    """
+    Monitor targets without a UI and report to an aggregator
+
+    Returns:
+        int: Exit code (0 for success, 1 for error)
+    """
+    host, _, port = args.aggregator.rpartition(':')
+    if not host or not port.isdigit() or not args.target:
+        logging.error("Agent mode needs --aggregator HOST:PORT and --target")
+        return 1
+
+    config = Config()
+    if not configure_budget(config):
+        return 1
+    dependencies = load_dependencies(config, args.target)
+    group = (SuppressionGroup(dependencies, float(
+        config.get('suppressed_interval_factor', 5)))
+        if dependencies else None)
+
+    agent = ProbeAgent(args.agent, (host, int(port)))
+    services = []
+    for target in args.target:
+        service = PingService()
+        service.dependencies = group
+        agent.attach(service)
+        if not service.start_monitoring(target, args.interval):
+            for started in services:
+                started.stop_monitoring()
+            return 1
+        services.append(service)
+
+    agent.start()
+    try:
+        while any(service.monitoring_thread.is_alive()
+                  for service in services):
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for service in services:
+            service.stop_monitoring()
+        agent.stop()
+    return 0
+
+
+def run_report(args: argparse.Namespace) -> int:
+    """
+    Compute an SLA report over the saved probe history
+
+    Vantages of hosts reported by agents are also combined per host.
+
+    Returns:
+        int: Exit code (0 for success, 1 for error)
+    """
+    config = Config()
+    directory = args.history_dir or config.get('history_dir', 'history')
+    try:
+        period = float(args.report)
+    except ValueError:
+        period = args.report
+
+    try:
+        history = HistoryArchive(ProbeHistory(), directory).load()
+        groups = {key: key.rpartition(Aggregator.SEPARATOR)[0]
+                  for key in history.hosts if Aggregator.SEPARATOR in key}
+        engine = SlaReportEngine(history, groups)
+        rows = engine.compute(period)
+    except (ImportError, ValueError) as e:
+        logging.error(f"Failed to compute the report: {e}")
+        return 1
+    if not engine.export(rows, args.output):
+        return 1
+    logging.info(f"Wrote {len(rows)} report rows over {len(history)} "
+                 f"probes to {args.output}")
+    return 0
+
+
+def run_scheduler(args: argparse.Namespace) -> int:
+    """
+    Probe many hosts without a UI, managed through the control API
+
+    Returns:
+        int: Exit code (0 for success, 1 for error)
+    """
+    config = Config()
+    if not configure_budget(config):
+        return 1
+    scheduler = ProbeScheduler(
+        TargetProber(),
+        dependencies=load_dependencies(config, args.target),
+        suppressed_interval_factor=float(
+            config.get('suppressed_interval_factor', 5)))
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        try:
+            restored = scheduler.restore_checkpoint(args.checkpoint)
+            logging.info(f"Restored {restored} hosts from {args.checkpoint}")
+        except (OSError, ValueError) as e:
+            logging.error(f"Failed to restore {args.checkpoint}: {e}")
+
+    errors = scheduler.add_hosts({target: args.interval
+                                  for target in args.target
+                                  if target not in scheduler.hosts})
+    for target, error in errors.items():
+        logging.error(f"{target}: {error}")
+
+    try:
+        server = ControlServer(scheduler, args.control_host,
+                               args.control_port)
+    except OSError as e:
+        logging.error(f"Failed to start the control API: {e}")
+        return 1
+    checkpoints = (CheckpointManager(args.checkpoint,
+                                     scheduler.save_checkpoint)
+                   if args.checkpoint else None)
+
+    scheduler.start()
+    server.start()
+    if checkpoints:
+        checkpoints.start()
+    try:
+        while True:
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+        scheduler.stop()
+        if checkpoints:
+            checkpoints.stop()
+    return 0
 
 
 def main() -> int:
@@ -22,6 +236,14 @@ def main() -> int:
         format='%(asctime)s - %(levelname)s - %(message)s'
     )
 
+    args = parse_args()
+    if args.report:
+        return run_report(args)
+    if args.agent:
+        return run_agent(args)
+    if args.control_port is not None:
+        return run_scheduler(args)
+
     # Create and initialize application
     app: Optional[PingMonitorApp] = None
     try:
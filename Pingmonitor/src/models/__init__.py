@@ -3,5 +3,10 @@ Models package initialization
 Contains data models used in the application
 """
 from .ping_stats import PingStats
+from .probe_result import BurstResult, ProbeResult
+from .probe_history import ProbeHistory
+from .log_store import LogRecord, LogStore
+from .host_registry import HostRegistry, HostView
 
-__all__ = ['PingStats']
+__all__ = ['PingStats', 'ProbeResult', 'BurstResult', 'ProbeHistory',
+           'LogRecord', 'LogStore', 'HostRegistry', 'HostView']
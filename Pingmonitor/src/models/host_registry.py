@@ -0,0 +1,498 @@
+"""
+HostRegistry model
+Per-host monitoring state kept in parallel typed arrays
+"""
+import math
+import time
+from array import array
+from datetime import datetime
+from itertools import compress
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .ping_stats import WINDOW_SPANS
+from .window_stats import SlidingWindow
+
+# Column name -> array typecode. Times are epoch seconds, unknown values NaN.
+COLUMNS = (
+    ('interval', 'd'),
+    ('next_due', 'd'),
+    ('failed_attempts', 'I'),
+    ('alerted', 'B'),
+    ('paused', 'B'),
+    ('in_flight', 'B'),
+    ('active', 'B'),
+    ('total_pings', 'Q'),
+    ('failed_pings', 'Q'),
+    ('start_time', 'd'),
+    ('last_failure', 'd'),
+    ('rtt_count', 'Q'),
+    ('rtt_total', 'd'),
+    ('last_rtt', 'd'),
+    ('min_rtt', 'd'),
+    ('max_rtt', 'd')
+)
+
+_NAN_COLUMNS = ('last_failure', 'last_rtt', 'min_rtt', 'max_rtt')
+_COUNTER_COLUMNS = ('failed_attempts', 'alerted', 'total_pings',
+                    'failed_pings', 'rtt_count', 'rtt_total', 'last_failure',
+                    'last_rtt', 'min_rtt', 'max_rtt')
+
+
+def _blank(code: str, count: int, nan: bool = False) -> array:
+    """Get an array of zeros (or NaNs) without a Python loop"""
+    if nan:
+        return array(code, [math.nan]) * count
+    return array(code, bytes(array(code).itemsize * count))
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+class HostRegistry:
+    """
+    Monitoring state of many hosts as struct-of-arrays
+
+    Each host gets an integer id that indexes one element of every
+    column. Removed ids are reused. Bulk operations work on whole columns
+    (slice assignment, sum, count, compress) instead of per-host objects.
+    HostView gives attribute access to a single host.
+    """
+
+    def __init__(self, window_spans: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            window_spans: Sliding windows kept per host. None (the
+                default) uses the PingStats WINDOW_SPANS; empty keeps none.
+        """
+        for name, code in COLUMNS:
+            setattr(self, name, array(code))
+        self.window_spans = (WINDOW_SPANS if window_spans is None
+                             else window_spans)
+        self.names: List[Optional[str]] = []
+        self.ids: Dict[str, int] = {}
+        self.windows: Dict[int, Dict[str, SlidingWindow]] = {}
+        self._free: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, host: str) -> bool:
+        return host in self.ids
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(list(self.ids))
+
+    def get(self, host: Optional[str]) -> Optional['HostView']:
+        """Get a view of a host, or None if it is not registered"""
+        host_id = self.ids.get(host)
+        return None if host_id is None else HostView(self, host_id, host)
+
+    def values(self) -> List['HostView']:
+        """Get views of all registered hosts"""
+        return [HostView(self, host_id, host)
+                for host, host_id in self.ids.items()]
+
+    def add(self, host: str, interval: float, next_due: float,
+            start_time: Optional[float] = None) -> 'HostView':
+        """
+        Register a host
+
+        Raises:
+            ValueError: If the host is already registered
+        """
+        if host in self.ids:
+            raise ValueError(f"Host {host} is already registered")
+
+        if self._free:
+            host_id = self._free.pop()
+            self.names[host_id] = host
+            for name, _ in COLUMNS:
+                getattr(self, name)[host_id] = (
+                    math.nan if name in _NAN_COLUMNS else 0)
+        else:
+            host_id = len(self.names)
+            self.names.append(host)
+            for name, _ in COLUMNS:
+                getattr(self, name).append(
+                    math.nan if name in _NAN_COLUMNS else 0)
+
+        self.ids[host] = host_id
+        self.interval[host_id] = interval
+        self.next_due[host_id] = next_due
+        self.start_time[host_id] = (time.time() if start_time is None
+                                    else start_time)
+        self.active[host_id] = 1
+        if self.window_spans:
+            self.windows[host_id] = {name: SlidingWindow(span)
+                                     for name, span in self.window_spans.items()}
+        return HostView(self, host_id, host)
+
+    def extend(self, hosts: List[str], next_due: array,
+               columns: Dict[str, array]) -> int:
+        """
+        Add many hosts with saved values, e.g. from a checkpoint
+
+        Args:
+            hosts: Host names
+            next_due: Next probe time of each host
+            columns: Saved columns by name (same typecodes as COLUMNS);
+                missing columns start at zero
+
+        Returns:
+            int: Number of hosts added; registered hosts are skipped
+        """
+        if self._free or any(host in self.ids for host in hosts):
+            added = 0
+            for index, host in enumerate(hosts):
+                if host in self.ids:
+                    continue
+                view = self.add(host, columns['interval'][index],
+                                next_due[index],
+                                columns['start_time'][index])
+                for name in _COUNTER_COLUMNS:
+                    if name in columns:
+                        getattr(self, name)[view.id] = columns[name][index]
+                added += 1
+            return added
+
+        # Fast path: append whole columns
+        first = len(self.names)
+        count = len(hosts)
+        self.names.extend(hosts)
+        self.ids.update(zip(hosts, range(first, first + count)))
+        for name, code in COLUMNS:
+            column = getattr(self, name)
+            if name == 'next_due':
+                column.extend(next_due)
+            elif name == 'active':
+                column.extend(array(code, [1]) * count)
+            elif name in columns:
+                column.extend(columns[name])
+            else:
+                column.extend(_blank(code, count, name in _NAN_COLUMNS))
+        if self.window_spans:
+            for host_id in range(first, first + count):
+                self.windows[host_id] = {
+                    name: SlidingWindow(span)
+                    for name, span in self.window_spans.items()}
+        return count
+
+    def remove(self, host: str) -> Optional['HostView']:
+        """
+        Unregister a host
+
+        The id of a host with a probe in flight is reused only after
+        release() is called for it.
+        """
+        host_id = self.ids.pop(host, None)
+        if host_id is None:
+            return None
+        self.active[host_id] = 0
+        self.failed_attempts[host_id] = 0
+        self.alerted[host_id] = 0
+        self.paused[host_id] = 0
+        self.names[host_id] = None
+        self.windows.pop(host_id, None)
+        if not self.in_flight[host_id]:
+            self._free.append(host_id)
+        return HostView(self, host_id, host)
+
+    def is_current(self, view: 'HostView') -> bool:
+        """Check that a view still refers to a registered host"""
+        return self.ids.get(view.host) == view.id
+
+    def release(self, view: 'HostView') -> None:
+        """Mark the probe of a host as finished, freeing removed ids"""
+        self.in_flight[view.id] = 0
+        if not self.active[view.id] and view.id not in self._free:
+            self._free.append(view.id)
+
+    def record(self, host_id: int, timestamp: float, success: bool,
+               rtt: Optional[float] = None) -> int:
+        """
+        Add a probe outcome to the counters of a host
+
+        Returns:
+            int: Consecutive failed probes after this one
+        """
+        self.total_pings[host_id] += 1
+        if not success:
+            self.failed_pings[host_id] += 1
+            self.last_failure[host_id] = timestamp
+            self.failed_attempts[host_id] += 1
+        else:
+            if rtt is not None:
+                self.rtt_count[host_id] += 1
+                self.rtt_total[host_id] += rtt
+                self.last_rtt[host_id] = rtt
+                if not rtt >= self.min_rtt[host_id]:  # Also true for NaN
+                    self.min_rtt[host_id] = rtt
+                if not rtt <= self.max_rtt[host_id]:
+                    self.max_rtt[host_id] = rtt
+            self.failed_attempts[host_id] = 0
+
+        windows = self.windows.get(host_id)
+        if windows:
+            for window in windows.values():
+                window.record(timestamp, success, rtt)
+        return self.failed_attempts[host_id]
+
+    def record_totals(self, host_id: int, count: int, failed: int,
+                      rtt_count: int, rtt_total: float, min_rtt: float,
+                      max_rtt: float, last_rtt: float, last_failure: float,
+                      trailing_failures: int) -> int:
+        """
+        Add the totals of many probes of a host, oldest first
+
+        Sliding windows are not updated; record() the samples they cover.
+
+        Args:
+            count: Probes
+            failed: Failed probes
+            rtt_count: Probes with a measured RTT
+            rtt_total: Sum of measured RTTs in milliseconds
+            min_rtt: Smallest RTT (NaN if none)
+            max_rtt: Largest RTT (NaN if none)
+            last_rtt: RTT of the newest measured probe (NaN if none)
+            last_failure: Time of the newest failed probe (NaN if none)
+            trailing_failures: Failed probes after the newest success
+
+        Returns:
+            int: Consecutive failed probes after these
+        """
+        self.total_pings[host_id] += count
+        self.failed_pings[host_id] += failed
+        if failed:
+            self.last_failure[host_id] = last_failure
+        if rtt_count:
+            self.rtt_count[host_id] += rtt_count
+            self.rtt_total[host_id] += rtt_total
+            self.last_rtt[host_id] = last_rtt
+            if not min_rtt >= self.min_rtt[host_id]:
+                self.min_rtt[host_id] = min_rtt
+            if not max_rtt <= self.max_rtt[host_id]:
+                self.max_rtt[host_id] = max_rtt
+        if failed == count:
+            self.failed_attempts[host_id] += count
+        else:
+            self.failed_attempts[host_id] = trailing_failures
+        return self.failed_attempts[host_id]
+
+    def reset(self, hosts: Optional[Iterable[str]] = None) -> None:
+        """
+        Clear statistics and failure streaks, keeping the schedule
+
+        Args:
+            hosts: Hosts to reset, defaults to all in one column pass
+        """
+        if hosts is not None:
+            for host in hosts:
+                host_id = self.ids.get(host)
+                if host_id is None:
+                    continue
+                for name in _COUNTER_COLUMNS:
+                    getattr(self, name)[host_id] = (
+                        math.nan if name in _NAN_COLUMNS else 0)
+                self.start_time[host_id] = time.time()
+                if host_id in self.windows:
+                    self.windows[host_id] = {
+                        name: SlidingWindow(span)
+                        for name, span in self.window_spans.items()}
+            return
+
+        count = len(self.names)
+        for name, code in COLUMNS:
+            if name in _COUNTER_COLUMNS:
+                getattr(self, name)[:] = _blank(code, count,
+                                                name in _NAN_COLUMNS)
+        self.start_time[:] = array('d', [time.time()]) * count
+        for host_id in self.windows:
+            self.windows[host_id] = {
+                name: SlidingWindow(span)
+                for name, span in self.window_spans.items()}
+
+    def aggregate(self) -> Dict[str, Optional[float]]:
+        """
+        Get fleet-wide totals
+
+        Returns:
+            Dict: hosts, down, paused, total_pings, failed_pings,
+                success_rate (%) and avg_rtt (ms)
+        """
+        total = sum(self.total_pings)
+        failed = sum(self.failed_pings)
+        rtt_count = sum(self.rtt_count)
+        return {
+            'hosts': len(self.ids),
+            'down': len(self.failed_attempts) - self.failed_attempts.count(0),
+            'paused': self.paused.count(1),
+            'total_pings': total,
+            'failed_pings': failed,
+            'success_rate': (total - failed) / total * 100 if total else 0.0,
+            'avg_rtt': sum(self.rtt_total) / rtt_count if rtt_count else None
+        }
+
+    def select(self, column: str) -> List[str]:
+        """Get the hosts whose value in a column is non-zero"""
+        return list(compress(self.names, getattr(self, column)))
+
+    def down_hosts(self) -> List[str]:
+        """Get hosts whose last probe failed"""
+        return self.select('failed_attempts')
+
+    def paused_hosts(self) -> List[str]:
+        """Get paused hosts"""
+        return self.select('paused')
+
+
+class HostView:
+    """
+    Attribute access to one host of a HostRegistry
+
+    Offers the read API of PingStats, so a view can be shown by the same
+    UI code as a single-host monitor.
+    """
+
+    __slots__ = ('registry', 'id', 'host')
+
+    def __init__(self, registry: HostRegistry, host_id: int, host: str):
+        self.registry = registry
+        self.id = host_id
+        self.host = host
+
+    def __repr__(self) -> str:
+        return f"HostView({self.host!r}, id={self.id})"
+
+    # Schedule
+
+    @property
+    def interval(self) -> float:
+        return self.registry.interval[self.id]
+
+    @interval.setter
+    def interval(self, value: float) -> None:
+        self.registry.interval[self.id] = value
+
+    @property
+    def next_due(self) -> float:
+        return self.registry.next_due[self.id]
+
+    @next_due.setter
+    def next_due(self, value: float) -> None:
+        self.registry.next_due[self.id] = value
+
+    @property
+    def failed_attempts(self) -> int:
+        return self.registry.failed_attempts[self.id]
+
+    @failed_attempts.setter
+    def failed_attempts(self, value: int) -> None:
+        self.registry.failed_attempts[self.id] = value
+
+    @property
+    def alerted(self) -> bool:
+        return bool(self.registry.alerted[self.id])
+
+    @alerted.setter
+    def alerted(self, value: bool) -> None:
+        self.registry.alerted[self.id] = 1 if value else 0
+
+    @property
+    def paused(self) -> bool:
+        return bool(self.registry.paused[self.id])
+
+    @paused.setter
+    def paused(self, value: bool) -> None:
+        self.registry.paused[self.id] = 1 if value else 0
+
+    @property
+    def in_flight(self) -> bool:
+        return bool(self.registry.in_flight[self.id])
+
+    @in_flight.setter
+    def in_flight(self, value: bool) -> None:
+        self.registry.in_flight[self.id] = 1 if value else 0
+
+    # Statistics
+
+    @property
+    def total_pings(self) -> int:
+        return self.registry.total_pings[self.id]
+
+    @property
+    def failed_pings(self) -> int:
+        return self.registry.failed_pings[self.id]
+
+    @property
+    def rtt_count(self) -> int:
+        return self.registry.rtt_count[self.id]
+
+    @property
+    def rtt_total(self) -> float:
+        return self.registry.rtt_total[self.id]
+
+    @property
+    def last_rtt(self) -> Optional[float]:
+        return _optional(self.registry.last_rtt[self.id])
+
+    @property
+    def min_rtt(self) -> Optional[float]:
+        return _optional(self.registry.min_rtt[self.id])
+
+    @property
+    def max_rtt(self) -> Optional[float]:
+        return _optional(self.registry.max_rtt[self.id])
+
+    @property
+    def avg_rtt(self) -> Optional[float]:
+        """Calculate mean round trip time in milliseconds"""
+        count = self.rtt_count
+        return self.rtt_total / count if count else None
+
+    @property
+    def start_time(self) -> Optional[datetime]:
+        value = self.registry.start_time[self.id]
+        return None if value != value else datetime.fromtimestamp(value)
+
+    @property
+    def last_failure(self) -> Optional[datetime]:
+        value = self.registry.last_failure[self.id]
+        return None if value != value else datetime.fromtimestamp(value)
+
+    @property
+    def current_status(self) -> str:
+        if not self.registry.active[self.id]:
+            return "Stopped"
+        return "Paused" if self.paused else "Running"
+
+    @property
+    def success_rate(self) -> float:
+        """Calculate success rate percentage"""
+        total = self.total_pings
+        if total == 0:
+            return 0.0
+        return (total - self.failed_pings) / total * 100
+
+    @property
+    def uptime(self) -> str:
+        """Calculate uptime in human readable format"""
+        start = self.registry.start_time[self.id]
+        if start != start:
+            return "0h 0m"
+        seconds = max(0.0, time.time() - start)
+        return f"{int(seconds // 3600)}h {int(seconds % 3600 // 60)}m"
+
+    @property
+    def windows(self) -> Dict[str, SlidingWindow]:
+        return self.registry.windows.get(self.id) or {}
+
+    def window_metrics(self,
+                       now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """Get sliding window metrics, e.g. "loss_5m" """
+        now = time.time() if now is None else now
+        metrics: Dict[str, Optional[float]] = {}
+        for name, window in self.windows.items():
+            for metric, value in window.snapshot(now).items():
+                metrics[f"{metric}_{name}"] = value
+        return metrics
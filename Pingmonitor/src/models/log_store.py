@@ -0,0 +1,230 @@
+"""
+Log record store
+Bounded in-memory log with per-host, per-level and time indexes
+"""
+import bisect
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+
+class LogRecord:
+    __slots__ = ('seq', 'timestamp', 'level', 'host', 'message')
+
+    def __init__(self, seq: int, timestamp: float, level: str,
+                 host: Optional[str], message: str):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.level = level
+        self.host = host
+        self.message = message
+
+    def format(self) -> str:
+        """Format record as a log line"""
+        stamp = datetime.fromtimestamp(self.timestamp).strftime(
+            '%Y-%m-%d %H:%M:%S')
+        return f"[{stamp}] {self.message}"
+
+
+class _SeqIndex:
+    """Ascending sequence numbers that can be trimmed from the front in O(1)"""
+
+    __slots__ = ('seqs', 'head')
+
+    def __init__(self):
+        self.seqs: List[int] = []
+        self.head = 0
+
+    def __len__(self) -> int:
+        return len(self.seqs) - self.head
+
+    def append(self, seq: int) -> None:
+        self.seqs.append(seq)
+
+    def trim(self, seq: int) -> None:
+        """Drop seq if it is the oldest entry"""
+        if self.head < len(self.seqs) and self.seqs[self.head] == seq:
+            self.head += 1
+            if self.head > 1024 and self.head * 2 > len(self.seqs):
+                del self.seqs[:self.head]
+                self.head = 0
+
+    def between(self, low: int, high: int) -> List[int]:
+        """Get entries with low <= seq < high"""
+        start = bisect.bisect_left(self.seqs, low, self.head)
+        end = bisect.bisect_left(self.seqs, high, start)
+        return self.seqs[start:end]
+
+
+class LogStore:
+    """
+    Ring buffer of log records
+
+    Records get increasing sequence numbers, which are never reused, not
+    even after clear(). When the store is full the oldest record is
+    dropped and removed from the front of its indexes.
+    A record takes about 300 bytes.
+    """
+
+    CAPACITY = 100_000  # Default number of records
+
+    def __init__(self, capacity: int = CAPACITY):
+        self.capacity = capacity
+        self._lock = threading.RLock()
+        self.next_seq = 0
+        self.clear()
+
+    def clear(self) -> None:
+        """Remove all records; new records continue the numbering"""
+        with self._lock:
+            self._ring: List[Optional[LogRecord]] = []
+            self._base = self.first_seq = self.next_seq  # Seq of ring slot 0
+            self._by_host: Dict[str, _SeqIndex] = {}
+            self._by_level: Dict[str, _SeqIndex] = {}
+
+    def __len__(self) -> int:
+        return self.next_seq - self.first_seq
+
+    @property
+    def hosts(self) -> List[str]:
+        """Get hosts that have records"""
+        with self._lock:
+            return sorted(h for h, index in self._by_host.items() if len(index))
+
+    def add(self,
+            message: str,
+            level: str = "info",
+            host: Optional[str] = None,
+            timestamp: Optional[float] = None) -> LogRecord:
+        """
+        Add a record
+
+        Args:
+            message: Log message
+            level: Message level (info, error, success)
+            host: Host the message is about, if any
+            timestamp: Record time, defaults to now
+
+        Returns:
+            LogRecord: The stored record
+        """
+        with self._lock:
+            if len(self) >= self.capacity:
+                self._evict()
+
+            record = LogRecord(self.next_seq, timestamp or time.time(),
+                               level, host, message)
+            slot = self._slot(record.seq)
+            if slot < len(self._ring):
+                self._ring[slot] = record
+            else:
+                self._ring.append(record)
+            self.next_seq += 1
+
+            if host is not None:
+                self._by_host.setdefault(host, _SeqIndex()).append(record.seq)
+            self._by_level.setdefault(level, _SeqIndex()).append(record.seq)
+            return record
+
+    def _evict(self) -> None:
+        """Drop the oldest record"""
+        slot = self._slot(self.first_seq)
+        record = self._ring[slot]
+        self._ring[slot] = None
+        if record.host is not None:
+            self._by_host[record.host].trim(record.seq)
+        self._by_level[record.level].trim(record.seq)
+        self.first_seq += 1
+
+    def _slot(self, seq: int) -> int:
+        """Get the ring index of a sequence number"""
+        return (seq - self._base) % self.capacity
+
+    def get(self, seq: int) -> Optional[LogRecord]:
+        """Get a record by sequence number, None if it was dropped"""
+        with self._lock:
+            if not self.first_seq <= seq < self.next_seq:
+                return None
+            return self._ring[self._slot(seq)]
+
+    def _seq_at(self, timestamp: float) -> int:
+        """Get the first sequence number at or after a time"""
+        low, high = self.first_seq, self.next_seq
+        while low < high:
+            middle = (low + high) // 2
+            if self._ring[self._slot(middle)].timestamp < timestamp:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def query(self,
+              host: Optional[str] = None,
+              level: Optional[str] = None,
+              since: Optional[float] = None,
+              until: Optional[float] = None,
+              text: Optional[str] = None) -> List[int]:
+        """
+        Find records matching all given filters
+
+        Args:
+            host: Only records about this host
+            level: Only records with this level
+            since: Only records at or after this time
+            until: Only records before this time
+            text: Only records containing this text (case-insensitive)
+
+        Returns:
+            List[int]: Matching sequence numbers in ascending order
+        """
+        with self._lock:
+            low = self.first_seq if since is None else self._seq_at(since)
+            high = self.next_seq if until is None else self._seq_at(until)
+
+            # Start from the smallest index that applies
+            indexes = []
+            if host is not None:
+                indexes.append(self._by_host.get(host, _SeqIndex()))
+            if level is not None:
+                indexes.append(self._by_level.get(level, _SeqIndex()))
+
+            if indexes:
+                indexes.sort(key=len)
+                seqs = indexes[0].between(low, high)
+            else:
+                seqs = list(range(low, high))
+
+            ring, base, capacity = self._ring, self._base, self.capacity
+            if len(indexes) > 1:
+                seqs = [s for s in seqs
+                        if ring[(s - base) % capacity].host == host
+                        and ring[(s - base) % capacity].level == level]
+
+            if text:
+                needle = text.lower()
+                seqs = [s for s in seqs
+                        if needle in
+                        ring[(s - base) % capacity].message.lower()]
+            return seqs
+
+    def records(self, seqs: List[int]) -> Iterator[LogRecord]:
+        """Iterate over records by sequence number, skipping dropped ones"""
+        for seq in seqs:
+            record = self.get(seq)
+            if record is not None:
+                yield record
+
+    def matches(self,
+                record: LogRecord,
+                host: Optional[str] = None,
+                level: Optional[str] = None,
+                since: Optional[float] = None,
+                until: Optional[float] = None,
+                text: Optional[str] = None) -> bool:
+        """Check a single record against query() filters"""
+        return ((host is None or record.host == host)
+                and (level is None or record.level == level)
+                and (since is None or record.timestamp >= since)
+                and (until is None or record.timestamp < until)
+                and (not text or text.lower() in record.message.lower()))
@@ -2,21 +2,133 @@
 PingStats model
 Handles statistics for ping monitoring
 """
+import time
 from datetime import datetime
-from typing import Optional
+from typing import Dict, Optional
+
+from .probe_result import BurstResult
+from .window_stats import SlidingWindow, load_windows, windows_to_bytes
+
+# Sliding windows kept by default: name -> span in seconds
+WINDOW_SPANS: Dict[str, float] = {'1m': 60, '5m': 300, '1h': 3600}
 
 
 class PingStats:
-    def __init__(self):
+    def __init__(self, window_spans: Optional[Dict[str, float]] = None):
         self.total_pings: int = 0
         self.failed_pings: int = 0
         self.start_time: Optional[datetime] = None
         self.last_failure: Optional[datetime] = None
         self.current_status: str = "Not Running"
+        self.last_rtt: Optional[float] = None
+        self.min_rtt: Optional[float] = None
+        self.max_rtt: Optional[float] = None
+        self.rtt_total: float = 0.0
+        self.rtt_count: int = 0
+        self.packets_sent: int = 0  # Probes sent in bursts
+        self.packets_lost: int = 0
+        self.jitter: Optional[float] = None  # RFC 3550 estimate in ms
+        self.last_burst: Optional[BurstResult] = None
+        self.window_spans = (WINDOW_SPANS if window_spans is None
+                             else window_spans)
+        self.windows: Dict[str, SlidingWindow] = {
+            name: SlidingWindow(span)
+            for name, span in self.window_spans.items()
+        }
 
     def reset(self) -> None:
         """Reset all statistics to initial values"""
-        self.__init__()
+        self.__init__(self.window_spans)
+
+    def record_window(self,
+                      timestamp: float,
+                      success: bool,
+                      rtt: Optional[float] = None) -> None:
+        """Add a probe outcome to all sliding windows"""
+        for window in self.windows.values():
+            window.record(timestamp, success, rtt)
+
+    def windows_to_bytes(self) -> bytes:
+        """Serialize all sliding windows"""
+        return windows_to_bytes(self.windows)
+
+    def load_windows(self, data: bytes) -> int:
+        """
+        Restore sliding windows saved with windows_to_bytes()
+
+        Returns:
+            int: Number of windows restored
+        """
+        return load_windows(self.windows, data)
+
+    def window_metrics(self,
+                       now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Get sliding window metrics
+
+        Args:
+            now: Current time in seconds (defaults to wall clock)
+
+        Returns:
+            Dict: Metrics keyed as "<metric>_<window>", e.g. "loss_5m"
+                or "rtt_p95_1h"
+        """
+        now = time.time() if now is None else now
+        metrics: Dict[str, Optional[float]] = {}
+        for name, window in self.windows.items():
+            for metric, value in window.snapshot(now).items():
+                metrics[f"{metric}_{name}"] = value
+        return metrics
+
+    def record_rtt(self, rtt: float) -> None:
+        """Add a measured round trip time in milliseconds"""
+        self.last_rtt = rtt
+        self.rtt_total += rtt
+        self.rtt_count += 1
+        if self.min_rtt is None or rtt < self.min_rtt:
+            self.min_rtt = rtt
+        if self.max_rtt is None or rtt > self.max_rtt:
+            self.max_rtt = rtt
+
+    def record_burst(self, result: BurstResult,
+                     timestamp: Optional[float] = None) -> None:
+        """
+        Add the probes of a burst: packet loss, round trip times, jitter
+        and one sliding window sample per probe, so that window loss is
+        packet loss
+
+        Jitter is smoothed as in RFC 3550 over the RTT differences of
+        consecutive answers, continuing across bursts.
+        """
+        timestamp = result.timestamp if timestamp is None else timestamp
+        self.last_burst = result
+        self.packets_sent += result.sent
+        self.packets_lost += result.sent - result.received
+        for rtt in result.rtts:
+            if self.last_rtt is not None:
+                difference = abs(rtt - self.last_rtt)
+                jitter = self.jitter or 0.0
+                self.jitter = jitter + (difference - jitter) / 16
+            self.record_rtt(rtt)
+            self.record_window(timestamp, True, rtt)
+        for _ in range(result.received - len(result.rtts)):
+            self.record_window(timestamp, True)
+        for _ in range(result.sent - result.received):
+            self.record_window(timestamp, False)
+
+    @property
+    def packet_loss(self) -> Optional[float]:
+        """Calculate the percentage of burst probes not answered"""
+        if self.packets_sent == 0:
+            return None
+        return self.packets_lost / self.packets_sent * 100
+
+    @property
+    def avg_rtt(self) -> Optional[float]:
+        """Calculate mean round trip time in milliseconds"""
+        if self.rtt_count == 0:
+            return None
+        return self.rtt_total / self.rtt_count
 
     @property
     def success_rate(self) -> float:
@@ -0,0 +1,128 @@
+"""
+ProbeHistory model
+Columnar record of every probe result for reporting
+"""
+import math
+import threading
+import time
+from array import array
+from typing import Dict, List, Optional
+
+from .probe_result import ProbeResult
+
+
+class ProbeHistory:
+    """
+    Append-only probe history kept as parallel typed columns
+
+    Rows are expected in time order, which lets reports sort by host with
+    a single stable sort.
+    """
+
+    def __init__(self):
+        self.hosts: List[str] = []
+        self._host_ids: Dict[str, int] = {}
+        self.host_id = array('I')
+        self.timestamp = array('d')
+        self.success = array('B')
+        self.rtt = array('f')  # NaN when unknown or failed
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.timestamp)
+
+    def host_index(self, host: str) -> int:
+        """Get the numeric id of a host, assigning one if needed"""
+        index = self._host_ids.get(host)
+        if index is None:
+            index = len(self.hosts)
+            self._host_ids[host] = index
+            self.hosts.append(host)
+        return index
+
+    def append(self,
+               host: str,
+               timestamp: float,
+               success: bool,
+               rtt: Optional[float] = None) -> None:
+        """Add a single probe outcome"""
+        with self._lock:
+            self.host_id.append(self.host_index(host))
+            self.timestamp.append(timestamp)
+            self.success.append(1 if success else 0)
+            self.rtt.append(math.nan if rtt is None else rtt)
+
+    def record(self, host: str, result: ProbeResult) -> None:
+        """Add a probe result (usable as an on_probe_result callback)"""
+        self.append(host, result.timestamp or time.time(), result.success,
+                    result.rtt)
+
+    def take(self) -> 'ProbeHistory':
+        """Move all rows into a new history, leaving this one empty"""
+        taken = ProbeHistory()
+        with self._lock:
+            for host in self.hosts:
+                taken.host_index(host)
+            taken.host_id, self.host_id = self.host_id, array('I')
+            taken.timestamp, self.timestamp = self.timestamp, array('d')
+            taken.success, self.success = self.success, array('B')
+            taken.rtt, self.rtt = self.rtt, array('f')
+        return taken
+
+    def extend(self, other: 'ProbeHistory') -> None:
+        """
+        Append the rows of another history, which must be newer
+
+        Hosts of the other history without rows are not added.
+        """
+        with other._lock:
+            hosts = list(other.hosts)
+            columns = (array('I', other.host_id), array('d', other.timestamp),
+                       array('B', other.success), array('f', other.rtt))
+        used = set(columns[0])
+        with self._lock:
+            ids = [self.host_index(host) if index in used else 0
+                   for index, host in enumerate(hosts)]
+            self.host_id.extend(ids[index] for index in columns[0])
+            self.timestamp.extend(columns[1])
+            self.success.extend(columns[2])
+            self.rtt.extend(columns[3])
+
+    def columns(self) -> Dict:
+        """
+        Get the history as NumPy arrays
+
+        Returns:
+            Dict: host_id, timestamp, success and rtt columns
+        """
+        import numpy as np
+        with self._lock:
+            return {
+                'host_id': np.array(self.host_id, dtype=np.uint32),
+                'timestamp': np.array(self.timestamp, dtype=np.float64),
+                'success': np.array(self.success, dtype=bool),
+                'rtt': np.array(self.rtt, dtype=np.float32)
+            }
+
+    def save(self, filename: str) -> None:
+        """Save history to a compressed .npz file"""
+        import numpy as np
+        np.savez_compressed(filename, hosts=np.array(self.hosts, dtype=str),
+                            **self.columns())
+
+    @classmethod
+    def load(cls, filename: str) -> 'ProbeHistory':
+        """Load history saved with save()"""
+        import numpy as np
+        history = cls()
+        with np.load(filename) as data:
+            for host in data['hosts'].tolist():
+                history.host_index(host)
+            history.host_id.frombytes(
+                data['host_id'].astype(np.uint32).tobytes())
+            history.timestamp.frombytes(
+                data['timestamp'].astype(np.float64).tobytes())
+            history.success.frombytes(
+                data['success'].astype(np.uint8).tobytes())
+            history.rtt.frombytes(data['rtt'].astype(np.float32).tobytes())
+        return history
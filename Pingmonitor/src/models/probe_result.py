@@ -0,0 +1,73 @@
+"""
+ProbeResult model
+Outcome of a single probe or a burst of probes sent to a host
+"""
+from typing import List, Optional
+
+
+class ProbeResult:
+    __slots__ = ('success', 'rtt', 'timestamp')
+
+    def __init__(self,
+                 success: bool,
+                 rtt: Optional[float] = None,
+                 timestamp: Optional[float] = None):
+        self.success: bool = success
+        self.rtt: Optional[float] = rtt  # Round trip time in milliseconds
+        self.timestamp: Optional[float] = timestamp  # Seconds since epoch
+
+    def __bool__(self) -> bool:
+        return self.success
+
+    def __repr__(self) -> str:
+        return (f"ProbeResult(success={self.success}, rtt={self.rtt}, "
+                f"timestamp={self.timestamp})")
+
+
+class BurstResult(ProbeResult):
+    """
+    Outcome of a burst of probes sent to a host in one cycle
+
+    The burst succeeds if any probe was answered; rtt is the mean round
+    trip time of the answered probes.
+    """
+
+    __slots__ = ('sent', 'received', 'rtts')
+
+    def __init__(self,
+                 sent: int,
+                 received: int,
+                 rtts: List[float],
+                 timestamp: Optional[float] = None):
+        """
+        Args:
+            sent: Probes sent
+            received: Probes answered
+            rtts: Round trip times in milliseconds of the answered probes
+                in send order (may be shorter than received if a backend
+                cannot measure them)
+            timestamp: Time the burst started
+        """
+        super().__init__(received > 0,
+                         sum(rtts) / len(rtts) if rtts else None,
+                         timestamp)
+        self.sent = sent
+        self.received = received
+        self.rtts = rtts
+
+    @property
+    def loss(self) -> float:
+        """Fraction of probes that were not answered"""
+        return 1 - self.received / self.sent if self.sent else 0.0
+
+    @property
+    def min_rtt(self) -> Optional[float]:
+        return min(self.rtts) if self.rtts else None
+
+    @property
+    def max_rtt(self) -> Optional[float]:
+        return max(self.rtts) if self.rtts else None
+
+    def __repr__(self) -> str:
+        return (f"BurstResult(sent={self.sent}, received={self.received}, "
+                f"rtt={self.rtt}, timestamp={self.timestamp})")
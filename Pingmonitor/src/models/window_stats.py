@@ -0,0 +1,267 @@
+"""
+Sliding window statistics
+Loss and latency over the most recent time span with O(1) updates
+"""
+import bisect
+import math
+import struct
+from typing import Dict, List, Optional, Tuple
+
+# Log-spaced RTT bucket bounds in milliseconds (0.1 ms .. ~30 s, +12% steps)
+RTT_BOUNDS: List[float] = [0.1 * 1.12 ** i for i in range(112)]
+
+
+def rtt_bucket(rtt: float) -> int:
+    """Get the histogram bucket of a round trip time"""
+    return bisect.bisect_left(RTT_BOUNDS, rtt)
+
+
+def bucket_value(bucket: int) -> float:
+    """Get the representative RTT of a bucket (geometric midpoint)"""
+    if bucket <= 0:
+        return RTT_BOUNDS[0]
+    if bucket >= len(RTT_BOUNDS):
+        return RTT_BOUNDS[-1]
+    return math.sqrt(RTT_BOUNDS[bucket - 1] * RTT_BOUNDS[bucket])
+
+
+# Binary layout used by SlidingWindow.to_bytes()
+_WINDOW_HEADER = struct.Struct('<dqI')  # span, head slot, non-empty slots
+_SLOT_HEADER = struct.Struct('<qIIIdH')  # index, counts, rtt sum, buckets
+_BUCKET = struct.Struct('<HI')
+_NAMED_WINDOW = struct.Struct('<BI')  # name length, window size
+
+
+class _Slot:
+    """Totals of one time slice of a window"""
+
+    __slots__ = ('index', 'count', 'failed', 'rtt_count', 'rtt_sum', 'hist')
+
+    def __init__(self):
+        self.index = -1
+        self.count = 0
+        self.failed = 0
+        self.rtt_count = 0
+        self.rtt_sum = 0.0
+        self.hist: Dict[int, int] = {}
+
+
+class SlidingWindow:
+    """
+    Loss and RTT distribution over the last `span` seconds
+
+    The span is split into a fixed ring of slots. Recording a probe touches
+    one slot and the running totals; expiring a slot subtracts it from the
+    totals. Memory is bounded by the slot count and histogram size.
+    """
+
+    def __init__(self, span: float, slots: int = 60):
+        self.span = span
+        self.slots = slots
+        self.slot_width = span / slots
+        self._ring = [_Slot() for _ in range(slots)]
+        self._head = -1  # Index of the newest slot seen
+        self.count = 0
+        self.failed = 0
+        self.rtt_count = 0
+        self.rtt_sum = 0.0
+        self.hist: Dict[int, int] = {}
+
+    def _expire(self, slot: _Slot) -> None:
+        """Remove a slot from the running totals and clear it"""
+        self.count -= slot.count
+        self.failed -= slot.failed
+        self.rtt_count -= slot.rtt_count
+        self.rtt_sum -= slot.rtt_sum
+        for bucket, count in slot.hist.items():
+            remaining = self.hist[bucket] - count
+            if remaining:
+                self.hist[bucket] = remaining
+            else:
+                del self.hist[bucket]
+        slot.count = slot.failed = slot.rtt_count = 0
+        slot.rtt_sum = 0.0
+        slot.hist = {}
+
+    def _advance(self, index: int) -> None:
+        """Expire slots that fell out of the window"""
+        if index <= self._head:
+            return
+        if index - self._head >= self.slots:
+            for slot in self._ring:
+                if slot.count:
+                    self._expire(slot)
+        else:
+            for step in range(self._head + 1, index + 1):
+                slot = self._ring[step % self.slots]
+                if slot.count:
+                    self._expire(slot)
+        self._head = index
+
+    def record(self, timestamp: float, success: bool,
+               rtt: Optional[float] = None) -> None:
+        """
+        Add a probe outcome
+
+        Args:
+            timestamp: Probe time in seconds
+            success: Whether the probe was answered
+            rtt: Round trip time in milliseconds, if measured
+        """
+        index = int(timestamp // self.slot_width)
+        self._advance(index)
+        if index <= self._head - self.slots:
+            return  # Older than the window
+
+        slot = self._ring[index % self.slots]
+        slot.index = index
+        slot.count += 1
+        self.count += 1
+        if not success:
+            slot.failed += 1
+            self.failed += 1
+        elif rtt is not None:
+            bucket = rtt_bucket(rtt)
+            slot.rtt_count += 1
+            slot.rtt_sum += rtt
+            slot.hist[bucket] = slot.hist.get(bucket, 0) + 1
+            self.rtt_count += 1
+            self.rtt_sum += rtt
+            self.hist[bucket] = self.hist.get(bucket, 0) + 1
+
+    def to_bytes(self) -> bytes:
+        """Serialize the non-empty slots of the window"""
+        used = [slot for slot in self._ring if slot.count]
+        parts = [_WINDOW_HEADER.pack(self.span, self._head, len(used))]
+        for slot in used:
+            parts.append(_SLOT_HEADER.pack(
+                slot.index, slot.count, slot.failed, slot.rtt_count,
+                slot.rtt_sum, len(slot.hist)))
+            parts.extend(_BUCKET.pack(bucket, count)
+                         for bucket, count in slot.hist.items())
+        return b''.join(parts)
+
+    def load_bytes(self, data: bytes, offset: int = 0) -> Tuple[bool, int]:
+        """
+        Restore slots saved with to_bytes()
+
+        Returns:
+            Tuple: (restored, offset after the window). Nothing is restored
+                if the saved span differs from this window.
+        """
+        span, head, used = _WINDOW_HEADER.unpack_from(data, offset)
+        offset += _WINDOW_HEADER.size
+        restore = span == self.span
+        if restore:
+            self.__init__(self.span, self.slots)
+            self._head = head
+
+        for _ in range(used):
+            index, count, failed, rtt_count, rtt_sum, buckets = \
+                _SLOT_HEADER.unpack_from(data, offset)
+            offset += _SLOT_HEADER.size
+            hist = dict(_BUCKET.unpack_from(data, offset + i * _BUCKET.size)
+                        for i in range(buckets))
+            offset += buckets * _BUCKET.size
+            if not restore:
+                continue
+
+            slot = self._ring[index % self.slots]
+            slot.index, slot.count, slot.failed = index, count, failed
+            slot.rtt_count, slot.rtt_sum, slot.hist = rtt_count, rtt_sum, hist
+            self.count += count
+            self.failed += failed
+            self.rtt_count += rtt_count
+            self.rtt_sum += rtt_sum
+            for bucket, value in hist.items():
+                self.hist[bucket] = self.hist.get(bucket, 0) + value
+
+        return restore, offset
+
+    def snapshot(self, now: Optional[float] = None) -> Dict[str, Optional[float]]:
+        """
+        Get window metrics without modifying the window
+
+        Args:
+            now: Current time; slots older than the span are left out
+
+        Returns:
+            Dict: count, loss (%), rtt_mean and rtt_p50/p95/p99 in ms
+        """
+        count, failed = self.count, self.failed
+        rtt_count, rtt_sum, hist = self.rtt_count, self.rtt_sum, self.hist
+
+        if now is not None and int(now // self.slot_width) > self._head:
+            # Some slots went stale since the last probe; total the live ones
+            oldest = int(now // self.slot_width) - self.slots
+            live = [slot for slot in self._ring
+                    if slot.count and slot.index > oldest]
+            count = sum(slot.count for slot in live)
+            failed = sum(slot.failed for slot in live)
+            rtt_count = sum(slot.rtt_count for slot in live)
+            rtt_sum = sum(slot.rtt_sum for slot in live)
+            hist = {}
+            for slot in live:
+                for bucket, value in slot.hist.items():
+                    hist[bucket] = hist.get(bucket, 0) + value
+
+        return {
+            'count': count,
+            'loss': failed / count * 100 if count else None,
+            'rtt_mean': rtt_sum / rtt_count if rtt_count else None,
+            'rtt_p50': _percentile(hist, rtt_count, 50),
+            'rtt_p95': _percentile(hist, rtt_count, 95),
+            'rtt_p99': _percentile(hist, rtt_count, 99)
+        }
+
+
+def windows_to_bytes(windows: Dict[str, SlidingWindow]) -> bytes:
+    """Serialize named sliding windows"""
+    parts = [struct.pack('<B', len(windows))]
+    for name, window in windows.items():
+        encoded = name.encode('utf-8')
+        payload = window.to_bytes()
+        parts.append(_NAMED_WINDOW.pack(len(encoded), len(payload)))
+        parts.append(encoded)
+        parts.append(payload)
+    return b''.join(parts)
+
+
+def load_windows(windows: Dict[str, SlidingWindow], data: bytes) -> int:
+    """
+    Restore named windows saved with windows_to_bytes()
+
+    Windows that are no longer configured, or whose span changed, are
+    skipped.
+
+    Returns:
+        int: Number of windows restored
+    """
+    if not data:
+        return 0
+    restored = 0
+    offset = 1
+    for _ in range(data[0]):
+        name_size, size = _NAMED_WINDOW.unpack_from(data, offset)
+        offset += _NAMED_WINDOW.size
+        name = data[offset:offset + name_size].decode('utf-8')
+        offset += name_size
+        window = windows.get(name)
+        if window is not None and window.load_bytes(data, offset)[0]:
+            restored += 1
+        offset += size
+    return restored
+
+
+def _percentile(hist: Dict[int, int], total: int,
+                percentile: float) -> Optional[float]:
+    """Read a percentile from a bucket histogram"""
+    if not total:
+        return None
+    rank = percentile / 100 * total
+    seen = 0
+    for bucket in sorted(hist):
+        seen += hist[bucket]
+        if seen >= rank:
+            return bucket_value(bucket)
+    return bucket_value(max(hist))
@@ -3,5 +3,50 @@ Services package initialization
 Contains service classes for business logic
 """
 from .ping_service import PingService
+from .probers import CancelToken, Prober, SystemPingProber
+from .rate_limit import ProbeBudget, RateLimitedProber
+from .async_probers import (AsyncProbeLoop, TcpConnectProber, UdpProber,
+                            TargetProber)
+from .simulator import HostProfile, NetworkSimulator, SimulatedProber
+from .dependencies import (DependencyMap, OutageEvent, SuppressionGroup,
+                           build_dependencies)
+from .checkpoint import CheckpointManager, load_checkpoint, save_checkpoint
+from .scheduler import ProbeScheduler
+from .control_api import ControlServer
+from .agent import ProbeAgent
+from .aggregator import Aggregator
+from .reports import SlaReportEngine
+from .history_archive import HistoryArchive
+from .exporter import ExportJob, log_export, history_export
 
-__all__ = ['PingService']
+__all__ = [
+    'PingService',
+    'Prober',
+    'CancelToken',
+    'SystemPingProber',
+    'ProbeBudget',
+    'RateLimitedProber',
+    'AsyncProbeLoop',
+    'TcpConnectProber',
+    'UdpProber',
+    'TargetProber',
+    'HostProfile',
+    'NetworkSimulator',
+    'SimulatedProber',
+    'DependencyMap',
+    'OutageEvent',
+    'SuppressionGroup',
+    'build_dependencies',
+    'CheckpointManager',
+    'load_checkpoint',
+    'save_checkpoint',
+    'ProbeScheduler',
+    'ControlServer',
+    'ProbeAgent',
+    'Aggregator',
+    'SlaReportEngine',
+    'HistoryArchive',
+    'ExportJob',
+    'log_export',
+    'history_export'
+]
@@ -0,0 +1,462 @@
+"""
+Probe Agent Module
+Streams batched probe result deltas from a vantage point to an aggregator
+"""
+import math
+import os
+import select
+import socket
+import struct
+import sys
+import threading
+import time
+import logging
+from array import array
+from collections import deque
+from typing import Deque, Dict, Iterator, List, Optional, Tuple
+
+from models import ProbeResult
+
+# Frames are a type byte and payload length followed by the payload
+FRAME_HEADER = struct.Struct('<BI')
+HELLO, BATCH, ACK = 1, 2, 3
+MAX_FRAME_SIZE = 64 * 1024 * 1024
+
+_HELLO = struct.Struct('<Q')  # session id, followed by the agent name
+_BATCH = struct.Struct('<QI')  # sequence number, host count
+_ACK = struct.Struct('<Q')
+_NAME = struct.Struct('<H')
+# count, failed, rtt count, rtt sum/min/max, first and last timestamp,
+# last success, number of samples
+_DELTA = struct.Struct('<IIIdddddBI')
+
+
+class HostDelta:
+    """
+    Probe results of one host since the last batch
+
+    Counters are exact; individual samples (for history and charts) are
+    capped so a long disconnect cannot grow the buffer without bound;
+    backfill() estimates the dropped ones from the counters. Adding
+    results merges them into the delta.
+    """
+
+    __slots__ = ('count', 'failed', 'rtt_count', 'rtt_sum', 'rtt_min',
+                 'rtt_max', 'first_timestamp', 'last_timestamp',
+                 'last_success', 'timestamps', 'successes', 'rtts')
+
+    def __init__(self):
+        self.count = 0
+        self.failed = 0
+        self.rtt_count = 0
+        self.rtt_sum = 0.0
+        self.rtt_min = math.nan
+        self.rtt_max = math.nan
+        self.first_timestamp = math.nan
+        self.last_timestamp = 0.0
+        self.last_success = False
+        self.timestamps = array('d')
+        self.successes = array('B')
+        self.rtts = array('f')  # NaN when unknown or failed
+
+    def add(self, timestamp: float, success: bool, rtt: Optional[float],
+            max_samples: int) -> None:
+        """Merge one probe result into the delta"""
+        self.count += 1
+        if not success:
+            self.failed += 1
+        elif rtt is not None:
+            self.rtt_count += 1
+            self.rtt_sum += rtt
+            if not rtt >= self.rtt_min:  # Also true while min is NaN
+                self.rtt_min = rtt
+            if not rtt <= self.rtt_max:
+                self.rtt_max = rtt
+        if not timestamp >= self.first_timestamp:
+            self.first_timestamp = timestamp
+        if timestamp >= self.last_timestamp:
+            self.last_timestamp = timestamp
+            self.last_success = success
+
+        if len(self.timestamps) >= max_samples:
+            # Keep the newest samples; the counters still cover all probes
+            drop = len(self.timestamps) - max_samples + 1
+            del self.timestamps[:drop]
+            del self.successes[:drop]
+            del self.rtts[:drop]
+        self.timestamps.append(timestamp)
+        self.successes.append(1 if success else 0)
+        self.rtts.append(math.nan if rtt is None else rtt)
+
+    def samples(self) -> Iterator[ProbeResult]:
+        """Iterate over the kept samples as probe results"""
+        for timestamp, success, rtt in zip(self.timestamps, self.successes,
+                                           self.rtts):
+            yield ProbeResult(bool(success), None if rtt != rtt else rtt,
+                              timestamp)
+
+    @property
+    def dropped(self) -> int:
+        """Number of probes counted but no longer kept as samples"""
+        return self.count - len(self.timestamps)
+
+    def backfill(self) -> List[ProbeResult]:
+        """
+        Estimate the samples dropped by the cap from the exact counters
+
+        The dropped probes are spread evenly from the first probe of the
+        delta to the first kept sample, with failures interleaved and the
+        mean of the missing RTTs, so counts and loss stay exact.
+
+        Returns:
+            List: Estimated probe results in time order
+        """
+        dropped = self.dropped
+        if dropped <= 0:
+            return []
+        kept_rtts = [rtt for rtt in self.rtts if rtt == rtt]
+        failed = self.failed - (len(self.successes) - sum(self.successes))
+        failed = min(max(failed, 0), dropped)
+        rtt_count = min(max(self.rtt_count - len(kept_rtts), 0),
+                        dropped - failed)
+        rtt = (max((self.rtt_sum - sum(kept_rtts)) / rtt_count, 0.0)
+               if rtt_count else None)
+
+        end = self.timestamps[0] if self.timestamps else self.last_timestamp
+        start = self.first_timestamp if self.first_timestamp <= end else end
+        step = (end - start) / dropped
+        results = []
+        successes = dropped - failed
+        succeeded = 0
+        for i in range(dropped):
+            timestamp = start + i * step
+            if (i + 1) * failed // dropped > i * failed // dropped:
+                results.append(ProbeResult(False, None, timestamp))
+                continue
+            # Successes with a known RTT are interleaved the same way
+            measured = ((succeeded + 1) * rtt_count // successes >
+                        succeeded * rtt_count // successes)
+            succeeded += 1
+            results.append(ProbeResult(True, rtt if measured else None,
+                                       timestamp))
+        return results
+
+
+def encode_frame(kind: int, payload: bytes) -> bytes:
+    """Prefix a payload with its frame header"""
+    return FRAME_HEADER.pack(kind, len(payload)) + payload
+
+
+def encode_hello(session: int, name: str) -> bytes:
+    """Encode the frame an agent starts each connection with"""
+    return encode_frame(HELLO, _HELLO.pack(session) + name.encode('utf-8'))
+
+
+def decode_hello(payload: bytes) -> Tuple[int, str]:
+    """Decode a hello frame payload into (session id, agent name)"""
+    try:
+        (session,) = _HELLO.unpack_from(payload)
+        return session, payload[_HELLO.size:].decode('utf-8')
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed hello frame: {e}")
+
+
+def encode_ack(seq: int) -> bytes:
+    """Encode the acknowledgement of a batch"""
+    return encode_frame(ACK, _ACK.pack(seq))
+
+
+def decode_ack(payload: bytes) -> int:
+    """Decode an acknowledgement frame payload into a sequence number"""
+    try:
+        return _ACK.unpack(payload)[0]
+    except struct.error as e:
+        raise ValueError(f"Malformed ack frame: {e}")
+
+
+def encode_batch(seq: int, deltas: Dict[str, HostDelta]) -> bytes:
+    """Encode host deltas as a batch frame"""
+    parts = [_BATCH.pack(seq, len(deltas))]
+    for host, delta in deltas.items():
+        name = host.encode('utf-8')
+        samples = [delta.timestamps, delta.successes, delta.rtts]
+        parts.append(_NAME.pack(len(name)))
+        parts.append(name)
+        parts.append(_DELTA.pack(
+            delta.count, delta.failed, delta.rtt_count, delta.rtt_sum,
+            delta.rtt_min, delta.rtt_max, delta.first_timestamp,
+            delta.last_timestamp, 1 if delta.last_success else 0,
+            len(delta.timestamps)))
+        parts.extend(_little_endian(column).tobytes() for column in samples)
+    return encode_frame(BATCH, b''.join(parts))
+
+
+def decode_batch(payload: bytes) -> Tuple[int, Dict[str, HostDelta]]:
+    """
+    Decode a batch frame payload
+
+    Returns:
+        Tuple: (sequence number, deltas by host)
+
+    Raises:
+        ValueError: If the payload is malformed
+    """
+    try:
+        seq, count = _BATCH.unpack_from(payload)
+        offset = _BATCH.size
+        deltas: Dict[str, HostDelta] = {}
+        for _ in range(count):
+            (size,) = _NAME.unpack_from(payload, offset)
+            offset += _NAME.size
+            host = payload[offset:offset + size].decode('utf-8')
+            offset += size
+
+            delta = HostDelta()
+            (delta.count, delta.failed, delta.rtt_count, delta.rtt_sum,
+             delta.rtt_min, delta.rtt_max, delta.first_timestamp,
+             delta.last_timestamp, last_success,
+             samples) = _DELTA.unpack_from(payload, offset)
+            delta.last_success = bool(last_success)
+            offset += _DELTA.size
+            for column in (delta.timestamps, delta.successes, delta.rtts):
+                size = column.itemsize * samples
+                if offset + size > len(payload):
+                    raise ValueError("Batch frame is truncated")
+                column.frombytes(payload[offset:offset + size])
+                _little_endian(column)
+                offset += size
+            deltas[host] = delta
+    except (struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Malformed batch frame: {e}")
+    return seq, deltas
+
+
+def _little_endian(column: array) -> array:
+    """Convert an array between native and wire (little endian) order"""
+    if column.itemsize > 1 and sys.byteorder != 'little':
+        column.byteswap()
+    return column
+
+
+def read_frames(buffer: bytearray) -> Iterator[Tuple[int, bytes]]:
+    """
+    Pop complete frames from a receive buffer
+
+    Raises:
+        ValueError: If a frame is larger than MAX_FRAME_SIZE
+    """
+    while len(buffer) >= FRAME_HEADER.size:
+        kind, size = FRAME_HEADER.unpack_from(buffer)
+        if size > MAX_FRAME_SIZE:
+            raise ValueError(f"Frame of {size} bytes is too large")
+        end = FRAME_HEADER.size + size
+        if len(buffer) < end:
+            return
+        payload = bytes(buffer[FRAME_HEADER.size:end])
+        del buffer[:end]
+        yield kind, payload
+
+
+class ProbeAgent:
+    """
+    Forwards probe results of a local monitor to a central aggregator
+
+    Results are merged into per-host deltas and sent in batches. Each
+    batch stays queued until the aggregator acknowledges it and is resent
+    after a reconnect; the aggregator drops batches it already applied.
+    At most max_in_flight batches are unacknowledged at a time, so while
+    the aggregator is slow or unreachable new results keep merging into
+    the local buffer instead of piling up as frames.
+    """
+
+    def __init__(self,
+                 name: str,
+                 server: Tuple[str, int],
+                 flush_interval: float = 1.0,
+                 max_in_flight: int = 4,
+                 max_samples: int = 1000,
+                 connect_timeout: float = 5.0,
+                 max_backoff: float = 30.0):
+        """
+        Args:
+            name: Vantage point name reported to the aggregator
+            server: Aggregator address and port
+            flush_interval: Seconds between batches
+            max_in_flight: Unacknowledged batches before sending pauses
+            max_samples: Samples kept per host while waiting to send
+            connect_timeout: Socket timeout in seconds
+            max_backoff: Longest delay between reconnect attempts
+        """
+        self.name = name
+        self.server = server
+        self.flush_interval = flush_interval
+        self.max_in_flight = max_in_flight
+        self.max_samples = max_samples
+        self.connect_timeout = connect_timeout
+        self.max_backoff = max_backoff
+        self.session = int.from_bytes(os.urandom(8), 'little')
+        self.logger = logging.getLogger('PingMonitor')
+
+        self._lock = threading.Lock()
+        self._pending: Dict[str, HostDelta] = {}
+        self._unacked: Deque[Tuple[int, bytes]] = deque()
+        self._seq = 0
+        self._sock: Optional[socket.socket] = None
+        self.stop_event = threading.Event()
+        self.stop_event.set()  # Initially stopped
+        self.thread: Optional[threading.Thread] = None
+        self.connected = False
+        self.acked_seq = 0
+        self._deadline = 0.0  # Time to give up flushing once stopped
+
+    def record(self, host: str, result: ProbeResult) -> None:
+        """Buffer a probe result (usable as an on_probe_result callback)"""
+        timestamp = result.timestamp or time.time()
+        with self._lock:
+            delta = self._pending.get(host)
+            if delta is None:
+                delta = self._pending[host] = HostDelta()
+            delta.add(timestamp, result.success, result.rtt,
+                      self.max_samples)
+
+    def attach(self, monitor) -> None:
+        """
+        Forward the results of a PingService or ProbeScheduler
+
+        An existing on_probe_result callback keeps being called.
+        """
+        previous = monitor.on_probe_result
+
+        def forward(host: str, result: ProbeResult) -> None:
+            self.record(host, result)
+            if previous:
+                previous(host, result)
+
+        monitor.on_probe_result = forward
+
+    @property
+    def pending_hosts(self) -> int:
+        """Number of hosts with results not yet sent"""
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def unacked(self) -> int:
+        """Number of batches waiting for acknowledgement"""
+        with self._lock:
+            return len(self._unacked)
+
+    def start(self) -> None:
+        """Start sending in the background"""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self, timeout: float = 2.0) -> None:
+        """
+        Send what is buffered and stop
+
+        Args:
+            timeout: Seconds to wait for outstanding acknowledgements
+        """
+        self._deadline = time.monotonic() + timeout
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout + 1.0)
+        self._disconnect()
+
+    def _take_batch(self) -> Optional[bytes]:
+        """Encode pending deltas as the next batch if sending is allowed"""
+        with self._lock:
+            if not self._pending or len(self._unacked) >= self.max_in_flight:
+                return None
+            pending, self._pending = self._pending, {}
+            self._seq += 1
+            frame = encode_batch(self._seq, pending)
+            self._unacked.append((self._seq, frame))
+            return frame
+
+    def _connect(self) -> None:
+        sock = socket.create_connection(self.server, self.connect_timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        sock.sendall(encode_hello(self.session, self.name))
+        with self._lock:
+            resend = [frame for _, frame in self._unacked]
+        for frame in resend:
+            sock.sendall(frame)
+        self._sock = sock
+        self.connected = True
+        self.logger.info(f"Agent {self.name} connected to "
+                         f"{self.server[0]}:{self.server[1]}")
+
+    def _disconnect(self) -> None:
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+        if self.connected:
+            self.connected = False
+            self.logger.warning(f"Agent {self.name} lost its aggregator, "
+                                f"buffering results")
+
+    def _read_acks(self, buffer: bytearray, timeout: float) -> None:
+        """Wait up to timeout for acknowledgements and apply them"""
+        readable, _, _ = select.select([self._sock], [], [], max(timeout, 0))
+        if not readable:
+            return
+        data = self._sock.recv(65536)
+        if not data:
+            raise ConnectionError("Aggregator closed the connection")
+        buffer.extend(data)
+        for kind, payload in read_frames(buffer):
+            if kind != ACK:
+                continue
+            seq = decode_ack(payload)
+            with self._lock:
+                while self._unacked and self._unacked[0][0] <= seq:
+                    self._unacked.popleft()
+                self.acked_seq = max(self.acked_seq, seq)
+
+    def _run(self) -> None:
+        """Connect, send batches and collect acknowledgements"""
+        backoff = 0.5
+        buffer = bytearray()
+        next_flush = time.monotonic()
+
+        while True:
+            stopping = self.stop_event.is_set()
+            if stopping and (time.monotonic() >= self._deadline or (
+                    not self.unacked and not self.pending_hosts)):
+                break
+
+            if self._sock is None:
+                try:
+                    self._connect()
+                    buffer.clear()
+                    backoff = 0.5
+                except OSError as e:
+                    self.logger.debug(f"Agent {self.name} cannot connect: {e}")
+                    if stopping:
+                        break
+                    self.stop_event.wait(backoff)
+                    backoff = min(backoff * 2, self.max_backoff)
+                    continue
+
+            try:
+                now = time.monotonic()
+                if now >= next_flush or stopping:
+                    frame = self._take_batch()
+                    if frame is not None:
+                        self._sock.sendall(frame)
+                    next_flush = now + self.flush_interval
+                self._read_acks(buffer, min(next_flush - time.monotonic(),
+                                            0.1 if stopping else 1.0))
+            except (OSError, ValueError) as e:
+                self.logger.debug(f"Agent {self.name} connection error: {e}")
+                self._disconnect()
+
+        if self.unacked or self.pending_hosts:
+            self.logger.warning(f"Agent {self.name} stopped with unsent "
+                                f"results")
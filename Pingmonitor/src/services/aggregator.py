@@ -0,0 +1,257 @@
+"""
+Aggregator Module
+Collects probe result deltas from remote agents into per-vantage statistics
+"""
+import socket
+import socketserver
+import threading
+import time
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from models import PingStats, ProbeHistory, ProbeResult
+from .agent import (BATCH, HELLO, HostDelta, decode_batch, decode_hello,
+                    encode_ack, read_frames)
+
+
+class Aggregator:
+    """
+    Merges results streamed by ProbeAgents
+
+    Statistics are kept per (vantage, host). Individual samples go to a
+    ProbeHistory under the key "host@vantage", so exports and SLA reports
+    work on aggregated data as they do on local data; report_groups()
+    combines the vantages of each host in a report.
+
+    Agents cap the samples they buffer while disconnected. Samples they
+    dropped are backfilled into the history from the exact counters and
+    counted in gaps, so availability stays right but their timestamps
+    and RTTs are estimates.
+    """
+
+    SEPARATOR = '@'
+
+    def __init__(self,
+                 host: str = '127.0.0.1',
+                 port: int = 9100,
+                 history: Optional[ProbeHistory] = None,
+                 window_spans: Optional[Dict[str, float]] = None):
+        """
+        Args:
+            host: Address to bind to
+            port: Port to listen on (0 picks a free port)
+            history: Probe history receiving every sample
+            window_spans: Sliding windows kept per vantage and host
+        """
+        self.history = history or ProbeHistory()
+        self.window_spans = window_spans
+        self.stats: Dict[Tuple[str, str], PingStats] = {}
+        self.gaps: Dict[Tuple[str, str], int] = {}  # Backfilled samples
+        self.agents: Dict[str, bool] = {}  # Connected state by vantage
+        self.logger = logging.getLogger('PingMonitor')
+
+        self._lock = threading.Lock()
+        self._last_seq: Dict[Tuple[str, int], int] = {}  # By agent session
+        self._up: Dict[Tuple[str, str], bool] = {}
+        self._connections: Set[socket.socket] = set()
+
+        self.server = socketserver.ThreadingTCPServer(
+            (host, port), _AgentHandler, bind_and_activate=False)
+        self.server.allow_reuse_address = True
+        self.server.daemon_threads = True
+        self.server.aggregator = self
+        self.server.server_bind()
+        self.server.server_activate()
+        self.thread: Optional[threading.Thread] = None
+
+        # Callbacks (called on connection threads)
+        self.on_probe_result: Optional[
+            Callable[[str, ProbeResult], None]] = None
+        self.on_status_change: Optional[
+            Callable[[str, str, bool], None]] = None
+        self.on_agent_change: Optional[Callable[[str, bool], None]] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Get the bound address and port"""
+        return self.server.server_address[:2]
+
+    def key(self, vantage: str, host: str) -> str:
+        """Get the history key of a host seen from a vantage point"""
+        return f"{host}{self.SEPARATOR}{vantage}"
+
+    def start(self) -> None:
+        """Accept agents in the background"""
+        self.thread = threading.Thread(target=self.server.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+        host, port = self.address
+        self.logger.info(f"Aggregator listening on {host}:{port}")
+
+    def stop(self) -> None:
+        """Stop accepting agents and drop open connections"""
+        if self.thread and self.thread.is_alive():
+            self.server.shutdown()
+            self.thread.join(timeout=2.0)
+        self.server.server_close()
+        with self._lock:
+            connections = list(self._connections)
+        for connection in connections:
+            try:
+                connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def hosts(self) -> List[str]:
+        """Get all hosts reported by any agent"""
+        with self._lock:
+            return sorted({host for _, host in self.stats})
+
+    def host_stats(self, host: str) -> Dict[str, PingStats]:
+        """Get the statistics of a host by vantage point"""
+        with self._lock:
+            return {vantage: stats
+                    for (vantage, name), stats in self.stats.items()
+                    if name == host}
+
+    def report_groups(self) -> Dict[str, str]:
+        """Map history keys to host names for SlaReportEngine groups"""
+        with self._lock:
+            return {self.key(vantage, host): host
+                    for vantage, host in self.stats}
+
+    def apply(self, vantage: str, session: int, seq: int,
+              deltas: Dict[str, HostDelta]) -> bool:
+        """
+        Merge a batch of deltas from an agent
+
+        Args:
+            vantage: Agent name
+            session: Agent session id
+            seq: Batch sequence number within the session
+            deltas: Deltas by host
+
+        Returns:
+            bool: False if the batch was already applied
+        """
+        samples: List[Tuple[str, ProbeResult]] = []
+        changes: List[Tuple[str, bool]] = []
+
+        with self._lock:
+            if seq <= self._last_seq.get((vantage, session), 0):
+                return False  # Resent after a reconnect
+            self._last_seq[(vantage, session)] = seq
+
+            for host, delta in deltas.items():
+                key = (vantage, host)
+                history_key = self.key(vantage, host)
+                stats = self.stats.get(key)
+                if stats is None:
+                    stats = self.stats[key] = PingStats(self.window_spans)
+                    first = delta.first_timestamp
+                    stats.start_time = datetime.fromtimestamp(
+                        first if first == first
+                        else delta.last_timestamp or time.time())
+                    stats.current_status = "Running"
+
+                stats.total_pings += delta.count
+                stats.failed_pings += delta.failed
+                if delta.rtt_count:
+                    stats.rtt_total += delta.rtt_sum
+                    stats.rtt_count += delta.rtt_count
+                    if stats.min_rtt is None or delta.rtt_min < stats.min_rtt:
+                        stats.min_rtt = delta.rtt_min
+                    if stats.max_rtt is None or delta.rtt_max > stats.max_rtt:
+                        stats.max_rtt = delta.rtt_max
+                if delta.failed and not delta.last_success:
+                    stats.last_failure = datetime.fromtimestamp(
+                        delta.last_timestamp)
+
+                backfilled = delta.backfill()
+                if backfilled:
+                    self.gaps[key] = self.gaps.get(key, 0) + len(backfilled)
+                    self.logger.warning(
+                        f"Agent {vantage} dropped {len(backfilled)} samples "
+                        f"of {host}, estimated from its counters")
+                for result in backfilled:
+                    if stats.windows:
+                        stats.record_window(result.timestamp, result.success,
+                                            result.rtt)
+                    self.history.append(history_key, result.timestamp,
+                                        result.success, result.rtt)
+
+                for result in delta.samples():
+                    if result.success and result.rtt is not None:
+                        stats.last_rtt = result.rtt
+                    elif not result.success:
+                        stats.last_failure = datetime.fromtimestamp(
+                            result.timestamp)
+                    if stats.windows:
+                        stats.record_window(result.timestamp, result.success,
+                                            result.rtt)
+                    self.history.append(history_key, result.timestamp,
+                                        result.success, result.rtt)
+                    samples.append((history_key, result))
+
+                # Hosts are assumed up until seen down, so a host that
+                # is already down when first reported is alerted on
+                was_up = self._up.get(key, True)
+                self._up[key] = delta.last_success
+                if was_up != delta.last_success:
+                    changes.append((host, delta.last_success))
+
+        if self.on_status_change:
+            for host, is_up in changes:
+                self.on_status_change(vantage, host, is_up)
+        if self.on_probe_result:
+            for history_key, result in samples:
+                self.on_probe_result(history_key, result)
+        return True
+
+    def _set_connected(self, vantage: str, connected: bool,
+                       connection: socket.socket) -> None:
+        with self._lock:
+            if connected:
+                self._connections.add(connection)
+            else:
+                self._connections.discard(connection)
+            self.agents[vantage] = connected
+        self.logger.info(f"Agent {vantage} "
+                         f"{'connected' if connected else 'disconnected'}")
+        if self.on_agent_change:
+            self.on_agent_change(vantage, connected)
+
+
+class _AgentHandler(socketserver.BaseRequestHandler):
+    """Reads frames of one agent connection and acknowledges batches"""
+
+    def handle(self) -> None:
+        aggregator: Aggregator = self.server.aggregator
+        connection: socket.socket = self.request
+        buffer = bytearray()
+        vantage: Optional[str] = None
+        session = 0
+
+        try:
+            while True:
+                data = connection.recv(65536)
+                if not data:
+                    break
+                buffer.extend(data)
+                for kind, payload in read_frames(buffer):
+                    if kind == HELLO:
+                        session, vantage = decode_hello(payload)
+                        aggregator._set_connected(vantage, True, connection)
+                    elif kind == BATCH and vantage is not None:
+                        seq, deltas = decode_batch(payload)
+                        aggregator.apply(vantage, session, seq, deltas)
+                        connection.sendall(encode_ack(seq))
+                    else:
+                        raise ValueError(f"Unexpected frame type {kind}")
+        except (OSError, ValueError) as e:
+            aggregator.logger.warning(
+                f"Agent {vantage or self.client_address} dropped: {e}")
+        finally:
+            if vantage is not None:
+                aggregator._set_connected(vantage, False, connection)
@@ -0,0 +1,423 @@
+"""
+Async Prober Module
+TCP-connect and UDP request/response probes running on an asyncio loop
+"""
+import asyncio
+import concurrent.futures
+import struct
+import threading
+import time
+import logging
+from abc import abstractmethod
+from typing import Deque, Dict, List, Optional, Tuple
+from collections import deque
+
+from models import BurstResult, ProbeResult
+from utils.validators import parse_target
+from .probers import CancelToken, InFlightProbes, Prober, SystemPingProber
+
+
+class AsyncProbeLoop:
+    """Event loop running in a background thread, shared by async probers"""
+
+    _default: Optional['AsyncProbeLoop'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(
+            target=self.loop.run_forever, name='probe-loop', daemon=True)
+        self.thread.start()
+
+    @classmethod
+    def default(cls) -> 'AsyncProbeLoop':
+        """Get the shared probe loop, creating it on first use"""
+        with cls._default_lock:
+            if cls._default is None or cls._default.loop.is_closed():
+                cls._default = cls()
+            return cls._default
+
+    def submit(self, coro) -> concurrent.futures.Future:
+        """Start a coroutine on the loop; cancel the future to stop it"""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    def run(self, coro, timeout: Optional[float] = None):
+        """Run a coroutine on the loop and wait for its result"""
+        return self.submit(coro).result(timeout)
+
+    def close(self) -> None:
+        """Stop the loop and its thread"""
+        if self.loop.is_closed():
+            return
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2.0)
+        self.loop.close()
+
+
+class _AsyncProber(Prober):
+    """Common plumbing for probes that run on an AsyncProbeLoop"""
+
+    def __init__(self,
+                 port: int,
+                 timeout: float = 1.0,
+                 max_per_destination: int = 4,
+                 probe_loop: Optional[AsyncProbeLoop] = None):
+        self.port = port
+        self.timeout = timeout
+        self.max_per_destination = max_per_destination
+        self.probe_loop = probe_loop or AsyncProbeLoop.default()
+        self.logger = logging.getLogger('PingMonitor')
+        self._limits: Dict[Tuple[str, int], asyncio.Semaphore] = {}
+        self._running = InFlightProbes(lambda future: future.cancel())
+
+    def _limit_for(self, host: str, port: int) -> asyncio.Semaphore:
+        """Get the concurrency limit of a destination (loop thread only)"""
+        key = (host, port)
+        semaphore = self._limits.get(key)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_per_destination)
+            self._limits[key] = semaphore
+        return semaphore
+
+    def probe(self, host: str,
+              token: Optional[CancelToken] = None) -> ProbeResult:
+        return self.probe_port(host, self.port, token)
+
+    def probe_port(self, host: str, port: int,
+                   token: Optional[CancelToken] = None) -> ProbeResult:
+        """Send a single probe to a host and port"""
+        return self._run(host, self.probe_async(host, port),
+                         ProbeResult(False, timestamp=time.time()), token)
+
+    def probe_burst(self, host: str, count: int,
+                    spacing: float = 0.01,
+                    token: Optional[CancelToken] = None) -> BurstResult:
+        return self.probe_burst_port(host, self.port, count, spacing, token)
+
+    def probe_burst_port(self, host: str, port: int, count: int,
+                         spacing: float = 0.01,
+                         token: Optional[CancelToken] = None) -> BurstResult:
+        """Send several probes to a host and port in one cycle"""
+        return self._run(host, self.burst_async(host, port, count, spacing),
+                         BurstResult(count, 0, [], time.time()), token)
+
+    def _run(self, host: str, coro, cancelled: ProbeResult,
+             token: Optional[CancelToken] = None) -> ProbeResult:
+        """Run a probe coroutine, returning cancelled if it is aborted"""
+        future = self.probe_loop.submit(coro)
+        self._running.add(future, host, token)
+        try:
+            return future.result()
+        except concurrent.futures.CancelledError:
+            return cancelled
+        finally:
+            self._running.discard(future, token)
+
+    def cancel(self, host: Optional[str] = None) -> None:
+        """Cancel running probes, closing their sockets"""
+        self._running.cancel(host)
+
+    async def probe_async(self, host: str, port: int) -> ProbeResult:
+        """Probe a destination within its concurrency limit"""
+        async with self._limit_for(host, port):
+            return await self._probe_once(host, port)
+
+    async def _probe_once(self, host: str, port: int) -> ProbeResult:
+        """Probe a destination without taking a slot of its limit"""
+        started = time.time()
+        try:
+            rtt = await asyncio.wait_for(
+                self._measure(host, port), self.timeout)
+            return ProbeResult(True, rtt=rtt, timestamp=started)
+        except (asyncio.TimeoutError, OSError) as e:
+            self.logger.debug(f"Probe to {host}:{port} failed: {e!r}")
+            return ProbeResult(False, timestamp=started)
+
+    async def burst_async(self, host: str, port: int, count: int,
+                          spacing: float) -> BurstResult:
+        """
+        Start probes spacing seconds apart and wait for all of them
+
+        The burst takes one slot of the destination limit for all of its
+        probes, so they are not split into waves.
+        """
+        started = time.time()
+        probes = []
+        try:
+            async with self._limit_for(host, port):
+                for index in range(count):
+                    if index:
+                        await asyncio.sleep(spacing)
+                    probes.append(asyncio.ensure_future(
+                        self._probe_once(host, port)))
+                results = await asyncio.gather(*probes)
+        finally:
+            for probe in probes:
+                probe.cancel()  # Only pending ones, when cancelled
+
+        answered = [result for result in results if result]
+        return BurstResult(count, len(answered),
+                           [result.rtt for result in answered
+                            if result.rtt is not None], started)
+
+    @abstractmethod
+    async def _measure(self, host: str, port: int) -> float:
+        """Perform the probe and return its round trip time in milliseconds"""
+
+
+class TcpConnectProber(_AsyncProber):
+    """Measures TCP handshake latency to a port"""
+
+    def __init__(self, port: int = 80, **kwargs):
+        super().__init__(port, **kwargs)
+
+    async def _measure(self, host: str, port: int) -> float:
+        started = time.perf_counter()
+        # A timeout cancels open_connection, which closes the half-open socket
+        _, writer = await asyncio.open_connection(host, port)
+        rtt = (time.perf_counter() - started) * 1000
+        writer.transport.abort()
+        return rtt
+
+
+class _UdpResponseProtocol(asyncio.DatagramProtocol):
+    """
+    Matches incoming datagrams to waiting requests
+
+    A datagram equal to a key of echoes goes to that waiter, so echoed
+    requests are matched exactly; other datagrams go to the oldest of
+    waiters, and are dropped when nobody waits. Waiters get the
+    perf_counter() time the datagram arrived.
+    """
+
+    def __init__(self):
+        self.transport: Optional[asyncio.DatagramTransport] = None
+        self.waiters: Deque[asyncio.Future] = deque()
+        self.echoes: Dict[bytes, asyncio.Future] = {}
+        self.sequence = 0  # Tag of the last request sent
+        self.dropped = 0  # Late or unmatched datagrams
+        self.closed = False
+
+    def connection_made(self, transport) -> None:
+        self.transport = transport
+
+    def datagram_received(self, data: bytes, addr) -> None:
+        arrived = time.perf_counter()
+        waiter = self.echoes.pop(data, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(arrived)
+            return
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(arrived)
+                return
+        self.dropped += 1
+
+    def error_received(self, exc: Exception) -> None:
+        # ICMP port unreachable and similar errors fail the oldest request
+        while self.waiters:
+            waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_exception(exc)
+                return
+        for payload, waiter in list(self.echoes.items()):
+            del self.echoes[payload]
+            if not waiter.done():
+                waiter.set_exception(exc)
+                return
+
+    def connection_lost(self, exc: Optional[Exception]) -> None:
+        self.closed = True
+        waiters = list(self.waiters) + list(self.echoes.values())
+        self.waiters.clear()
+        self.echoes.clear()
+        for waiter in waiters:
+            if not waiter.done():
+                waiter.set_exception(exc or ConnectionError("Socket closed"))
+
+
+class UdpProber(_AsyncProber):
+    """
+    Sends a UDP request and waits for the response
+
+    One connected socket is kept per destination and reused between probes.
+    Requests end in a 2-byte sequence number and only the echo of a request
+    answers it, so a reply arriving after its probe timed out is dropped
+    instead of being credited to the next probe. Disable tag_requests for
+    services that need the exact payload or answer with other data: any
+    datagram then answers the oldest request, and the socket is reopened
+    after a timeout so that late replies cannot reach it.
+    """
+
+    def __init__(self,
+                 port: int = 7,
+                 payload: bytes = b'ping',
+                 max_per_destination: int = 1,
+                 tag_requests: bool = True,
+                 **kwargs):
+        super().__init__(port, max_per_destination=max_per_destination,
+                         **kwargs)
+        self.payload = payload
+        self.tag_requests = tag_requests
+        self._endpoints: Dict[Tuple[str, int], _UdpResponseProtocol] = {}
+
+    async def _endpoint_for(self, host: str,
+                            port: int) -> _UdpResponseProtocol:
+        """Get an open socket for a destination, reconnecting if needed"""
+        key = (host, port)
+        protocol = self._endpoints.get(key)
+        if protocol is None or protocol.closed:
+            loop = asyncio.get_running_loop()
+            _, protocol = await loop.create_datagram_endpoint(
+                _UdpResponseProtocol, remote_addr=(host, port))
+            self._endpoints[key] = protocol
+        return protocol
+
+    def _send(self, protocol: _UdpResponseProtocol
+              ) -> Tuple[bytes, asyncio.Future]:
+        """Send a request and register the future its answer completes"""
+        waiter = asyncio.get_running_loop().create_future()
+        payload = self.payload
+        if self.tag_requests:
+            protocol.sequence = (protocol.sequence + 1) & 0xFFFF
+            payload += struct.pack('>H', protocol.sequence)
+            protocol.echoes[payload] = waiter
+        else:
+            protocol.waiters.append(waiter)
+        protocol.transport.sendto(payload)
+        return payload, waiter
+
+    def _finish(self, protocol: _UdpResponseProtocol,
+                requests: List[Tuple[bytes, asyncio.Future]]) -> None:
+        """Forget unanswered requests so their late replies are dropped"""
+        unanswered = False
+        for payload, waiter in requests:
+            if protocol.echoes.get(payload) is waiter:
+                del protocol.echoes[payload]
+            if not waiter.done():
+                waiter.cancel()
+            unanswered = unanswered or waiter.cancelled()
+        if unanswered and not self.tag_requests and not protocol.closed:
+            protocol.transport.close()
+
+    async def _measure(self, host: str, port: int) -> float:
+        protocol = await self._endpoint_for(host, port)
+        started = time.perf_counter()
+        request = self._send(protocol)
+        try:
+            arrived = await request[1]
+        finally:
+            self._finish(protocol, [request])
+        return (arrived - started) * 1000
+
+    async def burst_async(self, host: str, port: int, count: int,
+                          spacing: float) -> BurstResult:
+        """
+        Send a burst over the cached socket of a destination
+
+        All requests are sent before any answer is awaited. The burst ends
+        one timeout after the last request.
+        """
+        async with self._limit_for(host, port):
+            started = time.time()
+            try:
+                protocol = await self._endpoint_for(host, port)
+            except OSError as e:
+                self.logger.debug(f"Burst to {host}:{port} failed: {e!r}")
+                return BurstResult(count, 0, [], started)
+
+            requests: List[Tuple[bytes, asyncio.Future]] = []
+            sent_at: List[float] = []
+            try:
+                for index in range(count):
+                    if index:
+                        await asyncio.sleep(spacing)
+                    sent_at.append(time.perf_counter())
+                    requests.append(self._send(protocol))
+                await asyncio.wait([waiter for _, waiter in requests],
+                                   timeout=self.timeout)
+            finally:
+                self._finish(protocol, requests)
+
+        rtts = [(waiter.result() - sent) * 1000
+                for (_, waiter), sent in zip(requests, sent_at)
+                if not waiter.cancelled() and waiter.exception() is None]
+        return BurstResult(count, len(rtts), rtts, started)
+
+    async def _close_endpoints(self) -> None:
+        for protocol in self._endpoints.values():
+            if protocol.transport:
+                protocol.transport.close()
+        self._endpoints.clear()
+
+    def close(self) -> None:
+        """Close all cached sockets"""
+        if not self.probe_loop.loop.is_closed():
+            self.probe_loop.run(self._close_endpoints(), timeout=2.0)
+
+
+class TargetProber(Prober):
+    """
+    Routes each target to a probe type by its scheme
+
+    Targets look like "8.8.8.8" (ICMP), "tcp://host:443" or "udp://host:53".
+    """
+
+    def __init__(self,
+                 icmp: Optional[Prober] = None,
+                 tcp: Optional[TcpConnectProber] = None,
+                 udp: Optional[UdpProber] = None):
+        self.icmp = icmp or SystemPingProber()
+        self._tcp = tcp
+        self._udp = udp
+
+    @property
+    def tcp(self) -> TcpConnectProber:
+        if self._tcp is None:
+            self._tcp = TcpConnectProber()
+        return self._tcp
+
+    @property
+    def udp(self) -> UdpProber:
+        if self._udp is None:
+            self._udp = UdpProber()
+        return self._udp
+
+    def probe(self, host: str,
+              token: Optional[CancelToken] = None) -> ProbeResult:
+        scheme, address, port = parse_target(host)
+        if scheme == 'tcp':
+            return self.tcp.probe_port(address, port or self.tcp.port, token)
+        if scheme == 'udp':
+            return self.udp.probe_port(address, port or self.udp.port, token)
+        return self.icmp.probe(address, token)
+
+    def probe_burst(self, host: str, count: int,
+                    spacing: float = 0.01,
+                    token: Optional[CancelToken] = None) -> BurstResult:
+        scheme, address, port = parse_target(host)
+        if scheme == 'tcp':
+            return self.tcp.probe_burst_port(address, port or self.tcp.port,
+                                             count, spacing, token)
+        if scheme == 'udp':
+            return self.udp.probe_burst_port(address, port or self.udp.port,
+                                             count, spacing, token)
+        return self.icmp.probe_burst(address, count, spacing, token)
+
+    def cancel(self, host: Optional[str] = None) -> None:
+        if host is None:
+            for prober in (self.icmp, self._tcp, self._udp):
+                if prober:
+                    prober.cancel()
+            return
+
+        scheme, address, _ = parse_target(host)
+        prober = {'tcp': self._tcp, 'udp': self._udp}.get(scheme, self.icmp)
+        if prober:
+            prober.cancel(address)
+
+    def close(self) -> None:
+        for prober in (self.icmp, self._tcp, self._udp):
+            if prober:
+                prober.close()
@@ -0,0 +1,392 @@
+"""
+Checkpoint Module
+Saves and restores per-host monitoring state across restarts
+"""
+import math
+import os
+import struct
+import sys
+import threading
+import time
+import logging
+from array import array
+from datetime import datetime
+from itertools import compress
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from models import HostRegistry, PingStats
+from models.window_stats import load_windows, windows_to_bytes
+
+MAGIC = b'PMCK'
+VERSION = 2
+_HEADER = struct.Struct('<4sHId')  # magic, version, host count, saved at
+
+# Per-host columns: name, array typecode, version that added the column.
+# Columns missing from older files read as 0, or NaN for 'd' columns.
+_COLUMNS = (
+    ('interval', 'd', 1),
+    ('phase', 'd', 1),
+    ('failed_attempts', 'I', 1),
+    ('alerted', 'B', 1),
+    ('total_pings', 'Q', 1),
+    ('failed_pings', 'Q', 1),
+    ('start_time', 'd', 1),
+    ('last_failure', 'd', 1),
+    ('rtt_count', 'Q', 1),
+    ('rtt_total', 'd', 1),
+    ('last_rtt', 'd', 1),
+    ('min_rtt', 'd', 1),
+    ('max_rtt', 'd', 1),
+    ('windows_size', 'I', 1),
+    ('packets_sent', 'Q', 2),
+    ('packets_lost', 'Q', 2),
+    ('jitter', 'd', 2)
+)
+
+
+class HostState:
+    """Restorable state of one monitored host"""
+
+    __slots__ = ('host', 'interval', 'phase', 'failed_attempts', 'alerted',
+                 'stats')
+
+    def __init__(self, host: str, interval: float, phase: float,
+                 failed_attempts: int, alerted: bool, stats: PingStats):
+        """
+        Args:
+            host: Monitored target
+            interval: Probe interval in seconds
+            phase: Seconds from the checkpoint until the next probe
+            failed_attempts: Current failure streak
+            alerted: Whether a down alert was already sent
+            stats: Host statistics
+        """
+        self.host = host
+        self.interval = interval
+        self.phase = phase
+        self.failed_attempts = failed_attempts
+        self.alerted = alerted
+        self.stats = stats
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    return math.nan if value is None else value.timestamp()
+
+
+def _datetime(value: float) -> Optional[datetime]:
+    return None if value != value else datetime.fromtimestamp(value)
+
+
+def _optional(value: float) -> Optional[float]:
+    return None if value != value else value
+
+
+def _missing(code: str, count: int) -> array:
+    """Get the default column for hosts of a file without it"""
+    return array(code, [math.nan if code == 'd' else 0] * count)
+
+
+def _write(filename: str, hosts: List[str], columns: Dict[str, array],
+           windows: List[bytes], saved_at: float) -> int:
+    """Encode checkpoint columns and write them atomically"""
+    names = "\n".join(hosts).encode('utf-8')
+    parts = [_HEADER.pack(MAGIC, VERSION, len(hosts), saved_at),
+             struct.pack('<I', len(names)), names]
+    for name, _, _ in _COLUMNS:
+        column = columns[name]
+        if sys.byteorder != 'little':
+            column = array(column.typecode, column)
+            column.byteswap()
+        parts.append(column.tobytes())
+    parts.extend(windows)
+    data = b''.join(parts)
+
+    # Written next to the target and renamed over it, so a crash never
+    # leaves a truncated checkpoint behind
+    temp_name = filename + '.tmp'
+    with open(temp_name, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_name, filename)
+    return len(data)
+
+
+def read_checkpoint(filename: str
+                    ) -> Tuple[List[str], Dict[str, array], List[bytes], float]:
+    """
+    Read the raw columns of a checkpoint file
+
+    Returns:
+        Tuple: (hosts, columns by name, serialized windows per host,
+            time the checkpoint was saved)
+
+    Raises:
+        ValueError: If the file is not a checkpoint of a known version
+    """
+    with open(filename, 'rb') as f:
+        data = f.read()
+
+    if len(data) < _HEADER.size:
+        raise ValueError("Checkpoint file is truncated")
+    magic, version, count, saved_at = _HEADER.unpack_from(data)
+    if magic != MAGIC or not 1 <= version <= VERSION:
+        raise ValueError("Not a supported checkpoint file")
+
+    offset = _HEADER.size
+    (names_size,) = struct.unpack_from('<I', data, offset)
+    offset += 4
+    hosts = (data[offset:offset + names_size].decode('utf-8').split("\n")
+             if count else [])
+    offset += names_size
+
+    columns: Dict[str, array] = {}
+    for name, code, added in _COLUMNS:
+        if added > version:
+            columns[name] = _missing(code, count)
+            continue
+        column = array(code)
+        size = column.itemsize * count
+        column.frombytes(data[offset:offset + size])
+        if sys.byteorder != 'little':
+            column.byteswap()
+        columns[name] = column
+        offset += size
+    if offset > len(data) or len(hosts) != count:
+        raise ValueError("Checkpoint file is truncated")
+
+    windows: List[bytes] = []
+    for size in columns['windows_size']:
+        windows.append(data[offset:offset + size] if size else b'')
+        offset += size
+    return hosts, columns, windows, saved_at
+
+
+def save_checkpoint(filename: str,
+                    states: Sequence[HostState],
+                    saved_at: Optional[float] = None) -> int:
+    """
+    Write host states to a binary checkpoint file
+
+    Args:
+        filename: Checkpoint file
+        states: Host states to save
+        saved_at: Reference time of the phases (defaults to now)
+
+    Returns:
+        int: Number of bytes written
+    """
+    saved_at = time.time() if saved_at is None else saved_at
+    columns: Dict[str, array] = {name: array(code)
+                                 for name, code, _ in _COLUMNS}
+    windows: List[bytes] = []
+
+    for state in states:
+        stats = state.stats
+        blob = stats.windows_to_bytes() if stats.windows else b''
+        windows.append(blob)
+        for name, value in (
+                ('interval', state.interval),
+                ('phase', state.phase),
+                ('failed_attempts', state.failed_attempts),
+                ('alerted', 1 if state.alerted else 0),
+                ('total_pings', stats.total_pings),
+                ('failed_pings', stats.failed_pings),
+                ('start_time', _timestamp(stats.start_time)),
+                ('last_failure', _timestamp(stats.last_failure)),
+                ('rtt_count', stats.rtt_count),
+                ('rtt_total', stats.rtt_total),
+                ('last_rtt', math.nan if stats.last_rtt is None
+                 else stats.last_rtt),
+                ('min_rtt', math.nan if stats.min_rtt is None
+                 else stats.min_rtt),
+                ('max_rtt', math.nan if stats.max_rtt is None
+                 else stats.max_rtt),
+                ('windows_size', len(blob)),
+                ('packets_sent', stats.packets_sent),
+                ('packets_lost', stats.packets_lost),
+                ('jitter', math.nan if stats.jitter is None
+                 else stats.jitter)):
+            columns[name].append(value)
+
+    return _write(filename, [state.host for state in states], columns,
+                  windows, saved_at)
+
+
+def load_checkpoint(filename: str,
+                    window_spans: Optional[Dict[str, float]] = None
+                    ) -> Tuple[List[HostState], float]:
+    """
+    Read host states from a checkpoint file
+
+    Args:
+        filename: Checkpoint file
+        window_spans: Sliding windows of the restored statistics
+
+    Returns:
+        Tuple: (host states, time the checkpoint was saved)
+
+    Raises:
+        ValueError: If the file is not a checkpoint of a known version
+    """
+    hosts, columns, windows, saved_at = read_checkpoint(filename)
+
+    rows = zip(hosts, windows,
+               *(columns[name].tolist() for name, _, _ in _COLUMNS))
+    states: List[HostState] = []
+    for (host, blob, interval, phase, failed_attempts, alerted, total_pings,
+         failed_pings, start_time, last_failure, rtt_count, rtt_total,
+         last_rtt, min_rtt, max_rtt, _, packets_sent, packets_lost,
+         jitter) in rows:
+        stats = PingStats(window_spans)
+        stats.total_pings = total_pings
+        stats.failed_pings = failed_pings
+        stats.start_time = _datetime(start_time)
+        stats.last_failure = _datetime(last_failure)
+        stats.rtt_count = rtt_count
+        stats.rtt_total = rtt_total
+        stats.last_rtt = _optional(last_rtt)
+        stats.min_rtt = _optional(min_rtt)
+        stats.max_rtt = _optional(max_rtt)
+        stats.packets_sent = packets_sent
+        stats.packets_lost = packets_lost
+        stats.jitter = _optional(jitter)
+        if blob and stats.windows:
+            stats.load_windows(blob)
+
+        states.append(HostState(host, interval, phase, failed_attempts,
+                                bool(alerted), stats))
+
+    return states, saved_at
+
+
+def save_registry(filename: str,
+                  registry: HostRegistry,
+                  saved_at: Optional[float] = None) -> int:
+    """
+    Write all hosts of a registry to a checkpoint file
+
+    Columns are copied as a whole, skipping the ids of removed hosts.
+    Burst columns, which the registry does not keep, are written empty.
+
+    Args:
+        filename: Checkpoint file
+        registry: Host registry
+        saved_at: Reference time of the phases (defaults to now)
+
+    Returns:
+        int: Number of bytes written
+    """
+    saved_at = time.time() if saved_at is None else saved_at
+    active = registry.active
+    hosts = list(compress(registry.names, active))
+
+    columns: Dict[str, array] = {}
+    for name, code, _ in _COLUMNS:
+        if name == 'phase':
+            columns[name] = array('d', [due - saved_at for due in
+                                        compress(registry.next_due, active)])
+        elif not hasattr(registry, name):
+            columns[name] = _missing(code, len(hosts))
+        elif name != 'windows_size':
+            column = getattr(registry, name)
+            columns[name] = (column if len(hosts) == len(column)
+                             else array(code, compress(column, active)))
+
+    windows = [b''] * len(hosts)
+    if registry.windows:
+        for index, host in enumerate(hosts):
+            host_windows = registry.windows.get(registry.ids[host])
+            if host_windows:
+                windows[index] = windows_to_bytes(host_windows)
+    columns['windows_size'] = array('I', map(len, windows))
+    return _write(filename, hosts, columns, windows, saved_at)
+
+
+def load_registry(filename: str,
+                  registry: HostRegistry,
+                  now: Optional[float] = None) -> Tuple[int, float]:
+    """
+    Add the hosts of a checkpoint file to a registry
+
+    Counters, failure streaks and alert flags are kept. Probes resume at
+    their saved phase; hosts whose probe fell due in the meantime keep
+    their offset within the interval. Hosts already registered are left
+    as they are.
+
+    Args:
+        filename: Checkpoint file
+        registry: Host registry
+        now: Current time (defaults to wall clock)
+
+    Returns:
+        Tuple: (number of hosts restored, time the checkpoint was saved)
+    """
+    hosts, columns, windows, saved_at = read_checkpoint(filename)
+    now = time.time() if now is None else now
+    elapsed = now - saved_at
+    next_due = array('d', [
+        now + (phase - elapsed if phase >= elapsed
+               else (phase - elapsed) % interval)
+        for phase, interval in zip(columns['phase'], columns['interval'])])
+
+    restored = registry.extend(hosts, next_due, columns)
+    if registry.window_spans:
+        for host, blob in zip(hosts, windows):
+            host_id = registry.ids.get(host)
+            if blob and host_id in registry.windows:
+                load_windows(registry.windows[host_id], blob)
+    return restored, saved_at
+
+
+class CheckpointManager:
+    """Saves a checkpoint periodically and once more on shutdown"""
+
+    def __init__(self,
+                 filename: str,
+                 save: Callable[[str], int],
+                 interval: float = 60.0):
+        """
+        Args:
+            filename: Checkpoint file
+            save: Function writing a checkpoint to a file name, such as
+                ProbeScheduler.save_checkpoint
+            interval: Seconds between checkpoints
+        """
+        self.filename = filename
+        self.save = save
+        self.interval = interval
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger('PingMonitor')
+
+    def save_now(self) -> bool:
+        """
+        Write a checkpoint immediately
+
+        Returns:
+            bool: True if the checkpoint was written
+        """
+        try:
+            self.save(self.filename)
+            return True
+        except Exception as e:
+            self.logger.error(f"Checkpoint to {self.filename} failed: {e}")
+            return False
+
+    def start(self) -> None:
+        """Start saving in the background"""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and write a final checkpoint"""
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+        self.save_now()
+
+    def _loop(self) -> None:
+        while not self.stop_event.wait(self.interval):
+            self.save_now()
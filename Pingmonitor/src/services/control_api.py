@@ -0,0 +1,222 @@
+"""
+Control API Module
+Local HTTP/JSON interface to change monitored hosts at runtime
+"""
+import json
+import threading
+import logging
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+from .scheduler import ProbeScheduler
+
+MAX_BODY_SIZE = 64 * 1024 * 1024
+
+
+class ControlError(Exception):
+    """Invalid control request"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _host_list(body: Dict) -> List[str]:
+    """Get the "hosts" list of a request body"""
+    hosts = body.get('hosts')
+    if not isinstance(hosts, list):
+        raise ControlError('"hosts" must be a list')
+    names = [item.get('host') if isinstance(item, dict) else item
+             for item in hosts]
+    if not all(isinstance(name, str) for name in names):
+        raise ControlError('Each host must be a string')
+    return names
+
+
+def _host_intervals(body: Dict) -> Dict[str, float]:
+    """
+    Get intervals by host from a request body
+
+    Hosts are either names using the request "interval", or objects with
+    their own "host" and "interval".
+    """
+    hosts = body.get('hosts')
+    if not isinstance(hosts, list):
+        raise ControlError('"hosts" must be a list')
+    default = body.get('interval')
+
+    intervals: Dict[str, float] = {}
+    for item in hosts:
+        if isinstance(item, dict):
+            host, interval = item.get('host'), item.get('interval', default)
+        else:
+            host, interval = item, default
+        if not isinstance(host, str):
+            raise ControlError('Each host must be a string')
+        if interval is None:
+            raise ControlError(f'No interval given for {host}')
+        if (isinstance(interval, bool)
+                or not isinstance(interval, (int, float))):
+            raise ControlError(f'Interval of {host} must be a number')
+        intervals[host] = interval
+    return intervals
+
+
+class ControlServer:
+    """
+    Serves the control API for a running ProbeScheduler
+
+    Endpoints (JSON bodies with a "hosts" list):
+        GET  /status                 Fleet summary and probe queue waits
+        GET  /hosts[?host=&status=]  Host states, optionally filtered
+        POST /hosts/add              Add hosts ("interval" or per host)
+        POST /hosts/remove           Remove hosts
+        POST /hosts/pause            Pause probing, keeping statistics
+        POST /hosts/resume           Resume paused hosts
+        POST /hosts/interval         Change intervals
+
+    Each batch is applied to the scheduler in a single pass. The server
+    binds to localhost by default. POST requests must be sent as
+    application/json, which a web page cannot do across sites without a
+    CORS preflight that this server never grants.
+    """
+
+    def __init__(self,
+                 scheduler: ProbeScheduler,
+                 host: str = '127.0.0.1',
+                 port: int = 8765):
+        """
+        Args:
+            scheduler: Scheduler to control
+            host: Address to bind to
+            port: Port to listen on (0 picks a free port)
+        """
+        self.scheduler = scheduler
+        self.logger = logging.getLogger('PingMonitor')
+        self.httpd = ThreadingHTTPServer((host, port), _ControlHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.control = self
+        self.thread: Optional[threading.Thread] = None
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Get the bound address and port"""
+        return self.httpd.server_address[:2]
+
+    def start(self) -> None:
+        """Serve requests in the background"""
+        self.thread = threading.Thread(target=self.httpd.serve_forever,
+                                       daemon=True)
+        self.thread.start()
+        host, port = self.address
+        self.logger.info(f"Control API listening on {host}:{port}")
+
+    def stop(self) -> None:
+        """Stop serving and close the socket"""
+        if self.thread and self.thread.is_alive():
+            self.httpd.shutdown()
+            self.thread.join(timeout=2.0)
+        self.httpd.server_close()
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]],
+               body: Optional[Dict]) -> Dict:
+        """
+        Apply a control request
+
+        Returns:
+            Dict: JSON response
+
+        Raises:
+            ControlError: If the request is invalid or the endpoint does
+                not exist
+        """
+        scheduler = self.scheduler
+
+        if method == 'GET' and path == '/status':
+            return {
+                **scheduler.summary(),
+                'running': not scheduler.stop_event.is_set(),
+                **({'budget': scheduler.budget.wait_stats()}
+                   if scheduler.budget else {})
+            }
+
+        if method == 'GET' and path == '/hosts':
+            states = scheduler.host_states(query.get('host'))
+            statuses = query.get('status')
+            if statuses:
+                states = [state for state in states
+                          if state['status'] in statuses]
+            return {'hosts': states}
+
+        if method != 'POST':
+            raise ControlError(f'Unknown endpoint {method} {path}', 404)
+        if not isinstance(body, dict):
+            raise ControlError('Request body must be a JSON object')
+
+        if path == '/hosts/add':
+            intervals = _host_intervals(body)
+            errors = scheduler.add_hosts(intervals)
+            return {'applied': len(intervals) - len(errors),
+                    'errors': errors}
+        if path == '/hosts/interval':
+            intervals = _host_intervals(body)
+            errors = scheduler.set_intervals(intervals)
+            return {'applied': len(intervals) - len(errors),
+                    'errors': errors}
+        if path == '/hosts/remove':
+            return {'applied': scheduler.remove_hosts(_host_list(body))}
+        if path == '/hosts/pause':
+            return {'applied': scheduler.pause_hosts(_host_list(body))}
+        if path == '/hosts/resume':
+            return {'applied': scheduler.resume_hosts(_host_list(body))}
+        raise ControlError(f'Unknown endpoint {method} {path}', 404)
+
+
+class _ControlHandler(BaseHTTPRequestHandler):
+    """Decodes HTTP requests for ControlServer"""
+
+    def do_GET(self) -> None:
+        self._dispatch('GET')
+
+    def do_POST(self) -> None:
+        self._dispatch('POST')
+
+    def _dispatch(self, method: str) -> None:
+        control: ControlServer = self.server.control
+        url = urlparse(self.path)
+        try:
+            body = None
+            if method == 'POST':
+                content_type = self.headers.get('Content-Type') or ''
+                if (content_type.split(';')[0].strip().lower()
+                        != 'application/json'):
+                    raise ControlError(
+                        'Content-Type must be application/json', 415)
+                size = int(self.headers.get('Content-Length') or 0)
+                if size > MAX_BODY_SIZE:
+                    raise ControlError('Request body is too large')
+                try:
+                    body = json.loads(self.rfile.read(size) or b'{}')
+                except ValueError as e:
+                    raise ControlError(f'Invalid JSON: {e}')
+            response = control.handle(method, url.path.rstrip('/') or '/',
+                                      parse_qs(url.query), body)
+            self._reply(200, response)
+        except ControlError as e:
+            self._reply(e.status, {'error': str(e)})
+        except Exception as e:
+            control.logger.error(f"Control request failed: {e}")
+            self._reply(500, {'error': str(e)})
+
+    def _reply(self, code: int, payload: Dict) -> None:
+        data = json.dumps(payload).encode('utf-8')
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        self.server.control.logger.debug(
+            "Control API: " + format % args)
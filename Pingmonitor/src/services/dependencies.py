@@ -0,0 +1,316 @@
+"""
+Dependency Module
+Parent/child relations between monitored hosts for alert suppression
+"""
+import ipaddress
+import threading
+import time
+import logging
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+from utils.validators import parse_target
+
+
+class OutageEvent:
+    """Root-cause event of a parent host being down"""
+
+    def __init__(self, parent: str, started: float):
+        self.parent = parent
+        self.started = started
+        self.ended: Optional[float] = None
+        self.suppressed: Set[str] = set()  # Children whose alerts were held
+
+    @property
+    def active(self) -> bool:
+        return self.ended is None
+
+    def __repr__(self) -> str:
+        return (f"OutageEvent(parent={self.parent!r}, "
+                f"suppressed={len(self.suppressed)}, active={self.active})")
+
+
+class DependencyMap:
+    """Tree of hosts that depend on an upstream host (e.g. a gateway)"""
+
+    def __init__(self):
+        self.parents: Dict[str, str] = {}
+        self.children: Dict[str, Set[str]] = {}
+
+    def set_parent(self, child: str, parent: Optional[str]) -> None:
+        """
+        Make a host depend on a parent, or clear its parent with None
+
+        Raises:
+            ValueError: If the relation would create a cycle
+        """
+        if parent is not None:
+            if parent == child or child in self.ancestors(parent):
+                raise ValueError(f"{child} -> {parent} would create a cycle")
+
+        old_parent = self.parents.pop(child, None)
+        if old_parent is not None:
+            self.children[old_parent].discard(child)
+            if not self.children[old_parent]:
+                del self.children[old_parent]
+
+        if parent is not None:
+            self.parents[child] = parent
+            self.children.setdefault(parent, set()).add(child)
+
+    def remove_host(self, host: str) -> None:
+        """Forget a host and detach its children"""
+        self.set_parent(host, None)
+        for child in list(self.children.get(host, ())):
+            self.set_parent(child, None)
+
+    def ancestors(self, host: str) -> Iterator[str]:
+        """Iterate over the parent, grandparent, ... of a host"""
+        parent = self.parents.get(host)
+        while parent is not None:
+            yield parent
+            parent = self.parents.get(parent)
+
+    def descendants(self, host: str) -> List[str]:
+        """Get all hosts below a host"""
+        found: List[str] = []
+        pending = list(self.children.get(host, ()))
+        while pending:
+            child = pending.pop()
+            found.append(child)
+            pending.extend(self.children.get(child, ()))
+        return found
+
+    def auto_group(self,
+                   hosts: Iterable[str],
+                   gateways: Optional[Dict[str, str]] = None,
+                   prefix: int = 24) -> int:
+        """
+        Attach hosts to the gateway of their subnet
+
+        Args:
+            hosts: Monitored targets
+            gateways: Optional mapping of subnet (e.g. "10.0.1.0/24") to
+                gateway target. Subnets without an entry use their first
+                address (e.g. 10.0.1.1) when it is monitored too.
+            prefix: Subnet prefix length used for grouping
+
+        Returns:
+            int: Number of hosts that got a parent
+        """
+        hosts = list(hosts)
+        addresses = {}
+        for target in hosts:
+            try:
+                host = parse_target(target)[1]
+                addresses[target] = ipaddress.ip_address(host)
+            except ValueError:
+                continue  # Host names are left ungrouped
+
+        networks = {ipaddress.ip_network(subnet): gateway
+                    for subnet, gateway in (gateways or {}).items()}
+        by_address = {address: target for target, address in addresses.items()}
+
+        grouped = 0
+        for target, address in addresses.items():
+            subnet = ipaddress.ip_network(f"{address}/{prefix}", strict=False)
+            gateway = networks.get(subnet) or next(
+                (gw for network, gw in networks.items() if address in network),
+                None)
+            if gateway is None:
+                gateway = by_address.get(subnet.network_address + 1)
+            if gateway is None or gateway == target or target in self.parents:
+                continue
+            try:
+                self.set_parent(target, gateway)
+                grouped += 1
+            except ValueError:
+                continue
+        return grouped
+
+
+class SuppressionTracker:
+    """
+    Tracks which parents are down and which child alerts were held back
+    """
+
+    def __init__(self, dependencies: DependencyMap):
+        self.dependencies = dependencies
+        self.events: Dict[str, OutageEvent] = {}  # Active events by parent
+
+    def is_suppressed(self, host: str) -> bool:
+        """Check if any ancestor of a host is down"""
+        return any(parent in self.events
+                   for parent in self.dependencies.ancestors(host))
+
+    def root_cause(self, host: str) -> Optional[OutageEvent]:
+        """Get the event of the highest down ancestor of a host"""
+        event = None
+        for parent in self.dependencies.ancestors(host):
+            event = self.events.get(parent, event)
+        return event
+
+    def parent_down(self, parent: str,
+                    timestamp: Optional[float] = None) -> Optional[OutageEvent]:
+        """Open an event for a parent host; None if it has no children"""
+        if parent in self.events or parent not in self.dependencies.children:
+            return None
+        event = OutageEvent(parent, timestamp or time.time())
+        self.events[parent] = event
+        return event
+
+    def parent_up(self, parent: str,
+                  timestamp: Optional[float] = None) -> Optional[OutageEvent]:
+        """Close the event of a parent host"""
+        event = self.events.pop(parent, None)
+        if event is not None:
+            event.ended = timestamp or time.time()
+        return event
+
+
+def build_dependencies(hosts: Iterable[str],
+                       parents: Optional[Dict[str, str]] = None,
+                       auto_group: bool = False,
+                       gateways: Optional[Dict[str, str]] = None,
+                       prefix: int = 24) -> DependencyMap:
+    """
+    Create a dependency map from settings
+
+    Args:
+        hosts: Monitored targets
+        parents: Explicit parent target by child target
+        auto_group: Also attach hosts to the gateway of their subnet
+        gateways: Gateway target by subnet, see DependencyMap.auto_group()
+        prefix: Subnet prefix length used for grouping
+
+    Raises:
+        ValueError: If the parents contain a cycle or a subnet is invalid
+    """
+    dependencies = DependencyMap()
+    for child, parent in (parents or {}).items():
+        dependencies.set_parent(child, parent)
+    if auto_group or gateways:
+        dependencies.auto_group(hosts, gateways, prefix)
+    return dependencies
+
+
+class SuppressionGroup:
+    """
+    Dependency suppression shared by independently running monitors
+
+    Each PingService of a group joins it with its host. While a parent is
+    down, its descendants are probed interval_factor times less often and
+    their alerts are folded into the parent's root-cause event. A child
+    failing while its parent still looks fine gets the parent probed at
+    once and holds its alert until the next failure.
+    """
+
+    def __init__(self,
+                 dependencies: Optional[DependencyMap] = None,
+                 interval_factor: float = 5.0):
+        """
+        Args:
+            dependencies: Parent/child relations between hosts
+            interval_factor: Interval multiplier for hosts behind a down
+                parent
+        """
+        self.dependencies = dependencies or DependencyMap()
+        self.suppression = SuppressionTracker(self.dependencies)
+        self.interval_factor = interval_factor
+        self.logger = logging.getLogger('PingMonitor')
+        self._lock = threading.Lock()
+        self._monitors: Dict[str, object] = {}
+
+        # Callback (called on the probing thread)
+        self.on_root_cause: Optional[Callable[[OutageEvent], None]] = None
+
+    def join(self, host: str, monitor) -> None:
+        """
+        Add a running monitor
+
+        Args:
+            host: Monitored target
+            monitor: Monitor with failed_attempts, stop_event and
+                probe_now(), such as a PingService
+        """
+        with self._lock:
+            self._monitors[host] = monitor
+
+    def leave(self, host: str, monitor) -> None:
+        """Remove a monitor that stopped"""
+        with self._lock:
+            if self._monitors.get(host) is monitor:
+                del self._monitors[host]
+
+    def is_suppressed(self, host: str) -> bool:
+        """Check if any ancestor of a host is down"""
+        with self._lock:
+            return self.suppression.is_suppressed(host)
+
+    def report_failure(self, host: str, failed_attempts: int,
+                       timestamp: Optional[float] = None) -> bool:
+        """
+        Record a failed probe
+
+        Args:
+            host: Monitored target
+            failed_attempts: Failure streak including this probe
+            timestamp: Probe time
+
+        Returns:
+            bool: True if the failure should be alerted
+        """
+        timestamp = timestamp or time.time()
+        event = None
+        parent_monitor = None
+        with self._lock:
+            if failed_attempts == 1:
+                event = self.suppression.parent_down(host, timestamp)
+            cause = self.suppression.root_cause(host)
+            if cause is not None:
+                cause.suppressed.add(host)
+                alert = False
+            else:
+                # Check an upstream host that still looks fine right away
+                parent_monitor = self._monitors.get(
+                    self.dependencies.parents.get(host))
+                if (failed_attempts != 1 or parent_monitor is None
+                        or parent_monitor.failed_attempts
+                        or parent_monitor.stop_event.is_set()):
+                    parent_monitor = None
+                alert = parent_monitor is None
+
+        if parent_monitor is not None:
+            parent_monitor.probe_now()
+        if event is not None:
+            self._report(event)
+        return alert
+
+    def report_success(self, host: str,
+                       timestamp: Optional[float] = None) -> None:
+        """Record an answered probe, ending the outage of a parent"""
+        if host not in self.suppression.events:
+            return
+        with self._lock:
+            event = self.suppression.parent_up(host, timestamp or time.time())
+            # Back to full rate
+            children = [self._monitors.get(child) for child in
+                        self.dependencies.descendants(host)]
+        for monitor in children:
+            if monitor is not None:
+                monitor.probe_now()
+        if event is not None:
+            self._report(event)
+
+    def _report(self, event: OutageEvent) -> None:
+        if event.active:
+            self.logger.error(
+                f"Host {event.parent} is down, suppressing alerts for "
+                f"{len(self.dependencies.descendants(event.parent))} "
+                f"dependent hosts")
+        else:
+            self.logger.info(
+                f"Host {event.parent} restored after "
+                f"{event.ended - event.started:.0f}s, "
+                f"{len(event.suppressed)} dependent alerts suppressed")
+        if self.on_root_cause:
+            self.on_root_cause(event)
@@ -0,0 +1,207 @@
+"""
+Export Module
+Streams log records and probe history to files on a background thread
+"""
+import csv
+import gzip
+import io
+import json
+import os
+import threading
+import logging
+from datetime import datetime
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+from models import LogStore, ProbeHistory
+from .history_archive import HistoryArchive
+
+EXPORT_FORMATS = ('txt', 'csv', 'jsonl')
+
+
+def detect_format(filename: str) -> str:
+    """Get the export format from a file name, ignoring a .gz suffix"""
+    name = filename[:-3] if filename.endswith('.gz') else filename
+    extension = name.rsplit('.', 1)[-1].lower()
+    return extension if extension in EXPORT_FORMATS else 'txt'
+
+
+class ExportJob:
+    """
+    Writes rows to a file in chunks on a worker thread
+
+    Rows come from a chunk iterator so memory use does not depend on the
+    export size. Files ending in .gz are gzip-compressed.
+    """
+
+    def __init__(self,
+                 filename: str,
+                 chunks: Iterable[List[dict]],
+                 total: int,
+                 fields: List[str],
+                 line_format: Optional[Callable[[dict], str]] = None):
+        """
+        Args:
+            filename: Output file (format from the extension)
+            chunks: Iterable of row lists
+            total: Number of rows, for progress reporting
+            fields: Column names for CSV output
+            line_format: Row formatter for plain text output
+        """
+        self.filename = filename
+        self.format = detect_format(filename)
+        self.chunks = chunks
+        self.total = total
+        self.fields = fields
+        self.line_format = line_format or (
+            lambda row: " ".join(str(row[field]) for field in fields))
+        self.written = 0
+        self.error: Optional[str] = None
+        self.cancel_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger('PingMonitor')
+
+        # Callbacks (called on the worker thread)
+        self.on_progress: Optional[Callable[[int, int], None]] = None
+        self.on_done: Optional[Callable[['ExportJob'], None]] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel_event.is_set()
+
+    def start(self) -> None:
+        """Start the export in the background"""
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def cancel(self) -> None:
+        """Stop the export after the current chunk"""
+        self.cancel_event.set()
+
+    def _open(self):
+        if self.filename.endswith('.gz'):
+            return io.TextIOWrapper(gzip.open(self.filename, 'wb', compresslevel=6),
+                                    encoding='utf-8', newline='')
+        return open(self.filename, 'w', encoding='utf-8', newline='')
+
+    def run(self) -> bool:
+        """
+        Write the export
+
+        Returns:
+            bool: True if the export completed
+        """
+        try:
+            with self._open() as f:
+                writer = None
+                if self.format == 'csv':
+                    writer = csv.DictWriter(f, fieldnames=self.fields)
+                    writer.writeheader()
+
+                for rows in self.chunks:
+                    if self.cancelled:
+                        break
+                    if writer:
+                        writer.writerows(rows)
+                    elif self.format == 'jsonl':
+                        f.writelines(json.dumps(row) + "\n" for row in rows)
+                    else:
+                        f.writelines(self.line_format(row) + "\n"
+                                     for row in rows)
+
+                    self.written += len(rows)
+                    if self.on_progress:
+                        self.on_progress(self.written, self.total)
+        except Exception as e:
+            self.error = str(e)
+            self.logger.error(f"Export to {self.filename} failed: {e}")
+
+        if self.error or self.cancelled:
+            # Do not leave a partial file behind
+            try:
+                os.remove(self.filename)
+            except OSError:
+                pass
+
+        if self.on_done:
+            self.on_done(self)
+        return self.error is None and not self.cancelled
+
+
+def log_export(store: LogStore,
+               filename: str,
+               seqs: Optional[List[int]] = None,
+               chunk_size: int = 10000) -> ExportJob:
+    """
+    Create an export job for log records
+
+    Args:
+        store: Log record store
+        filename: Output file (.txt, .csv, .jsonl, optionally .gz)
+        seqs: Sequence numbers to export, defaults to all records
+        chunk_size: Records per chunk
+
+    Returns:
+        ExportJob: Job ready to be started
+    """
+    if seqs is None:
+        first, last = store.first_seq, store.next_seq
+        total = last - first
+        ranges: Iterable = (range(start, min(start + chunk_size, last))
+                            for start in range(first, last, chunk_size))
+    else:
+        total = len(seqs)
+        ranges = (seqs[start:start + chunk_size]
+                  for start in range(0, total, chunk_size))
+
+    def chunks() -> Iterator[List[dict]]:
+        for chunk in ranges:
+            yield [{
+                'time': datetime.fromtimestamp(record.timestamp).isoformat(
+                    sep=' ', timespec='seconds'),
+                'level': record.level,
+                'host': record.host or '',
+                'message': record.message
+            } for record in store.records(chunk)]
+
+    return ExportJob(
+        filename, chunks(), total, ['time', 'level', 'host', 'message'],
+        line_format=lambda row: f"[{row['time']}] {row['message']}")
+
+
+def history_export(history: Union[ProbeHistory, HistoryArchive],
+                   filename: str,
+                   chunk_size: int = 50000) -> ExportJob:
+    """
+    Create an export job for probe history
+
+    Args:
+        history: Probe history, or a HistoryArchive whose files are read
+            one at a time on the worker thread, followed by its rows in
+            memory
+        filename: Output file (.csv, .jsonl or .txt, optionally .gz)
+        chunk_size: Rows per chunk
+
+    Returns:
+        ExportJob: Job ready to be started
+    """
+    if isinstance(history, HistoryArchive):
+        total, parts = history.parts()
+    else:
+        total, parts = len(history), iter([history])
+
+    def chunks() -> Iterator[List[dict]]:
+        for part in parts:
+            hosts = part.hosts
+            for start in range(0, len(part), chunk_size):
+                end = min(start + chunk_size, len(part))
+                yield [{
+                    'host': hosts[host_id],
+                    'timestamp': timestamp,
+                    'success': bool(success),
+                    'rtt': None if rtt != rtt else round(rtt, 3)
+                } for host_id, timestamp, success, rtt in zip(
+                    part.host_id[start:end], part.timestamp[start:end],
+                    part.success[start:end], part.rtt[start:end])]
+
+    return ExportJob(filename, chunks(), total,
+                     ['host', 'timestamp', 'success', 'rtt'])
@@ -0,0 +1,195 @@
+"""
+History Archive Module
+Rolls probe history over into compressed files so memory stays bounded
+"""
+import glob
+import os
+import threading
+import time
+import zipfile
+import logging
+from datetime import datetime
+from typing import Iterator, List, Optional, Tuple
+
+from models import ProbeHistory
+
+
+class HistoryArchive:
+    """
+    Moves probe history out of memory into .npz files
+
+    Rows are written to a new file every interval, or as soon as max_rows
+    are held in memory, and once more on stop. Only the newest max_files
+    files are kept. load() joins the files and the rows still in memory,
+    so reports cover more than the current session.
+
+    Files are written with NumPy; without it rows are dropped at each
+    rollover instead, which still bounds memory.
+    """
+
+    PREFIX = 'history-'
+    CHECK_INTERVAL = 1.0  # Seconds between row count checks
+
+    def __init__(self,
+                 history: ProbeHistory,
+                 directory: str,
+                 interval: float = 300.0,
+                 max_rows: int = 1_000_000,
+                 max_files: int = 0):
+        """
+        Args:
+            history: Probe history to roll over
+            directory: Directory for the history files
+            interval: Seconds between rollovers
+            max_rows: Rows held in memory before rolling over early
+            max_files: Files to keep (0 keeps all)
+        """
+        self.history = history
+        self.directory = directory
+        self.interval = interval
+        self.max_rows = max_rows
+        self.max_files = max_files
+        self.stop_event = threading.Event()
+        self.thread: Optional[threading.Thread] = None
+        self.logger = logging.getLogger('PingMonitor')
+
+        self._lock = threading.Lock()
+        self._unsaved: Optional[ProbeHistory] = None  # Rows a write failed
+
+    def files(self) -> List[str]:
+        """Get the history files, oldest first"""
+        pattern = os.path.join(self.directory, f"{self.PREFIX}*.npz")
+        return sorted(glob.glob(pattern))
+
+    def roll_over(self) -> Optional[str]:
+        """
+        Write the rows held in memory to a new file
+
+        Returns:
+            str: File written, or None if there was nothing to write or
+                the write failed
+        """
+        with self._lock:
+            rows = self.history.take()
+            if self._unsaved is not None:
+                self._unsaved.extend(rows)
+                rows, self._unsaved = self._unsaved, None
+            if not len(rows):
+                return None
+
+            stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+            filename = os.path.join(self.directory,
+                                    f"{self.PREFIX}{stamp}.npz")
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                rows.save(filename)
+            except ImportError:
+                self.logger.warning(f"NumPy is not installed, dropped "
+                                    f"{len(rows)} history rows")
+                return None
+            except OSError as e:
+                if len(rows) < self.max_rows:
+                    self._unsaved = rows  # Retried at the next rollover
+                    self.logger.error(f"Saving history failed: {e}")
+                else:
+                    self.logger.error(f"Saving history failed, dropped "
+                                      f"{len(rows)} rows: {e}")
+                return None
+
+            self._prune()
+        self.logger.debug(f"Saved {len(rows)} history rows to {filename}")
+        return filename
+
+    def parts(self) -> Tuple[int, Iterator[ProbeHistory]]:
+        """
+        Get the history one saved file at a time, then the rows in memory
+
+        The file list and a copy of the rows in memory are taken together,
+        so a rollover in between neither drops nor repeats rows. Files are
+        only loaded when the iterator reaches them.
+
+        Returns:
+            Tuple: (number of rows, histories in time order)
+
+        Raises:
+            ImportError: If NumPy is not installed and files exist
+        """
+        memory = ProbeHistory()
+        with self._lock:
+            files = self.files()
+            if self._unsaved is not None:
+                memory.extend(self._unsaved)
+            memory.extend(self.history)
+        total = len(memory) + sum(self._file_rows(name) for name in files)
+
+        def iterate() -> Iterator[ProbeHistory]:
+            for filename in files:
+                try:
+                    yield ProbeHistory.load(filename)
+                except (OSError, ValueError, KeyError,
+                        zipfile.BadZipFile) as e:
+                    self.logger.error(f"Skipping history file "
+                                      f"{filename}: {e}")
+            yield memory
+
+        return total, iterate()
+
+    def load(self) -> ProbeHistory:
+        """
+        Join the saved files and the rows still in memory
+
+        Raises:
+            ImportError: If NumPy is not installed and files exist
+        """
+        combined = ProbeHistory()
+        for part in self.parts()[1]:
+            combined.extend(part)
+        return combined
+
+    @staticmethod
+    def _file_rows(filename: str) -> int:
+        """Get the number of rows of a file from its header only"""
+        import numpy as np
+        try:
+            with zipfile.ZipFile(filename) as archive:
+                with archive.open('success.npy') as f:
+                    version = np.lib.format.read_magic(f)
+                    if version == (1, 0):
+                        header = np.lib.format.read_array_header_1_0(f)
+                    else:
+                        header = np.lib.format.read_array_header_2_0(f)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            return 0  # Reported when the file is loaded
+        return header[0][0]
+
+    def start(self) -> None:
+        """Start rolling over in the background"""
+        self.stop_event.clear()
+        self.thread = threading.Thread(target=self._loop, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and save the remaining rows"""
+        self.stop_event.set()
+        if self.thread and self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+        self.roll_over()
+
+    def _prune(self) -> None:
+        """Delete the oldest files beyond max_files"""
+        if self.max_files <= 0:
+            return
+        for filename in self.files()[:-self.max_files]:
+            try:
+                os.remove(filename)
+            except OSError as e:
+                self.logger.warning(f"Could not remove {filename}: {e}")
+
+    def _loop(self) -> None:
+        next_roll = time.monotonic() + self.interval
+        while not self.stop_event.wait(min(self.CHECK_INTERVAL,
+                                           self.interval)):
+            if (len(self.history) >= self.max_rows
+                    or time.monotonic() >= next_roll):
+                self.roll_over()
+                next_roll = time.monotonic() + self.interval
@@ -2,42 +2,76 @@
 Ping Service Module
 Handles ping operations and monitoring functionality
 """
-import subprocess
 import threading
+import time
 from datetime import datetime
-from typing import Optional, Callable
+from typing import Dict, Optional, Callable, Set, Tuple
 import logging
 
-from models import PingStats
-from utils.validators import is_valid_host
+from models import BurstResult, PingStats, ProbeResult
+from utils.validators import is_valid_target
+from .probers import CancelToken, Prober
+from .async_probers import TargetProber
+from .rate_limit import RateLimitedProber
+from .checkpoint import HostState, load_checkpoint, save_checkpoint
+from .dependencies import SuppressionGroup
 
 
 class PingService:
-    def __init__(self):
+    def __init__(self, prober: Optional[Prober] = None):
+        # Probes share the global ProbeBudget unless a prober is given
+        self.prober: Prober = prober or RateLimitedProber(TargetProber())
         self.stop_event = threading.Event()
         self.stop_event.set()  # Initially stopped
+        self._wakeup = threading.Event()  # Ends the wait for the next probe
         self.monitoring_thread: Optional[threading.Thread] = None
+        self._cancel = CancelToken()  # Aborts the probes of this monitor
         self.stats = PingStats()
+        self._stats_lock = threading.Lock()  # Held while stats change
+        self.host: Optional[str] = None
+        self.interval: int = 0
+        self.failed_attempts = 0
+        self._down_alerted = False
+        self._restored_host: Optional[str] = None  # Stats came from a checkpoint
+        self._restored_alerted = False
         self.logger = logging.getLogger('PingMonitor')
 
+        # Sliding window metric limits, e.g. {'loss_5m': 20.0}
+        self.alert_thresholds: Dict[str, float] = {}
+        self._active_alerts: Set[str] = set()
+
+        # Probes sent per cycle and seconds between them; bursts of more
+        # than one probe also measure packet loss and jitter
+        self.burst_size = 1
+        self.burst_spacing = 0.01
+
+        # Shared with the monitors of related hosts to suppress alerts
+        # and slow down probing behind a down parent
+        self.dependencies: Optional[SuppressionGroup] = None
+
         # Callbacks
         self.on_status_change: Optional[Callable[[bool], None]] = None
         self.on_stats_update: Optional[Callable[[], None]] = None
         self.on_error: Optional[Callable[[str], None]] = None
+        self.on_probe_result: Optional[
+            Callable[[str, ProbeResult], None]] = None
+        self.on_threshold_alert: Optional[
+            Callable[[str, float, float], None]] = None
 
     def start_monitoring(self, host: str, interval: int) -> bool:
         """
         Start monitoring a host
 
         Args:
-            host: Host to monitor
+            host: Host to monitor, optionally as tcp://host:port or
+                udp://host:port
             interval: Ping interval in seconds
 
         Returns:
             bool: True if monitoring started successfully
         """
         # Validate parameters
-        valid, error_msg = is_valid_host(host)
+        valid, error_msg = is_valid_target(host)
         if not valid:
             self.logger.error(f"Invalid host: {error_msg}")
             if self.on_error:
@@ -57,16 +91,31 @@ class PingService:
                 self.on_error("Monitoring is already running")
             return False
 
-        # Initialize monitoring
+        # Initialize monitoring, keeping restored state of the same host
         self.stop_event.clear()
-        self.stats.reset()
-        self.stats.start_time = datetime.now()
+        self._wakeup.clear()
+        if host != self._restored_host:
+            self.stats.reset()
+            self.failed_attempts = 0
+            self.stats.start_time = datetime.now()
+            self._restored_alerted = False
+            self._active_alerts.clear()
+        else:
+            # Alerts raised before the checkpoint are not raised again
+            self._active_alerts = set(self._exceeded_thresholds())
+        self._restored_host = None
         self.stats.current_status = "Running"
+        self.host = host
+        self.interval = interval
+        self._down_alerted = self._restored_alerted
+        if self.dependencies:
+            self.dependencies.join(host, self)
 
         # Start monitoring thread
+        self._cancel = CancelToken()
         self.monitoring_thread = threading.Thread(
             target=self._monitor_loop,
-            args=(host, interval),
+            args=(host, interval, self._cancel),
             daemon=True
         )
         self.monitoring_thread.start()
@@ -76,8 +125,12 @@ class PingService:
         return True
 
     def stop_monitoring(self) -> None:
-        """Stop monitoring"""
+        """Stop monitoring, aborting a probe in flight"""
         self.stop_event.set()
+        self._wakeup.set()
+        self._cancel.cancel()
+        if self.dependencies and self.host is not None:
+            self.dependencies.leave(self.host, self)
         if self.monitoring_thread and self.monitoring_thread.is_alive():
             self.monitoring_thread.join(timeout=2.0)
             if self.monitoring_thread.is_alive():
@@ -88,71 +141,191 @@ class PingService:
         if self.on_stats_update:
             self.on_stats_update()
 
-    def _monitor_loop(self, host: str, interval: int) -> None:
+    def _monitor_loop(self, host: str, interval: int,
+                      token: Optional[CancelToken] = None) -> None:
         """
         Main monitoring loop
 
         Args:
             host: Host to monitor
             interval: Ping interval in seconds
+            token: Token aborting the probes of this run
         """
-        failed_attempts = 0
-
         while not self.stop_event.is_set():
-            self.stats.total_pings += 1
-            is_successful = self._ping_host(host)
-
-            if not is_successful:
-                failed_attempts += 1
-                self.stats.failed_pings += 1
-                self.stats.last_failure = datetime.now()
-
-                self.logger.error(
-                    f"Host {host} is unreachable (attempt {failed_attempts})")
-                if self.on_status_change:
-                    self.on_status_change(False)
+            result = self._ping_host(host, token)
+            if self.stop_event.is_set():
+                break  # Probe aborted by stop_monitoring()
+
+            timestamp = result.timestamp or time.time()
+            is_burst = isinstance(result, BurstResult)
+            with self._stats_lock:
+                self.stats.total_pings += 1
+                if is_burst:
+                    self.stats.record_burst(result, timestamp)
+                if not result.success:
+                    self.failed_attempts += 1
+                    self.stats.failed_pings += 1
+                    self.stats.last_failure = datetime.now()
+                elif not is_burst and result.rtt is not None:
+                    self.stats.record_rtt(result.rtt)
+                if not is_burst:
+                    self.stats.record_window(timestamp, result.success,
+                                             result.rtt)
+
+            if not result.success:
+                if (self.dependencies is None
+                        or self.dependencies.report_failure(
+                            host, self.failed_attempts, timestamp)):
+                    self._down_alerted = True
+                    self.logger.error(
+                        f"Host {host} is unreachable "
+                        f"(attempt {self.failed_attempts})")
+                    if self.on_status_change:
+                        self.on_status_change(False)
+                else:
+                    self.logger.info(
+                        f"Host {host} is unreachable "
+                        f"(attempt {self.failed_attempts}), alert held "
+                        f"back while its upstream host is checked or down")
             else:
-                if failed_attempts > 0:
+                if self.dependencies:
+                    self.dependencies.report_success(host, timestamp)
+                if self._down_alerted:
                     self.logger.info(f"Connection to {host} restored")
                     if self.on_status_change:
                         self.on_status_change(True)
-                failed_attempts = 0
+                with self._stats_lock:
+                    self.failed_attempts = 0
+                self._down_alerted = False
+
+            self._check_thresholds()
+
+            if self.on_probe_result:
+                self.on_probe_result(host, result)
 
             if self.on_stats_update:
                 self.on_stats_update()
 
-            self.stop_event.wait(interval)
+            self._wait_next(host, interval)
 
         self.logger.info("Monitoring stopped")
 
-    def _ping_host(self, host: str) -> bool:
+    def _wait_next(self, host: str, interval: int) -> None:
+        """
+        Wait for the next probe
+
+        Hosts behind a down parent wait interval_factor intervals of
+        their group, checking after each interval whether the parent
+        recovered. probe_now() and stop_monitoring() end the wait.
+        """
+        group = self.dependencies
+        waits = 1
+        if group and group.is_suppressed(host):
+            waits = max(1, round(group.interval_factor))
+        for _ in range(waits):
+            if self._wakeup.wait(interval):
+                break
+            if group is None or not group.is_suppressed(host):
+                break
+        self._wakeup.clear()
+
+    def probe_now(self) -> None:
+        """Probe without waiting for the rest of the interval"""
+        self._wakeup.set()
+
+    def save_checkpoint(self, filename: str) -> int:
+        """
+        Write the state of the monitored host to a checkpoint file
+
+        Safe to call from another thread while monitoring.
+
+        Returns:
+            int: Number of bytes written
+        """
+        with self._stats_lock:
+            states = []
+            if self.host is not None:
+                states.append(HostState(self.host, self.interval, 0.0,
+                                        self.failed_attempts,
+                                        self._down_alerted, self.stats))
+            return save_checkpoint(filename, states)
+
+    def restore_checkpoint(self, filename: str) -> Optional[Tuple[str, int]]:
+        """
+        Load host state saved with save_checkpoint()
+
+        The restored statistics are kept when monitoring is next started
+        for the same host, and alerts that were already raised are not
+        raised again.
+
+        Args:
+            filename: Checkpoint file
+
+        Returns:
+            Tuple: (host, interval) of the restored state, or None
         """
-        Execute ping command safely
+        if not self.stop_event.is_set():
+            return None
+        states, _ = load_checkpoint(filename, self.stats.window_spans)
+        if not states:
+            return None
+
+        state = states[0]
+        self.stats = state.stats
+        self.stats.current_status = "Not Running"
+        self.failed_attempts = state.failed_attempts
+        self._restored_alerted = state.alerted
+        self.host = self._restored_host = state.host
+        self.interval = max(1, int(state.interval))
+        return self.host, self.interval
+
+    def _check_thresholds(self) -> None:
+        """Raise or clear alerts for sliding window metrics over their limit"""
+        if not self.alert_thresholds:
+            return
+
+        exceeded = self._exceeded_thresholds()
+        for metric, limit in self.alert_thresholds.items():
+            value = exceeded.get(metric)
+
+            if value is not None and metric not in self._active_alerts:
+                self._active_alerts.add(metric)
+                self.logger.warning(
+                    f"{metric} is {value:.1f}, above threshold {limit}")
+                if self.on_threshold_alert:
+                    self.on_threshold_alert(metric, value, limit)
+            elif value is None and metric in self._active_alerts:
+                self._active_alerts.discard(metric)
+                self.logger.info(f"{metric} is back under threshold {limit}")
+
+    def _exceeded_thresholds(self) -> Dict[str, float]:
+        """Get the sliding window metrics over their limit with values"""
+        if not self.alert_thresholds:
+            return {}
+        with self._stats_lock:
+            metrics = self.stats.window_metrics()
+        return {metric: metrics[metric]
+                for metric, limit in self.alert_thresholds.items()
+                if metrics.get(metric) is not None
+                and metrics[metric] > limit}
+
+    def _ping_host(self, host: str,
+                   token: Optional[CancelToken] = None) -> ProbeResult:
+        """
+        Probe host through the configured prober
 
         Args:
             host: Host to ping
+            token: Token aborting the probe
 
         Returns:
-            bool: True if ping was successful
+            ProbeResult: Outcome of the probe
         """
         try:
-            command = ['ping', '-n', '1', '-w', '1000', host]
-
-            # Hide console window on Windows
-            startupinfo = None
-            if hasattr(subprocess, 'STARTUPINFO'):
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-
-            result = subprocess.run(
-                command,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                startupinfo=startupinfo,
-                timeout=5
-            )
-            return result.returncode == 0
-
-        except (subprocess.TimeoutExpired, subprocess.SubprocessError) as e:
-            self.logger.error(f"Ping error: {str(e)}")
-            return False
+            if self.burst_size > 1:
+                return self.prober.probe_burst(host, self.burst_size,
+                                               self.burst_spacing, token)
+            return self.prober.probe(host, token)
+        except Exception as e:
+            self.logger.error(f"Probe error: {str(e)}")
+            return ProbeResult(False)
@@ -0,0 +1,254 @@
+"""
+Prober Module
+Defines the probe interface used by the monitoring services
+"""
+import locale
+import re
+import subprocess
+import threading
+import time
+import logging
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
+
+from models import BurstResult, ProbeResult
+
+
+class Prober(ABC):
+    """Base class for all probe backends"""
+
+    @abstractmethod
+    def probe(self, host: str,
+              token: Optional['CancelToken'] = None) -> ProbeResult:
+        """
+        Send a single probe to a host
+
+        Args:
+            host: Host to probe
+            token: Token whose cancel() aborts this probe
+
+        Returns:
+            ProbeResult: Outcome of the probe
+        """
+
+    def probe_burst(self, host: str, count: int,
+                    spacing: float = 0.01,
+                    token: Optional['CancelToken'] = None) -> BurstResult:
+        """
+        Send several probes to a host in one cycle
+
+        The default starts each probe on its own thread, spacing seconds
+        after the previous one, so a burst takes about one probe timeout
+        regardless of count.
+
+        Args:
+            host: Host to probe
+            count: Number of probes
+            spacing: Seconds between probes
+            token: Token whose cancel() aborts the burst
+
+        Returns:
+            BurstResult: Outcome of the burst
+        """
+        started = time.time()
+        results: List[Optional[ProbeResult]] = [None] * count
+
+        def run(index: int) -> None:
+            try:
+                results[index] = self.probe(host, token)
+            except Exception:
+                results[index] = ProbeResult(False)
+
+        threads = []
+        for index in range(count):
+            if index:
+                time.sleep(spacing)
+            thread = threading.Thread(target=run, args=(index,), daemon=True)
+            thread.start()
+            threads.append(thread)
+        for thread in threads:
+            thread.join()
+
+        answered = [result for result in results if result]
+        return BurstResult(count, len(answered),
+                           [result.rtt for result in answered
+                            if result.rtt is not None], started)
+
+    def cancel(self, host: Optional[str] = None) -> None:
+        """
+        Abort probes in flight, which then return a failed result
+
+        Args:
+            host: Only abort probes of this host, defaults to all
+        """
+
+    def close(self) -> None:
+        """Release resources held by the prober"""
+
+
+class CancelToken:
+    """
+    Aborts a group of probes, e.g. those of one monitor
+
+    Probes started with a token are aborted by its cancel(), including
+    probes started after it, while other probes running on the same
+    prober are left alone.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._probes: Dict[object, Callable[[object], None]] = {}
+        self.cancelled = False
+
+    def cancel(self) -> int:
+        """
+        Abort the probes of this token
+
+        Returns:
+            int: Number of probes aborted
+        """
+        with self._lock:
+            self.cancelled = True
+            probes = list(self._probes.items())
+        for handle, abort in probes:
+            abort(handle)
+        return len(probes)
+
+    def track(self, handle: object, abort: Callable[[object], None]) -> bool:
+        """
+        Register a running probe
+
+        Returns:
+            bool: False if the token is already cancelled
+        """
+        with self._lock:
+            if self.cancelled:
+                return False
+            self._probes[handle] = abort
+            return True
+
+    def untrack(self, handle: object) -> None:
+        with self._lock:
+            self._probes.pop(handle, None)
+
+
+class InFlightProbes:
+    """Tracks running probes so another thread can abort them"""
+
+    def __init__(self, abort: Callable[[object], None]):
+        """
+        Args:
+            abort: Function aborting one probe given its handle, such as
+                a process or a future
+        """
+        self.abort = abort
+        self._lock = threading.Lock()
+        self._probes: Dict[object, str] = {}
+
+    def add(self, handle: object, host: str,
+            token: Optional[CancelToken] = None) -> None:
+        """Track a probe, aborting it at once if its token is cancelled"""
+        with self._lock:
+            self._probes[handle] = host
+        if token is not None and not token.track(handle, self.abort):
+            self.abort(handle)
+
+    def discard(self, handle: object,
+                token: Optional[CancelToken] = None) -> None:
+        with self._lock:
+            self._probes.pop(handle, None)
+        if token is not None:
+            token.untrack(handle)
+
+    def cancel(self, host: Optional[str] = None) -> int:
+        """
+        Abort running probes
+
+        Returns:
+            int: Number of probes aborted
+        """
+        with self._lock:
+            handles = [handle for handle, name in self._probes.items()
+                       if host is None or name == host]
+        for handle in handles:
+            self.abort(handle)
+        return len(handles)
+
+
+class SystemPingProber(Prober):
+    """
+    ICMP probe through the system ping command
+
+    The round trip time is read from the ping output ("time=12ms",
+    "time<1ms", "time=0.045 ms"). Output in a language that does not match
+    falls back to the run time of the ping process, which slightly
+    overstates the round trip.
+    """
+
+    _RTT = re.compile(r'[=<]\s*(\d+(?:[.,]\d+)?)\s*(?:ms|мс)\b')
+
+    def __init__(self, timeout_ms: int = 1000):
+        self.timeout_ms = timeout_ms
+        self.logger = logging.getLogger('PingMonitor')
+        self._running = InFlightProbes(self._kill)
+
+    def probe(self, host: str,
+              token: Optional[CancelToken] = None) -> ProbeResult:
+        """Execute ping command safely"""
+        started = time.time()
+        try:
+            command = ['ping', '-n', '1', '-w', str(self.timeout_ms), host]
+
+            # Hide console window on Windows
+            startupinfo = None
+            if hasattr(subprocess, 'STARTUPINFO'):
+                startupinfo = subprocess.STARTUPINFO()
+                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
+
+            launched = time.perf_counter()
+            process = subprocess.Popen(
+                command,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+                startupinfo=startupinfo
+            )
+            self._running.add(process, host, token)
+            try:
+                output, _ = process.communicate(timeout=5)
+            except subprocess.TimeoutExpired:
+                self._kill(process)
+                raise
+            finally:
+                self._running.discard(process, token)
+            elapsed = (time.perf_counter() - launched) * 1000
+
+            if process.returncode != 0:
+                return ProbeResult(False, timestamp=started)
+            return ProbeResult(True, rtt=self._parse_rtt(output, elapsed),
+                               timestamp=started)
+
+        except (subprocess.TimeoutExpired, subprocess.SubprocessError) as e:
+            self.logger.error(f"Ping error: {str(e)}")
+            return ProbeResult(False, timestamp=started)
+
+    @classmethod
+    def _parse_rtt(cls, output: bytes, elapsed: float) -> float:
+        """Get the round trip time from ping output, else elapsed"""
+        text = output.decode(locale.getpreferredencoding(False),
+                             errors='replace')
+        match = cls._RTT.search(text)
+        if match is None:
+            return elapsed
+        return float(match.group(1).replace(',', '.'))
+
+    def cancel(self, host: Optional[str] = None) -> None:
+        """Kill running ping processes"""
+        self._running.cancel(host)
+
+    @staticmethod
+    def _kill(process: subprocess.Popen) -> None:
+        try:
+            process.kill()
+            process.wait()
+        except OSError:
+            pass  # Already exited
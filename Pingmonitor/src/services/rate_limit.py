@@ -0,0 +1,338 @@
+"""
+Rate Limit Module
+Shared budget for probes per second and probes in flight
+"""
+import ipaddress
+import threading
+import time
+import logging
+from collections import deque
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+from models import BurstResult, ProbeResult
+from utils.validators import parse_target
+from .probers import CancelToken, InFlightProbes, Prober
+
+
+def _check_limit(name: str, value) -> None:
+    """
+    Check that an optional limit is a positive number
+
+    Raises:
+        ValueError: If the limit is set but not a positive number
+    """
+    if value is None:
+        return
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number")
+    if not value > 0:
+        raise ValueError(f"{name} must be positive")
+
+
+class TokenBucket:
+    """Refills at a fixed rate up to a burst size"""
+
+    __slots__ = ('rate', 'burst', 'tokens', 'updated')
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            rate: Tokens added per second
+            burst: Bucket size, defaults to one second of tokens
+        """
+        self.rate = rate
+        self.burst = max(1.0, rate if burst is None else burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def delay(self, now: float, tokens: float = 1) -> float:
+        """
+        Get the seconds until tokens are available (0 if they are)
+
+        Requests larger than the bucket wait for a full bucket.
+        """
+        self.tokens = min(self.burst,
+                          self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        needed = min(tokens, self.burst)
+        return (0.0 if self.tokens >= needed
+                else (needed - self.tokens) / self.rate)
+
+    def take(self, tokens: float = 1) -> None:
+        """Use tokens"""
+        self.tokens -= tokens
+
+
+class ProbeBudget:
+    """
+    Limits the probes of all monitors together
+
+    A probe waits in acquire() until a token of the global bucket, a token
+    of its destination subnet (if that subnet has a limit) and a slot for
+    probes in flight are all available. Hosts are matched to subnets by
+    IP address; host names are only subject to the global limits.
+
+    Waits longer than warn_wait mean demand exceeds the budget: they are
+    logged at most once per warn_interval and reported to on_overload.
+    """
+
+    _default: Optional['ProbeBudget'] = None
+    _default_lock = threading.Lock()
+
+    def __init__(self,
+                 rate: Optional[float] = None,
+                 max_in_flight: Optional[int] = None,
+                 burst: Optional[float] = None,
+                 subnet_rates: Optional[Dict[str, float]] = None,
+                 warn_wait: float = 1.0,
+                 warn_interval: float = 60.0):
+        """
+        Args:
+            rate: Probes per second, None for no limit
+            max_in_flight: Probes running at once, None for no limit
+            burst: Probes allowed at once after an idle period
+            subnet_rates: Probes per second by destination network,
+                e.g. {'10.1.0.0/16': 20}
+            warn_wait: Queue wait in seconds that counts as overload
+            warn_interval: Minimum seconds between overload warnings
+        """
+        self.warn_wait = warn_wait
+        self.warn_interval = warn_interval
+        self.logger = logging.getLogger('PingMonitor')
+
+        self._condition = threading.Condition()
+        self._bucket: Optional[TokenBucket] = None
+        self._max_in_flight: Optional[int] = None
+        self._subnets: List[Tuple[ipaddress.IPv4Network, TokenBucket]] = []
+        self._host_buckets: Dict[str, Optional[TokenBucket]] = {}
+        self.configure(rate, max_in_flight, burst, subnet_rates)
+
+        # Queue statistics
+        self.in_flight = 0
+        self.waiting = 0
+        self.total_probes = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.recent_waits: Deque[float] = deque(maxlen=1000)
+        self._last_warning = float('-inf')
+
+        # Callback (called on the probing thread)
+        self.on_overload: Optional[Callable[[float, int], None]] = None
+
+    @classmethod
+    def default(cls) -> 'ProbeBudget':
+        """Get the budget shared by all monitors, creating it on first use"""
+        with cls._default_lock:
+            if cls._default is None:
+                cls._default = cls(rate=50.0, max_in_flight=32)
+            return cls._default
+
+    def configure(self,
+                  rate: Optional[float] = None,
+                  max_in_flight: Optional[int] = None,
+                  burst: Optional[float] = None,
+                  subnet_rates: Optional[Dict[str, float]] = None) -> None:
+        """
+        Replace the limits; probes already waiting use the new ones
+
+        Raises:
+            ValueError: If a subnet is not a valid IPv4 network or a limit
+                is not a positive number
+        """
+        _check_limit('Probe rate', rate)
+        _check_limit('Probe burst', burst)
+        _check_limit('Concurrent probes', max_in_flight)
+        for subnet, subnet_rate in (subnet_rates or {}).items():
+            if subnet_rate is None:
+                raise ValueError(f"Probe rate of {subnet} must be a number")
+            _check_limit(f"Probe rate of {subnet}", subnet_rate)
+
+        subnets = sorted(
+            ((ipaddress.IPv4Network(subnet, strict=False),
+              TokenBucket(subnet_rate))
+             for subnet, subnet_rate in (subnet_rates or {}).items()),
+            key=lambda item: item[0].prefixlen, reverse=True)
+
+        with self._condition:
+            self._bucket = (TokenBucket(rate, burst) if rate is not None
+                            else None)
+            self._max_in_flight = max_in_flight
+            self._subnets = subnets
+            self._host_buckets.clear()
+            self._condition.notify_all()
+
+    def _subnet_bucket(self, host: str) -> Optional[TokenBucket]:
+        """Get the bucket of the most specific subnet of a host (lock held)"""
+        if host in self._host_buckets:
+            return self._host_buckets[host]
+
+        bucket = None
+        try:
+            address = ipaddress.IPv4Address(parse_target(host)[1])
+        except ValueError:
+            address = None
+        if address is not None:
+            for network, subnet_bucket in self._subnets:
+                if address in network:
+                    bucket = subnet_bucket
+                    break
+        self._host_buckets[host] = bucket
+        return bucket
+
+    def acquire(self, host: str,
+                cancel: Optional[threading.Event] = None,
+                count: int = 1) -> Optional[float]:
+        """
+        Wait until a probe to a host fits in the budget
+
+        Call release() with the same count when the probes have finished.
+
+        Args:
+            host: Host to probe
+            cancel: Event to give up waiting on; call wake() after
+                setting it
+            count: Probes sent at once, e.g. by a burst. They take count
+                tokens and count slots for probes in flight; a burst larger
+                than max_in_flight runs once no other probe is in flight.
+
+        Returns:
+            float: Seconds spent waiting, or None if cancelled
+        """
+        started = time.monotonic()
+        with self._condition:
+            self.waiting += 1
+            try:
+                while True:
+                    if cancel is not None and cancel.is_set():
+                        return None
+                    now = time.monotonic()
+                    if (self._max_in_flight is not None and self.in_flight
+                            and self.in_flight + count > self._max_in_flight):
+                        self._condition.wait()  # Until a release()
+                        continue
+
+                    subnet = (self._subnet_bucket(host) if self._subnets
+                              else None)
+                    delay = max(
+                        self._bucket.delay(now, count) if self._bucket
+                        else 0.0,
+                        subnet.delay(now, count) if subnet else 0.0)
+                    if delay <= 0:
+                        break
+                    self._condition.wait(delay)
+
+                if self._bucket:
+                    self._bucket.take(count)
+                if subnet:
+                    subnet.take(count)
+                self.in_flight += count
+            finally:
+                self.waiting -= 1
+
+            wait = now - started
+            waiting = self.waiting
+            self.total_probes += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+            self.recent_waits.append(wait)
+
+            overloaded = (wait >= self.warn_wait
+                          and now - self._last_warning >= self.warn_interval)
+            if overloaded:
+                self._last_warning = now
+
+        if overloaded:
+            self.logger.warning(
+                f"Probe demand exceeds the budget: waited {wait:.1f}s "
+                f"with {waiting} more probes queued")
+            if self.on_overload:
+                self.on_overload(wait, waiting)
+        return wait
+
+    def wake(self) -> None:
+        """Make waiting probes check their cancel events"""
+        with self._condition:
+            self._condition.notify_all()
+
+    def release(self, count: int = 1) -> None:
+        """Return the slots of finished probes"""
+        with self._condition:
+            self.in_flight -= count
+            self._condition.notify_all()
+
+    def wait_stats(self) -> Dict[str, float]:
+        """
+        Get queue statistics
+
+        Returns:
+            Dict: probes, waiting, in_flight, avg_wait, max_wait and
+                p95_wait (over the last 1000 probes), waits in seconds
+        """
+        with self._condition:
+            recent = sorted(self.recent_waits)
+            return {
+                'probes': self.total_probes,
+                'waiting': self.waiting,
+                'in_flight': self.in_flight,
+                'avg_wait': (self.total_wait / self.total_probes
+                             if self.total_probes else 0.0),
+                'max_wait': self.max_wait,
+                'p95_wait': (recent[min(len(recent) - 1,
+                                        int(len(recent) * 0.95))]
+                             if recent else 0.0)
+            }
+
+
+class RateLimitedProber(Prober):
+    """Runs the probes of another prober within a ProbeBudget"""
+
+    def __init__(self, prober: Prober, budget: Optional[ProbeBudget] = None):
+        """
+        Args:
+            prober: Prober doing the actual probes
+            budget: Budget to probe within, defaults to the shared one
+        """
+        self.prober = prober
+        self.budget = budget or ProbeBudget.default()
+        self._queued = InFlightProbes(self._stop_waiting)
+
+    def probe(self, host: str,
+              token: Optional[CancelToken] = None) -> ProbeResult:
+        if not self._acquire(host, 1, token):
+            return ProbeResult(False, timestamp=time.time())
+        try:
+            return self.prober.probe(host, token)
+        finally:
+            self.budget.release()
+
+    def probe_burst(self, host: str, count: int,
+                    spacing: float = 0.01,
+                    token: Optional[CancelToken] = None) -> BurstResult:
+        if not self._acquire(host, count, token):
+            return BurstResult(count, 0, [], time.time())
+        try:
+            return self.prober.probe_burst(host, count, spacing, token)
+        finally:
+            self.budget.release(count)
+
+    def _acquire(self, host: str, count: int,
+                 token: Optional[CancelToken]) -> bool:
+        """Wait for the budget unless cancelled; True once acquired"""
+        cancel = threading.Event()
+        self._queued.add(cancel, host, token)
+        try:
+            return self.budget.acquire(host, cancel, count) is not None
+        finally:
+            self._queued.discard(cancel, token)
+
+    def cancel(self, host: Optional[str] = None) -> None:
+        """Abort probes waiting for the budget and probes in flight"""
+        self._queued.cancel(host)
+        self.prober.cancel(host)
+
+    def _stop_waiting(self, cancel: threading.Event) -> None:
+        cancel.set()
+        self.budget.wake()
+
+    def close(self) -> None:
+        self.prober.close()
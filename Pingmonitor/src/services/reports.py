@@ -0,0 +1,314 @@
+"""
+SLA Report Module
+Availability and latency reports computed over probe history with NumPy
+"""
+import csv
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Sequence, Union
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for reports
+    np = None
+
+from models import ProbeHistory
+
+PERIOD_UNITS = {'day': 'D', 'week': 'W', 'month': 'M'}
+WEEK_SHIFT = 3  # Days from Monday to Thursday, the weekday of the epoch
+
+REPORT_FIELDS = [
+    'scope', 'name', 'period', 'probes', 'failures', 'availability',
+    'outages', 'outage_seconds', 'mttr', 'rtt_mean'
+]
+
+
+class SlaReportEngine:
+    """
+    Computes per-period SLA figures for hosts and host groups
+
+    All aggregation is done with vectorized NumPy operations over the
+    history columns, without per-probe Python loops.
+    """
+
+    def __init__(self,
+                 history: ProbeHistory,
+                 groups: Optional[Dict[str, str]] = None,
+                 percentiles: Sequence[float] = (50, 95, 99)):
+        """
+        Args:
+            history: Probe history to report on
+            groups: Optional mapping of host to group name
+            percentiles: Latency percentiles to report
+        """
+        if np is None:
+            raise ImportError("SLA reports require NumPy (pip install numpy)")
+
+        self.history = history
+        self.groups = groups or {}
+        self.percentiles = tuple(percentiles)
+        self.logger = logging.getLogger('PingMonitor')
+
+    @property
+    def fields(self) -> List[str]:
+        """Get the column names of report rows"""
+        return REPORT_FIELDS + [f"rtt_p{p:g}" for p in self.percentiles]
+
+    def compute(self, period: Union[str, float] = 'month') -> List[Dict]:
+        """
+        Compute report rows
+
+        Args:
+            period: 'day', 'week' (Monday to Sunday), 'month' (UTC
+                calendar periods) or a period length in seconds
+
+        Returns:
+            List[Dict]: One row per host and period, then one row per
+                group and period
+        """
+        columns = self.history.columns()
+        if len(columns['timestamp']) == 0:
+            return []
+
+        # Order by host; history is time ordered so a stable sort keeps time
+        order = np.argsort(columns['host_id'], kind='stable')
+        host_id = columns['host_id'][order].astype(np.int64)
+        timestamp = columns['timestamp'][order]
+        success = columns['success'][order]
+        rtt = columns['rtt'][order]
+
+        period_index, labels = self._periods(timestamp, period)
+        outages = self._outages(host_id, timestamp, success)
+        # Outages are attributed to the period in which they started
+        outages['period'] = period_index[outages.pop('start')]
+
+        rows = self._rows('host', self.history.hosts, host_id, period_index,
+                          labels, success, rtt, outages)
+
+        if self.groups:
+            group_names = sorted(set(self.groups.values()))
+            lookup = {name: index for index, name in enumerate(group_names)}
+            group_of_host = np.array(
+                [lookup.get(self.groups.get(host), -1)
+                 for host in self.history.hosts], dtype=np.int64)
+            group_id = group_of_host[host_id]
+            grouped = group_id >= 0
+            rows += self._rows(
+                'group', group_names, group_id[grouped],
+                period_index[grouped], labels, success[grouped],
+                rtt[grouped],
+                self._filter_outages(outages, group_of_host))
+
+        return rows
+
+    def _periods(self, timestamp, period: Union[str, float]):
+        """Map timestamps to period indexes and period labels"""
+        if isinstance(period, str):
+            unit = PERIOD_UNITS.get(period)
+            if unit is None:
+                raise ValueError(f"Unknown report period: {period}")
+            # NumPy weeks start on Thursday like the epoch; shift them so
+            # they run from Monday to Sunday
+            shift = np.timedelta64(WEEK_SHIFT if unit == 'W' else 0, 'D')
+            values = (timestamp.astype('datetime64[s]') + shift).astype(
+                f'datetime64[{unit}]')
+            index = values.astype(np.int64)
+            first = int(index.min())
+            labels = []
+            for offset in range(int(index.max()) - first + 1):
+                start = np.datetime64(first + offset, unit)
+                if unit == 'W':
+                    start = start.astype('datetime64[D]') - shift
+                labels.append(str(start))
+            return index - first, labels
+
+        if period <= 0:
+            raise ValueError("Report period must be positive")
+        index = np.floor(timestamp / period).astype(np.int64)
+        first = int(index.min())
+        labels = [
+            datetime.fromtimestamp((first + offset) * period,
+                                   tz=timezone.utc).isoformat()
+            for offset in range(int(index.max()) - first + 1)
+        ]
+        return index - first, labels
+
+    def _outages(self, host_id, timestamp, success) -> Dict:
+        """
+        Find runs of consecutive failures per host
+
+        An outage lasts from its first failed probe to the next successful
+        one. Outages still open at the end of the history are measured up
+        to their last failed probe and count towards downtime but not MTTR.
+        """
+        failed = ~success
+        same_host_prev = np.empty_like(failed)
+        same_host_prev[0] = False
+        same_host_prev[1:] = host_id[1:] == host_id[:-1]
+        same_host_next = np.empty_like(failed)
+        same_host_next[-1] = False
+        same_host_next[:-1] = same_host_prev[1:]
+
+        prev_failed = np.zeros_like(failed)
+        prev_failed[1:] = failed[:-1]
+        next_failed = np.zeros_like(failed)
+        next_failed[:-1] = failed[1:]
+
+        starts = np.flatnonzero(failed & ~(prev_failed & same_host_prev))
+        ends = np.flatnonzero(failed & ~(next_failed & same_host_next))
+
+        closed = same_host_next[ends]
+        recovery = ends + closed.astype(np.int64)
+        return {
+            'start': starts,
+            'key_id': host_id[starts],
+            'duration': timestamp[recovery] - timestamp[starts],
+            'closed': closed
+        }
+
+    @staticmethod
+    def _filter_outages(outages: Dict, group_of_host) -> Dict:
+        """Re-key outages by group, dropping hosts without a group"""
+        group_id = group_of_host[outages['key_id']]
+        keep = group_id >= 0
+        return {
+            'period': outages['period'][keep],
+            'key_id': group_id[keep],
+            'duration': outages['duration'][keep],
+            'closed': outages['closed'][keep]
+        }
+
+    def _rows(self, scope: str, names: List[str], key_id, period_index,
+              labels: List[str], success, rtt, outages: Dict) -> List[Dict]:
+        """Aggregate samples by (key, period) into report rows"""
+        period_count = len(labels)
+        key = key_id * period_count + period_index
+        unique_keys, group = np.unique(key, return_inverse=True)
+        size = len(unique_keys)
+
+        probes = np.bincount(group, minlength=size)
+        passed = np.bincount(group, weights=success, minlength=size)
+
+        outage_key = outages['key_id'] * period_count + outages['period']
+        outage_group = np.searchsorted(unique_keys, outage_key)
+        outage_count = np.bincount(outage_group, minlength=size)
+        downtime = np.bincount(outage_group, weights=outages['duration'],
+                               minlength=size)
+        closed_count = np.bincount(outage_group, weights=outages['closed'],
+                                   minlength=size)
+        repair_time = np.bincount(
+            outage_group, weights=outages['duration'] * outages['closed'],
+            minlength=size)
+
+        # Latency over successful probes with a measured RTT
+        measured = success & ~np.isnan(rtt)
+        rtt_group = group[measured]
+        rtt_values = rtt[measured].astype(np.float64)
+        rtt_count = np.bincount(rtt_group, minlength=size)
+        rtt_sum = np.bincount(rtt_group, weights=rtt_values, minlength=size)
+        quantiles = self._grouped_percentiles(rtt_group, rtt_values,
+                                              rtt_count)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            availability = passed / probes * 100
+            mttr = np.where(closed_count > 0, repair_time / closed_count,
+                            np.nan)
+            rtt_mean = np.where(rtt_count > 0, rtt_sum / rtt_count, np.nan)
+
+        rows = []
+        for index, value in enumerate(unique_keys.tolist()):
+            name_index, label_index = divmod(value, period_count)
+            row = {
+                'scope': scope,
+                'name': names[name_index],
+                'period': labels[label_index],
+                'probes': int(probes[index]),
+                'failures': int(probes[index] - passed[index]),
+                'availability': round(float(availability[index]), 4),
+                'outages': int(outage_count[index]),
+                'outage_seconds': round(float(downtime[index]), 3),
+                'mttr': _optional(mttr[index]),
+                'rtt_mean': _optional(rtt_mean[index])
+            }
+            for percentile, values in zip(self.percentiles, quantiles):
+                row[f"rtt_p{percentile:g}"] = _optional(values[index])
+            rows.append(row)
+        return rows
+
+    def _grouped_percentiles(self, group, values, counts) -> List:
+        """
+        Compute percentiles for every group at once
+
+        Values are sorted by (group, value) and each percentile is read
+        with linear interpolation between the two nearest ranks.
+        """
+        by_value = np.argsort(values)
+        order = by_value[np.argsort(group[by_value], kind='stable')]
+        ordered = values[order]
+        starts = np.cumsum(counts) - counts
+        has_values = counts > 0
+        last = np.maximum(counts - 1, 0)
+
+        results = []
+        for percentile in self.percentiles:
+            position = last * (percentile / 100.0)
+            lower = np.floor(position).astype(np.int64)
+            upper = np.ceil(position).astype(np.int64)
+            if len(ordered) == 0:
+                results.append(np.full(len(counts), np.nan))
+                continue
+            low_value = ordered[np.minimum(starts + lower, len(ordered) - 1)]
+            high_value = ordered[np.minimum(starts + upper, len(ordered) - 1)]
+            value = low_value + (high_value - low_value) * (position - lower)
+            results.append(np.where(has_values, value, np.nan))
+        return results
+
+    def export(self, rows: List[Dict], filename: str) -> bool:
+        """
+        Save report rows as JSON (.json files) or CSV
+
+        Returns:
+            bool: True if save was successful
+        """
+        if filename.lower().endswith('.json'):
+            return self.export_json(rows, filename)
+        return self.export_csv(rows, filename)
+
+    def export_csv(self, rows: List[Dict], filename: str) -> bool:
+        """
+        Save report rows to a CSV file
+
+        Returns:
+            bool: True if save was successful
+        """
+        try:
+            with open(filename, 'w', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=self.fields)
+                writer.writeheader()
+                writer.writerows(rows)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error saving report: {e}")
+            return False
+
+    def export_json(self, rows: List[Dict], filename: str) -> bool:
+        """
+        Save report rows to a JSON file
+
+        Returns:
+            bool: True if save was successful
+        """
+        try:
+            with open(filename, 'w', encoding='utf-8') as f:
+                json.dump(rows, f, indent=4)
+            return True
+        except Exception as e:
+            self.logger.error(f"Error saving report: {e}")
+            return False
+
+
+def _optional(value) -> Optional[float]:
+    """Convert a NumPy scalar to a rounded float, or None for NaN"""
+    value = float(value)
+    return None if value != value else round(value, 3)
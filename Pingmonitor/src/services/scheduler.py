@@ -0,0 +1,685 @@
+"""
+Probe Scheduler Module
+Schedules probes for many hosts in real or virtual time
+"""
+import heapq
+import threading
+import zlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for batch replays
+    np = None
+
+from models import HostRegistry, HostView, ProbeResult
+from utils.clock import SystemClock
+from utils.validators import is_valid_target
+from .probers import CancelToken, Prober
+from .rate_limit import ProbeBudget, RateLimitedProber
+from .simulator import SimulatedProber
+from .dependencies import DependencyMap, OutageEvent, SuppressionTracker
+from .checkpoint import load_registry, save_registry
+
+
+class ProbeScheduler:
+    """
+    Probes many hosts from a single timer heap
+
+    With a SystemClock the scheduler runs probes on a worker pool in a
+    background thread. With a VirtualClock call run_until() to replay
+    probes synchronously in virtual time, or replay_until() to replay a
+    simulated fleet in per-host batches.
+    """
+
+    def __init__(self,
+                 prober: Prober,
+                 clock=None,
+                 max_workers: int = 16,
+                 window_spans: Optional[Dict[str, float]] = None,
+                 dependencies: Optional[DependencyMap] = None,
+                 suppressed_interval_factor: float = 5.0,
+                 budget: Optional[ProbeBudget] = None):
+        """
+        Args:
+            prober: Probe backend
+            clock: SystemClock (default) or VirtualClock
+            max_workers: Number of probes running at once in real time
+            window_spans: Sliding windows kept per host. None disables
+                them to keep per-host memory small on large fleets.
+            dependencies: Parent/child relations between hosts. While a
+                parent is down its descendants are probed less often and
+                their alerts are folded into one root-cause event.
+            suppressed_interval_factor: Interval multiplier for hosts
+                behind a down parent
+            budget: Probe rate and concurrency budget to probe within,
+                shared with other monitors. Defaults to
+                ProbeBudget.default() in real time; virtual time replays
+                are not limited unless a budget is given.
+        """
+        self.clock = clock or SystemClock()
+        if budget is None and not hasattr(self.clock, 'set'):
+            budget = ProbeBudget.default()
+        self.budget = budget
+        self.backend = prober
+        self.prober = RateLimitedProber(prober, budget) if budget else prober
+        self.max_workers = max_workers
+        self.window_spans = window_spans or {}
+        self.dependencies = dependencies or DependencyMap()
+        self.suppression = SuppressionTracker(self.dependencies)
+        self.suppressed_interval_factor = suppressed_interval_factor
+        self.hosts = HostRegistry(self.window_spans)
+        self.logger = logging.getLogger('PingMonitor')
+
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = 0
+        self._lock = threading.RLock()
+        self._wakeup = threading.Event()
+        self.stop_event = threading.Event()
+        self.stop_event.set()  # Initially stopped
+        self._generation = 0  # Bumped by stop() to discard aborted probes
+        self._tokens: Dict[int, CancelToken] = {}  # Probes in flight by id
+        self.scheduler_thread: Optional[threading.Thread] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+        # Callbacks
+        self.on_probe_result: Optional[
+            Callable[[str, ProbeResult], None]] = None
+        self.on_status_change: Optional[Callable[[str, bool], None]] = None
+        self.on_root_cause: Optional[Callable[[OutageEvent], None]] = None
+
+    def add_host(self,
+                 host: str,
+                 interval: float,
+                 phase: Optional[float] = None) -> bool:
+        """
+        Add a host to the schedule
+
+        Args:
+            host: Host to monitor
+            interval: Probe interval in seconds
+            phase: Delay before the first probe. By default hosts are
+                spread evenly over the interval by their name.
+
+        Returns:
+            bool: True if the host was added
+        """
+        error = self._check_host(host, interval)
+        if error:
+            self.logger.error(error)
+            return False
+
+        if phase is None:
+            phase = self._phase(host, interval)
+
+        with self._lock:
+            if host in self.hosts:
+                self.logger.error(f"Host {host} is already scheduled")
+                return False
+            self._push(self._new_entry(host, interval,
+                                       self.clock.now() + phase))
+
+        self._wakeup.set()
+        return True
+
+    def add_hosts(self, hosts: Dict[str, float]) -> Dict[str, str]:
+        """
+        Add many hosts in one pass
+
+        Each host is spread over its interval as with add_host(). The
+        timer heap is rebuilt once instead of per host.
+
+        Args:
+            hosts: Probe interval in seconds by host
+
+        Returns:
+            Dict: Error message by host for hosts that were not added
+        """
+        errors: Dict[str, str] = {}
+        valid: Dict[str, float] = {}
+        for host, interval in hosts.items():
+            error = self._check_host(host, interval)
+            if error:
+                errors[host] = error
+            else:
+                valid[host] = interval
+
+        with self._lock:
+            now = self.clock.now()
+            for host, interval in valid.items():
+                if host in self.hosts:
+                    errors[host] = f"Host {host} is already scheduled"
+                    continue
+                self._new_entry(host, interval,
+                                now + self._phase(host, interval))
+            self._rebuild_heap()
+
+        self._wakeup.set()
+        return errors
+
+    def _check_host(self, host: str, interval: float) -> Optional[str]:
+        """Get the reason a host cannot be scheduled, if any"""
+        valid, error_msg = is_valid_target(host)
+        if not valid:
+            return f"Invalid host: {error_msg}"
+        return self._check_interval(interval)
+
+    @staticmethod
+    def _check_interval(interval: float) -> Optional[str]:
+        """Get the reason an interval is invalid, if any"""
+        if isinstance(interval, bool) or not isinstance(interval,
+                                                        (int, float)):
+            return "Interval must be a number"
+        if interval <= 0:
+            return "Interval must be positive"
+        return None
+
+    def _new_entry(self, host: str, interval: float,
+                   next_due: float) -> HostView:
+        """Register a new host without queueing it (lock held)"""
+        return self.hosts.add(host, interval, next_due, self.clock.now())
+
+    def remove_host(self, host: str) -> bool:
+        """Remove a host from the schedule"""
+        return self.remove_hosts([host]) == 1
+
+    def remove_hosts(self, hosts: Iterable[str]) -> int:
+        """
+        Remove many hosts in one pass
+
+        Returns:
+            int: Number of hosts removed
+        """
+        removed = 0
+        tokens = []
+        with self._lock:
+            now = self.clock.now()
+            for host in hosts:
+                entry = self.hosts.remove(host)
+                if entry is None:
+                    continue
+                self.suppression.parent_up(host, now)
+                self.dependencies.remove_host(host)
+                removed += 1
+                if entry.id in self._tokens:
+                    tokens.append(self._tokens[entry.id])
+            # Drop stale heap entries once many hosts are gone
+            if removed > len(self.hosts):
+                self._rebuild_heap()
+
+        for token in tokens:
+            token.cancel()
+        return removed
+
+    def pause_hosts(self, hosts: Iterable[str]) -> int:
+        """
+        Stop probing hosts while keeping their statistics
+
+        Returns:
+            int: Number of hosts paused
+        """
+        paused = 0
+        with self._lock:
+            for host in hosts:
+                entry = self.hosts.get(host)
+                if entry is None or entry.paused:
+                    continue
+                entry.paused = True
+                paused += 1
+        return paused
+
+    def resume_hosts(self, hosts: Iterable[str]) -> int:
+        """
+        Resume probing paused hosts, spread over their intervals
+
+        Returns:
+            int: Number of hosts resumed
+        """
+        resumed = 0
+        with self._lock:
+            now = self.clock.now()
+            for host in hosts:
+                entry = self.hosts.get(host)
+                if entry is None or not entry.paused:
+                    continue
+                entry.paused = False
+                if not entry.in_flight:
+                    entry.next_due = now + self._phase(host, entry.interval)
+                resumed += 1
+            if resumed:
+                self._rebuild_heap()
+        self._wakeup.set()
+        return resumed
+
+    def set_intervals(self, hosts: Dict[str, float]) -> Dict[str, str]:
+        """
+        Change the probe interval of many hosts in one pass
+
+        A host whose next probe is further away than its new interval is
+        moved forward; statistics are kept.
+
+        Args:
+            hosts: New interval in seconds by host
+
+        Returns:
+            Dict: Error message by host for hosts that were not changed
+        """
+        errors: Dict[str, str] = {}
+        with self._lock:
+            now = self.clock.now()
+            for host, interval in hosts.items():
+                entry = self.hosts.get(host)
+                if entry is None:
+                    errors[host] = f"Host {host} is not scheduled"
+                    continue
+                error = self._check_interval(interval)
+                if error:
+                    errors[host] = error
+                    continue
+                entry.interval = interval
+                if not entry.in_flight and entry.next_due > now + interval:
+                    entry.next_due = now + self._phase(host, interval)
+            self._rebuild_heap()
+        self._wakeup.set()
+        return errors
+
+    def host_states(self,
+                    hosts: Optional[Iterable[str]] = None) -> List[Dict]:
+        """
+        Get a summary of scheduled hosts
+
+        Args:
+            hosts: Hosts to include, defaults to all
+
+        Returns:
+            List: One dict per host with its schedule and statistics
+        """
+        with self._lock:
+            if hosts is None:
+                entries = self.hosts.values()
+            else:
+                entries = [self.hosts.get(host) for host in hosts
+                           if host in self.hosts]
+
+        states = []
+        for entry in entries:
+            if entry.paused:
+                status = 'paused'
+            elif not entry.total_pings:
+                status = 'pending'
+            else:
+                status = 'down' if entry.failed_attempts else 'up'
+            states.append({
+                'host': entry.host,
+                'status': status,
+                'interval': entry.interval,
+                'next_due': entry.next_due,
+                'total_pings': entry.total_pings,
+                'failed_pings': entry.failed_pings,
+                'success_rate': round(entry.success_rate, 3),
+                'failed_attempts': entry.failed_attempts,
+                'last_rtt': entry.last_rtt,
+                'avg_rtt': entry.avg_rtt,
+                'last_failure': (entry.last_failure.isoformat()
+                                 if entry.last_failure else None)
+            })
+        return states
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        """
+        Get fleet-wide totals
+
+        Returns:
+            Dict: See HostRegistry.aggregate()
+        """
+        with self._lock:
+            return self.hosts.aggregate()
+
+    def save_checkpoint(self, filename: str) -> int:
+        """
+        Write the state of all hosts to a checkpoint file
+
+        Returns:
+            int: Number of bytes written
+        """
+        with self._lock:
+            return save_registry(filename, self.hosts, self.clock.now())
+
+    def restore_checkpoint(self, filename: str) -> int:
+        """
+        Schedule the hosts saved in a checkpoint file
+
+        Counters, failure streaks and alert flags are kept, so hosts that
+        were already down are not alerted on again. Probes resume at their
+        saved phase; hosts whose probe fell due while stopped keep their
+        offset within the interval instead of all firing at once.
+
+        Returns:
+            int: Number of hosts restored
+        """
+        with self._lock:
+            now = self.clock.now()
+            restored, _ = load_registry(filename, self.hosts, now)
+            self._rebuild_heap()
+
+            # Reopen root-cause events of parents that were down
+            for host in self.hosts.down_hosts():
+                if host in self.dependencies.children:
+                    last_failure = self.hosts.get(host).last_failure
+                    self.suppression.parent_down(
+                        host, last_failure.timestamp() if last_failure else now)
+
+        self._wakeup.set()
+        return restored
+
+    @staticmethod
+    def _phase(host: str, interval: float) -> float:
+        """Spread hosts evenly over an interval by their name"""
+        return (zlib.crc32(host.encode('utf-8')) % 1000) / 1000 * interval
+
+    def _reschedule(self, entry: HostView, due: float) -> None:
+        """Move the next probe of an idle host earlier (lock held)"""
+        if entry.in_flight or entry.paused or entry.next_due <= due:
+            return
+        entry.next_due = due
+        self._push(entry)
+        self._wakeup.set()
+
+    def _push(self, entry: HostView) -> None:
+        """Queue the next probe of a host"""
+        self._counter += 1
+        heapq.heappush(self._heap, (entry.next_due, self._counter, entry.host))
+
+    def _rebuild_heap(self) -> None:
+        """Queue every idle, active host from scratch (lock held)"""
+        hosts = self.hosts
+        heap = []
+        for due, host, active, paused, in_flight in zip(
+                hosts.next_due, hosts.names, hosts.active, hosts.paused,
+                hosts.in_flight):
+            if active and not paused and not in_flight:
+                self._counter += 1
+                heap.append((due, self._counter, host))
+        heapq.heapify(heap)
+        self._heap = heap
+
+    def _pop_due(self, now: float) -> List[HostView]:
+        """Pop all hosts whose probe is due, skipping stale heap entries"""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                next_due, _, host = heapq.heappop(self._heap)
+                entry = self.hosts.get(host)
+                if (entry is None or entry.paused
+                        or entry.next_due != next_due):
+                    continue  # Removed, paused or rescheduled
+                entry.in_flight = True
+                due.append(entry)
+        return due
+
+    def _next_wakeup(self) -> Optional[float]:
+        """Get the time of the earliest queued probe"""
+        with self._lock:
+            return self._heap[0][0] if self._heap else None
+
+    def _run_probe(self, entry: HostView,
+                   generation: Optional[int] = None) -> None:
+        """
+        Probe a host, record the result and schedule the next probe
+
+        Args:
+            entry: Host to probe
+            generation: Value of _generation when the probe was queued;
+                probes queued before a stop() are skipped
+        """
+        token = CancelToken()
+        with self._lock:
+            if generation is None:
+                generation = self._generation
+            started = generation == self._generation
+            if started:
+                self._tokens[entry.id] = token
+        if started:
+            try:
+                result = self.prober.probe(entry.host, token)
+            except Exception as e:
+                self.logger.error(f"Probe error for {entry.host}: {e}")
+                result = ProbeResult(False, timestamp=self.clock.now())
+
+        # Probes cancelled by stop() or remove_hosts() are not counted
+        cancelled = generation != self._generation
+        if not cancelled and self.hosts.is_current(entry):
+            self._record(entry, result)
+
+        with self._lock:
+            self._tokens.pop(entry.id, None)
+            self.hosts.release(entry)
+            if not self.hosts.is_current(entry) or entry.paused:
+                return
+            # A cancelled probe stays due and runs again after a restart
+            if not cancelled:
+                interval = entry.interval
+                if (self.suppression.events
+                        and self.suppression.is_suppressed(entry.host)):
+                    interval *= self.suppressed_interval_factor
+                entry.next_due = max(entry.next_due + interval,
+                                     self.clock.now())
+            self._push(entry)
+
+    def _record(self, entry: HostView, result: ProbeResult) -> None:
+        """Update host statistics with a probe result"""
+        timestamp = result.timestamp or self.clock.now()
+        failed_attempts = self.hosts.record(entry.id, timestamp,
+                                            result.success, result.rtt)
+        event = None
+        alert = None
+
+        if not result.success:
+            with self._lock:
+                deferred = False
+                if failed_attempts == 1:
+                    event = self.suppression.parent_down(entry.host, timestamp)
+                    # Check an upstream host that still looks fine right
+                    # away, and hold this alert until its result is known
+                    parent = self.hosts.get(
+                        self.dependencies.parents.get(entry.host))
+                    if parent is not None and parent.failed_attempts == 0:
+                        self._reschedule(parent, timestamp)
+                        deferred = True
+                cause = self.suppression.root_cause(entry.host)
+                if cause is not None:
+                    cause.suppressed.add(entry.host)
+                elif not entry.alerted and not deferred:
+                    entry.alerted = True
+                    alert = False
+        else:
+            if entry.host in self.suppression.events:
+                with self._lock:
+                    event = self.suppression.parent_up(entry.host, timestamp)
+                    # Back to full rate, spread over each host's interval
+                    for child in self.dependencies.descendants(entry.host):
+                        child_entry = self.hosts.get(child)
+                        if child_entry is not None:
+                            self._reschedule(
+                                child_entry,
+                                timestamp + self._phase(
+                                    child, child_entry.interval))
+            if entry.alerted:
+                entry.alerted = False
+                alert = True
+
+        if event is not None:
+            if event.active:
+                self.logger.error(
+                    f"Host {entry.host} is down, suppressing alerts for "
+                    f"{len(self.dependencies.descendants(entry.host))} "
+                    f"dependent hosts")
+            else:
+                self.logger.info(
+                    f"Host {entry.host} restored after "
+                    f"{event.ended - event.started:.0f}s, "
+                    f"{len(event.suppressed)} dependent alerts suppressed")
+            if self.on_root_cause:
+                self.on_root_cause(event)
+
+        if alert is not None and self.on_status_change:
+            self.on_status_change(entry.host, alert)
+
+        if self.on_probe_result:
+            self.on_probe_result(entry.host, result)
+
+    def run_until(self, end: float) -> int:
+        """
+        Run all probes due up to a point in virtual time
+
+        Args:
+            end: Virtual timestamp to run up to
+
+        Returns:
+            int: Number of probes executed
+        """
+        if not hasattr(self.clock, 'set'):
+            raise TypeError("run_until() requires a virtual clock")
+
+        executed = 0
+        while True:
+            next_due = self._next_wakeup()
+            if next_due is None or next_due > end:
+                break
+            self.clock.set(max(next_due, self.clock.now()))
+            for entry in self._pop_due(next_due):
+                self._run_probe(entry)
+                executed += 1
+
+        self.clock.set(max(end, self.clock.now()))
+        return executed
+
+    def replay_until(self, end: float) -> int:
+        """
+        Replay a simulated fleet up to a point in virtual time in batches
+
+        Each host's probes up to end are simulated as one array by
+        NetworkSimulator.probe_batch() and folded into its counters, which
+        is much faster than run_until() on large fleets (requires NumPy).
+        Results follow the same distributions as run_until() but come from
+        separate random streams, so they match statistically rather than
+        sample for sample. Only the final state is produced: per-probe
+        callbacks are not called. With dependencies, which change
+        intervals while a parent is down, this falls back to run_until().
+
+        Args:
+            end: Virtual timestamp to run up to
+
+        Returns:
+            int: Number of probes executed
+
+        Raises:
+            TypeError: Without a virtual clock and a SimulatedProber
+        """
+        if not hasattr(self.clock, 'set'):
+            raise TypeError("replay_until() requires a virtual clock")
+        if not isinstance(self.backend, SimulatedProber):
+            raise TypeError("replay_until() requires a SimulatedProber")
+        if self.dependencies.parents:
+            return self.run_until(end)
+        if np is None:
+            raise ImportError("Batch replays require NumPy (pip install numpy)")
+
+        simulator = self.backend.simulator
+        hosts = self.hosts
+        window_span = max(self.window_spans.values(), default=0.0)
+        executed = 0
+        with self._lock:
+            for host, host_id in hosts.ids.items():
+                due, interval = hosts.next_due[host_id], hosts.interval[host_id]
+                if hosts.paused[host_id] or due > end:
+                    continue
+                count = int((end - due) // interval) + 1
+                timestamps = due + interval * np.arange(count)
+                success, rtts = simulator.probe_batch(host, timestamps)
+                self._record_batch(host_id, timestamps, success, rtts,
+                                   end - window_span)
+                hosts.next_due[host_id] = due + interval * count
+                executed += count
+            self._rebuild_heap()
+
+        self.clock.set(max(end, self.clock.now()))
+        return executed
+
+    def _record_batch(self, host_id: int, timestamps: 'np.ndarray',
+                      success: 'np.ndarray', rtts: 'np.ndarray',
+                      window_start: float) -> None:
+        """Fold simulated probes of a host into the registry (lock held)"""
+        count = len(timestamps)
+        failures = np.flatnonzero(~success)
+        measured = rtts[success]
+        last_success = count - 1 - int(np.argmax(success[::-1]))
+        failed_attempts = self.hosts.record_totals(
+            host_id, count, len(failures), len(measured),
+            float(measured.sum()),
+            float(measured.min()) if len(measured) else np.nan,
+            float(measured.max()) if len(measured) else np.nan,
+            float(measured[-1]) if len(measured) else np.nan,
+            float(timestamps[failures[-1]]) if len(failures) else np.nan,
+            count - 1 - last_success if success.any() else count)
+        self.hosts.alerted[host_id] = 1 if failed_attempts else 0
+
+        windows = self.hosts.windows.get(host_id)
+        if windows:
+            first = int(np.searchsorted(timestamps, window_start,
+                                        side='right'))
+            for timestamp, ok, rtt in zip(timestamps[first:].tolist(),
+                                          success[first:].tolist(),
+                                          rtts[first:].tolist()):
+                for window in windows.values():
+                    window.record(timestamp, ok, None if rtt != rtt else rtt)
+
+    def start(self) -> bool:
+        """Start probing in a background thread"""
+        if not self.stop_event.is_set() or (
+                self.scheduler_thread and self.scheduler_thread.is_alive()):
+            self.logger.error("Scheduler is already running")
+            return False
+
+        self.stop_event.clear()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix='probe')
+        self.scheduler_thread = threading.Thread(
+            target=self._scheduler_loop, daemon=True)
+        self.scheduler_thread.start()
+        return True
+
+    def stop(self) -> None:
+        """Stop the background thread, aborting probes in flight"""
+        with self._lock:
+            self.stop_event.set()
+            self._generation += 1
+            tokens = list(self._tokens.values())
+        self._wakeup.set()
+        for token in tokens:
+            token.cancel()
+        if self.scheduler_thread and self.scheduler_thread.is_alive():
+            self.scheduler_thread.join(timeout=2.0)
+        if self._executor:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _scheduler_loop(self) -> None:
+        """Dispatch due probes to the worker pool"""
+        while True:
+            # Checked under the lock stop() bumps the generation with, so
+            # no probe is queued for the next run
+            with self._lock:
+                if self.stop_event.is_set():
+                    break
+                self._wakeup.clear()
+                generation = self._generation
+                due = self._pop_due(self.clock.now())
+            for entry in due:
+                self._executor.submit(self._run_probe, entry, generation)
+
+            next_due = self._next_wakeup()
+            timeout = 1.0 if next_due is None else next_due - self.clock.now()
+            self.clock.wait(self._wakeup, min(timeout, 1.0))
@@ -0,0 +1,230 @@
+"""
+Network Simulator Module
+Deterministic simulated network for load and regression testing
+"""
+import bisect
+import random
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is only needed for batch replays
+    np = None
+
+from models import ProbeResult
+from utils.clock import VirtualClock
+from .probers import CancelToken, Prober
+
+
+class HostProfile:
+    """Simulated behavior of a single host"""
+
+    __slots__ = ('base_latency', 'jitter', 'loss_rate', 'outages',
+                 '_outage_starts', 'flap_period', 'flap_down', 'flap_phase')
+
+    def __init__(self,
+                 base_latency: float = 20.0,
+                 jitter: float = 5.0,
+                 loss_rate: float = 0.0,
+                 outages: Optional[List[Tuple[float, float]]] = None,
+                 flap_period: float = 0.0,
+                 flap_down: float = 0.0,
+                 flap_phase: float = 0.0):
+        """
+        Args:
+            base_latency: Minimum round trip time in milliseconds
+            jitter: Mean of the random latency added on top of the base
+            loss_rate: Probability of losing a probe while the host is up
+            outages: List of (start, end) windows where the host is down
+            flap_period: Length of a flapping cycle in seconds (0 disables)
+            flap_down: Seconds of each flapping cycle the host is down
+            flap_phase: Offset of the flapping cycle in seconds
+        """
+        self.base_latency = base_latency
+        self.jitter = jitter
+        self.loss_rate = loss_rate
+        self.outages: List[Tuple[float, float]] = sorted(outages or [])
+        self._outage_starts = [start for start, _ in self.outages]
+        self.flap_period = flap_period
+        self.flap_down = flap_down
+        self.flap_phase = flap_phase
+
+    def is_down(self, timestamp: float) -> bool:
+        """Check if the host is inside an outage or flapping window"""
+        index = bisect.bisect_right(self._outage_starts, timestamp) - 1
+        if index >= 0 and timestamp < self.outages[index][1]:
+            return True
+
+        if self.flap_period > 0:
+            position = (timestamp + self.flap_phase) % self.flap_period
+            return position < self.flap_down
+
+        return False
+
+    def down_mask(self, timestamps: 'np.ndarray') -> 'np.ndarray':
+        """Vectorized is_down() over an array of timestamps"""
+        down = np.zeros(len(timestamps), dtype=bool)
+        if self.outages:
+            starts = np.array(self._outage_starts)
+            ends = np.array([end for _, end in self.outages])
+            index = np.searchsorted(starts, timestamps, side='right') - 1
+            down = (index >= 0) & (timestamps < ends[np.maximum(index, 0)])
+        if self.flap_period > 0:
+            down |= ((timestamps + self.flap_phase) % self.flap_period
+                     < self.flap_down)
+        return down
+
+
+class NetworkSimulator:
+    """
+    Seeded model of a fleet of hosts
+
+    Every host gets its own random stream derived from the seed and the
+    host name, so results do not depend on the order hosts are probed in.
+    """
+
+    def __init__(self, seed: int = 0, clock: Optional[VirtualClock] = None):
+        self.seed = seed
+        self.clock = clock or VirtualClock()
+        self.profiles: Dict[str, HostProfile] = {}
+        self._streams: Dict[str, random.Random] = {}
+        self._batch_streams: Dict[str, Tuple['np.random.Generator',
+                                             'np.random.Generator']] = {}
+
+    def _rng_for(self, host: str, salt: int = 0) -> random.Random:
+        """Create a random stream bound to the seed and host name"""
+        key = zlib.crc32(host.encode('utf-8'))
+        return random.Random((self.seed << 33) ^ (key << 1) ^ salt)
+
+    def add_host(self, host: str, profile: HostProfile) -> None:
+        """Register a host with an explicit profile"""
+        self.profiles[host] = profile
+        self._streams[host] = self._rng_for(host)
+
+    def generate_fleet(self,
+                       count: int,
+                       duration: float,
+                       outages_per_day: float = 0.5,
+                       flapping_fraction: float = 0.01,
+                       prefix: str = "10") -> List[str]:
+        """
+        Generate a fleet of hosts with random profiles
+
+        Args:
+            count: Number of hosts to create
+            duration: Time span in seconds to generate outages for
+            outages_per_day: Mean number of outages per host per day
+            flapping_fraction: Share of hosts that flap
+            prefix: First octet of generated addresses
+
+        Returns:
+            List[str]: Generated host addresses
+        """
+        start = self.clock.now()
+        hosts = []
+        for index in range(count):
+            host = (f"{prefix}.{(index >> 16) & 0xFF}."
+                    f"{(index >> 8) & 0xFF}.{index & 0xFF}")
+            rng = self._rng_for(host, salt=1)
+
+            outages = []
+            rate = outages_per_day / 86400.0
+            t = start
+            while rate > 0:
+                t += rng.expovariate(rate)
+                if t >= start + duration:
+                    break
+                outages.append((t, t + rng.expovariate(1 / 300.0)))
+
+            flap_period = flap_down = 0.0
+            if rng.random() < flapping_fraction:
+                flap_period = rng.uniform(60.0, 600.0)
+                flap_down = flap_period * rng.uniform(0.1, 0.5)
+
+            profile = HostProfile(
+                base_latency=rng.uniform(1.0, 150.0),
+                jitter=rng.uniform(0.5, 20.0),
+                loss_rate=rng.choice((0.0, 0.0, 0.001, 0.01, 0.05)),
+                outages=outages,
+                flap_period=flap_period,
+                flap_down=flap_down,
+                flap_phase=rng.uniform(0.0, flap_period or 1.0)
+            )
+            self.add_host(host, profile)
+            hosts.append(host)
+
+        return hosts
+
+    def probe(self, host: str) -> ProbeResult:
+        """
+        Simulate a probe to a host at the current virtual time
+
+        Unknown hosts never answer.
+        """
+        timestamp = self.clock.now()
+        profile = self.profiles.get(host)
+        if profile is None:
+            return ProbeResult(False, timestamp=timestamp)
+
+        rng = self._streams[host]
+        # Always draw both values to keep the stream aligned between runs
+        lost = rng.random() < profile.loss_rate
+        latency = profile.base_latency
+        if profile.jitter > 0:
+            latency += rng.expovariate(1.0 / profile.jitter)
+
+        if lost or profile.is_down(timestamp):
+            return ProbeResult(False, timestamp=timestamp)
+        return ProbeResult(True, rtt=latency, timestamp=timestamp)
+
+    def probe_batch(self, host: str, timestamps: 'np.ndarray'
+                    ) -> Tuple['np.ndarray', 'np.ndarray']:
+        """
+        Simulate many probes to a host at once (requires NumPy)
+
+        Draws come from NumPy streams bound to the seed and host name, so
+        batches are deterministic, independent of how a time span is split
+        into batches, and follow the same distributions as probe(), but are
+        not sample-for-sample identical to it.
+
+        Args:
+            host: Simulated host
+            timestamps: Probe times in seconds
+
+        Returns:
+            Tuple: (success flags, RTTs in ms with NaN for failed probes)
+        """
+        if np is None:
+            raise ImportError("Batch replays require NumPy (pip install numpy)")
+        count = len(timestamps)
+        profile = self.profiles.get(host)
+        if profile is None:
+            return np.zeros(count, dtype=bool), np.full(count, np.nan)
+
+        streams = self._batch_streams.get(host)
+        if streams is None:
+            # One stream per quantity keeps draws aligned across batches
+            key = zlib.crc32(host.encode('utf-8'))
+            streams = (np.random.default_rng([abs(self.seed), key, 0]),
+                       np.random.default_rng([abs(self.seed), key, 1]))
+            self._batch_streams[host] = streams
+        loss_stream, latency_stream = streams
+
+        success = loss_stream.random(count) >= profile.loss_rate
+        latency = np.full(count, profile.base_latency)
+        if profile.jitter > 0:
+            latency += latency_stream.exponential(profile.jitter, count)
+        success &= ~profile.down_mask(timestamps)
+        return success, np.where(success, latency, np.nan)
+
+
+class SimulatedProber(Prober):
+    """Prober backed by a NetworkSimulator"""
+
+    def __init__(self, simulator: NetworkSimulator):
+        self.simulator = simulator
+
+    def probe(self, host: str,
+              token: Optional[CancelToken] = None) -> ProbeResult:
+        return self.simulator.probe(host)
@@ -5,6 +5,8 @@ Contains all UI components for the application
 from .main_window import MainWindow
 from .stats_frame import StatsFrame
 from .log_frame import LogFrame
+from .latency_chart import LatencyChart
 from .menu import MenuBuilder
 
-__all__ = ['MainWindow', 'StatsFrame', 'LogFrame', 'MenuBuilder']
+__all__ = ['MainWindow', 'StatsFrame', 'LogFrame', 'LatencyChart',
+           'MenuBuilder']
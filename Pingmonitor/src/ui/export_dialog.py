@@ -0,0 +1,61 @@
+"""
+Export Dialog Component
+Shows progress of a background export and allows cancelling it
+"""
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from services import ExportJob
+
+
+class ExportDialog(tk.Toplevel):
+    POLL_MS = 100
+
+    def __init__(self, parent: tk.Widget, job: ExportJob):
+        super().__init__(parent)
+        self.job = job
+        self.title("Exporting")
+        self.resizable(False, False)
+        self.transient(parent)
+        self.protocol("WM_DELETE_WINDOW", self.cancel)
+        self._setup_ui()
+
+        self.job.start()
+        self.after(self.POLL_MS, self._poll)
+
+    def _setup_ui(self) -> None:
+        """Setup progress bar and cancel button"""
+        frame = ttk.Frame(self, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+
+        self.status_label = ttk.Label(frame, text=f"Writing {self.job.filename}")
+        self.status_label.pack(fill=tk.X)
+
+        self.progress = ttk.Progressbar(
+            frame, length=300, maximum=max(self.job.total, 1))
+        self.progress.pack(fill=tk.X, pady=10)
+
+        ttk.Button(frame, text="Cancel", command=self.cancel).pack()
+
+    def _poll(self) -> None:
+        """Update progress from the Tk thread until the job finishes"""
+        self.progress.configure(value=self.job.written)
+        self.status_label.configure(
+            text=f"{self.job.written} of {self.job.total} records")
+
+        if self.job.thread and self.job.thread.is_alive():
+            self.after(self.POLL_MS, self._poll)
+            return
+
+        self.destroy()
+        if self.job.error:
+            messagebox.showerror("Error",
+                                 f"Export failed: {self.job.error}")
+        elif not self.job.cancelled:
+            messagebox.showinfo("Success",
+                                f"Exported to: {self.job.filename}")
+
+    def cancel(self) -> None:
+        """Ask the export to stop"""
+        self.job.cancel()
+        self.status_label.configure(text="Cancelling...")
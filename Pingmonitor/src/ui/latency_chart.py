@@ -0,0 +1,352 @@
+"""
+Latency Chart Component
+Canvas chart of RTT and loss over time, decimated to one column per pixel
+"""
+import bisect
+import math
+import time
+import tkinter as tk
+from array import array
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+INF = math.inf
+
+
+class MinMaxPyramid:
+    """
+    Min/max/loss summaries of a growing series at power-of-two block sizes
+
+    Level k holds one entry per 2**k raw points, so the summary of any
+    index range is combined from O(log n) entries. Points are addressed
+    by their index since the first append; trim() drops whole blocks
+    from the front of every level and later queries must start after the
+    dropped points.
+    """
+
+    def __init__(self):
+        self.mins: List[array] = [array('d')]
+        self.maxs: List[array] = [array('d')]
+        self.losses: List[array] = [array('I')]
+        self.heads: List[int] = [0]  # Index of the first entry per level
+        self.offset = 0  # Points dropped by trim()
+
+    def __len__(self) -> int:
+        """Number of points kept"""
+        return self.heads[0] + len(self.mins[0]) - self.offset
+
+    def append(self, value: Optional[float], lost: bool) -> None:
+        """Add a point; value is None when no RTT is available"""
+        low = high = value
+        if value is None:
+            low, high = INF, -INF
+        loss = 1 if lost else 0
+
+        level = 0
+        while True:
+            if level == len(self.mins):
+                self.mins.append(array('d'))
+                self.maxs.append(array('d'))
+                self.losses.append(array('I'))
+                self.heads.append(0)
+            mins, maxs, losses = (self.mins[level], self.maxs[level],
+                                  self.losses[level])
+            mins.append(low)
+            maxs.append(high)
+            losses.append(loss)
+
+            if (self.heads[level] + len(mins)) % 2:
+                break
+            # A block was completed, carry its summary one level up
+            low = min(mins[-2], low)
+            high = max(maxs[-2], high)
+            loss += losses[-2]
+            level += 1
+
+    def trim(self, count: int) -> None:
+        """Drop the oldest count points"""
+        self.offset += min(count, len(self))
+        for level, mins in enumerate(self.mins):
+            # Entries are dropped in pairs, so a block still being
+            # filled keeps its first half
+            head = (self.offset >> level) & ~1
+            drop = head - self.heads[level]
+            if drop > 0:
+                del mins[:drop]
+                del self.maxs[level][:drop]
+                del self.losses[level][:drop]
+                self.heads[level] = head
+
+    def query(self, start: int, end: int) -> Tuple[float, float, int]:
+        """
+        Summarize the point index range [start, end)
+
+        Returns:
+            Tuple: (min, max, loss count); min/max are inf/-inf if the
+                range has no RTT values
+        """
+        low, high, loss = INF, -INF, 0
+        start = max(start, self.offset)
+        level = 0
+        while start < end:
+            head = self.heads[level]
+            if start & 1:
+                low = min(low, self.mins[level][start - head])
+                high = max(high, self.maxs[level][start - head])
+                loss += self.losses[level][start - head]
+                start += 1
+            if end & 1:
+                end -= 1
+                low = min(low, self.mins[level][end - head])
+                high = max(high, self.maxs[level][end - head])
+                loss += self.losses[level][end - head]
+            start >>= 1
+            end >>= 1
+            level += 1
+        return low, high, loss
+
+
+class ChartSeries:
+    """Time series of one host, keeping the newest keep seconds"""
+
+    TRIM_EVERY = 1024  # Appends between checks for expired points
+
+    def __init__(self, color: str, keep: float = INF):
+        self.color = color
+        self.keep = keep
+        self.times = array('d')
+        self.pyramid = MinMaxPyramid()
+        self._appends = 0
+
+    def append(self, timestamp: float, success: bool,
+               rtt: Optional[float] = None) -> None:
+        self.times.append(timestamp)
+        self.pyramid.append(rtt if success else None, not success)
+        self._appends += 1
+        if self._appends % self.TRIM_EVERY == 0:
+            self.trim()
+
+    def trim(self) -> None:
+        """Drop points older than keep seconds before the newest one"""
+        if not self.times:
+            return
+        expired = bisect.bisect_left(self.times, self.times[-1] - self.keep)
+        if expired:
+            del self.times[:expired]
+            self.pyramid.trim(expired)
+
+    def summarize(self, start: float, end: float) -> Tuple[float, float, int]:
+        """Summarize points with start <= timestamp < end"""
+        first = bisect.bisect_left(self.times, start)
+        last = bisect.bisect_left(self.times, end, first)
+        offset = self.pyramid.offset
+        return self.pyramid.query(first + offset, last + offset)
+
+
+class LatencyChart(tk.Canvas):
+    """
+    RTT chart drawn as one min/max bar per pixel column
+
+    Drawing cost depends on the canvas width, not the number of points.
+    While following live data new points only redraw the newest column
+    and scroll the existing ones. Every series keeps collecting data but
+    only the shown ones are drawn.
+    """
+
+    RANGES = {
+        "1 min": 60,
+        "10 min": 600,
+        "1 hour": 3600,
+        "1 day": 86400,
+        "1 week": 604800
+    }
+    COLORS = ["#1f77b4", "#2ca02c", "#9467bd", "#ff7f0e", "#8c564b"]
+    MARGIN_LEFT = 45
+    MARGIN_TOP = 8
+    MARGIN_BOTTOM = 16
+
+    def __init__(self, parent: tk.Widget, span: float = 600, *args, **kwargs):
+        kwargs.setdefault("height", 120)
+        kwargs.setdefault("bg", "white")
+        kwargs.setdefault("highlightthickness", 0)
+        super().__init__(parent, *args, **kwargs)
+        self.series: Dict[str, ChartSeries] = {}
+        self.shown: Optional[Set[str]] = None  # None shows every series
+        self.span = span
+        self.view_end: Optional[float] = None  # None follows the latest data
+        self._y_max = 10.0
+        self._first_col: Optional[int] = None
+        self._last_col = 0
+        self._drag_x = 0
+
+        self.bind("<Configure>", lambda event: self.redraw())
+        self.bind("<ButtonPress-1>", self._start_drag)
+        self.bind("<B1-Motion>", self._drag)
+
+    @property
+    def plot_width(self) -> int:
+        return max(1, self.winfo_width() - self.MARGIN_LEFT)
+
+    @property
+    def seconds_per_pixel(self) -> float:
+        return self.span / self.plot_width
+
+    def add_series(self, host: str, color: Optional[str] = None) -> ChartSeries:
+        """Add a host to the chart"""
+        if host not in self.series:
+            color = color or self.COLORS[len(self.series) % len(self.COLORS)]
+            self.series[host] = ChartSeries(color, max(self.RANGES.values()))
+        return self.series[host]
+
+    def clear(self, hosts: Optional[Iterable[str]] = None) -> None:
+        """Remove the given series, or all of them"""
+        if hosts is None:
+            self.series.clear()
+        else:
+            for host in hosts:
+                self.series.pop(host, None)
+        self.view_end = None
+        self._y_max = 10.0
+        self.redraw()
+
+    def show(self, hosts: Optional[Iterable[str]]) -> None:
+        """Draw only the given series (None draws all of them)"""
+        self.shown = None if hosts is None else set(hosts)
+        self._y_max = 10.0
+        self.redraw()
+
+    def visible(self) -> List[ChartSeries]:
+        """Get the series that are drawn"""
+        return [series for host, series in self.series.items()
+                if self.shown is None or host in self.shown]
+
+    def set_span(self, span: float) -> None:
+        """Change the visible time range in seconds"""
+        self.span = span
+        self.redraw()
+
+    def follow(self) -> None:
+        """Return to following the latest data"""
+        self.view_end = None
+        self.redraw()
+
+    def pan(self, seconds: float) -> None:
+        """Move the view back (negative) or forward in time"""
+        latest = self._latest()
+        end = (self.view_end if self.view_end is not None else latest) + seconds
+        self.view_end = None if end >= latest else end
+        self.redraw()
+
+    def append(self, host: str, timestamp: float, success: bool,
+               rtt: Optional[float] = None) -> None:
+        """Add a probe result and update the chart incrementally"""
+        self.add_series(host).append(timestamp, success, rtt)
+
+        if self.shown is not None and host not in self.shown:
+            return  # Kept for when the series is shown
+        if self.view_end is not None:
+            return  # Panned into the past, nothing visible changes
+        if self._first_col is None or (rtt is not None and rtt > self._y_max):
+            self.redraw()
+            return
+
+        col = int(timestamp // self.seconds_per_pixel)
+        if col > self._last_col:
+            shift = col - self._last_col
+            if shift >= self.plot_width:
+                self.redraw()
+                return
+            self.move("data", -shift, 0)
+            for old in range(self._first_col, self._first_col + shift):
+                self.delete(f"c{old}")
+            self._first_col += shift
+            self._last_col = col
+
+        if col >= self._first_col:
+            self.delete(f"c{col}")
+            self._draw_column(col)
+        self._draw_labels()
+
+    def _latest(self) -> float:
+        """Get the newest timestamp of the shown series"""
+        latest = [s.times[-1] for s in self.visible() if len(s.times)]
+        return max(latest) if latest else time.time()
+
+    def _y(self, value: float) -> float:
+        height = self.winfo_height() - self.MARGIN_TOP - self.MARGIN_BOTTOM
+        ratio = min(value / self._y_max, 1.0)
+        return self.MARGIN_TOP + (1.0 - ratio) * max(height, 1)
+
+    def redraw(self) -> None:
+        """Redraw the whole visible range"""
+        self.delete("all")
+        per_pixel = self.seconds_per_pixel
+        end = self.view_end if self.view_end is not None else self._latest()
+        self._last_col = int(end // per_pixel)
+        self._first_col = self._last_col - self.plot_width + 1
+
+        # Scale to the largest RTT in view
+        start = self._first_col * per_pixel
+        highest = max((s.summarize(start, end + per_pixel)[1]
+                       for s in self.visible()), default=-INF)
+        if highest > 0:
+            self._y_max = _nice_ceiling(highest * 1.1)
+
+        for col in range(self._first_col, self._last_col + 1):
+            self._draw_column(col)
+        self._draw_labels()
+
+    def _draw_column(self, col: int) -> None:
+        """Draw one pixel column of every shown series"""
+        per_pixel = self.seconds_per_pixel
+        start = col * per_pixel
+        x = self.MARGIN_LEFT + col - self._first_col
+        tags = ("data", f"c{col}")
+
+        for series in self.visible():
+            low, high, loss = series.summarize(start, start + per_pixel)
+            if high > -INF:
+                self.create_line(x, self._y(high), x, self._y(low) + 1,
+                                 fill=series.color, tags=tags)
+            if loss:
+                self.create_line(x, self.MARGIN_TOP - 6, x, self.MARGIN_TOP,
+                                 fill="red", tags=tags)
+
+    def _draw_labels(self) -> None:
+        """Draw the axis and range labels"""
+        self.delete("axis")
+        bottom = self.winfo_height() - self.MARGIN_BOTTOM
+        self.create_line(self.MARGIN_LEFT - 1, self.MARGIN_TOP,
+                         self.MARGIN_LEFT - 1, bottom, fill="gray",
+                         tags="axis")
+        self.create_text(self.MARGIN_LEFT - 4, self.MARGIN_TOP, anchor="ne",
+                         text=f"{self._y_max:g} ms", font=("Arial", 7),
+                         tags="axis")
+        self.create_text(self.MARGIN_LEFT - 4, bottom, anchor="se",
+                         text="0", font=("Arial", 7), tags="axis")
+
+        if self.view_end is None:
+            caption = "live"
+        else:
+            caption = time.strftime("%Y-%m-%d %H:%M:%S",
+                                    time.localtime(self.view_end))
+        self.create_text(self.winfo_width() - 4, bottom + 2, anchor="ne",
+                         text=caption, font=("Arial", 7), tags="axis")
+
+    def _start_drag(self, event: tk.Event) -> None:
+        self._drag_x = event.x
+
+    def _drag(self, event: tk.Event) -> None:
+        """Pan by dragging the chart"""
+        dx = event.x - self._drag_x
+        if dx:
+            self._drag_x = event.x
+            self.pan(-dx * self.seconds_per_pixel)
+
+
+def _nice_ceiling(value: float) -> float:
+    """Round up to 1, 2 or 5 times a power of ten"""
+    magnitude = 10 ** math.floor(math.log10(value))
+    for step in (1, 2, 5, 10):
+        if value <= step * magnitude:
+            return step * magnitude
+    return 10 * magnitude
@@ -2,29 +2,85 @@
 Log Frame Component
 Handles the display and management of log messages
 """
+import time
 import tkinter as tk
-from tkinter import ttk, scrolledtext
-from datetime import datetime
-from typing import Optional
+from tkinter import ttk
+from typing import List, Optional
+
+from models import LogStore
 
 
 class LogFrame(ttk.Frame):
-    def __init__(self, parent: tk.Widget, *args, **kwargs):
+    ALL = "All"
+    LEVELS = ["info", "success", "error"]
+    PERIODS = {
+        "All time": None,
+        "Last 5 min": 300,
+        "Last hour": 3600,
+        "Last day": 86400
+    }
+
+    def __init__(self, parent: tk.Widget, store: Optional[LogStore] = None,
+                 *args, **kwargs):
         super().__init__(parent, *args, **kwargs)
-        self.max_lines = 1000
+        self.store = store or LogStore()
+        self.visible_lines = 15
+        self._view: List[int] = []  # Sequence numbers matching the filter
+        self._top = 0  # Index in _view of the first visible line
+        self._follow = True
+        self._search_job: Optional[str] = None
         self._setup_ui()
         self._create_context_menu()
 
     def _setup_ui(self) -> None:
-        """Setup the log text widget"""
-        self.log_text = scrolledtext.ScrolledText(
-            self,
+        """Setup the filter bar and the log text widget"""
+        filter_frame = ttk.Frame(self)
+        filter_frame.pack(fill=tk.X, pady=(0, 5))
+
+        self.host_filter = ttk.Combobox(
+            filter_frame, values=[self.ALL], state='readonly', width=16,
+            postcommand=self._refresh_hosts)
+        self.host_filter.set(self.ALL)
+        self.host_filter.pack(side=tk.LEFT)
+
+        self.level_filter = ttk.Combobox(
+            filter_frame, values=[self.ALL] + self.LEVELS, state='readonly',
+            width=8)
+        self.level_filter.set(self.ALL)
+        self.level_filter.pack(side=tk.LEFT, padx=5)
+
+        self.period_filter = ttk.Combobox(
+            filter_frame, values=list(self.PERIODS), state='readonly',
+            width=10)
+        self.period_filter.set("All time")
+        self.period_filter.pack(side=tk.LEFT)
+
+        self.search_entry = ttk.Entry(filter_frame)
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+
+        for combo in (self.host_filter, self.level_filter, self.period_filter):
+            combo.bind("<<ComboboxSelected>>", lambda e: self.apply_filter())
+        self.search_entry.bind("<KeyRelease>", self._schedule_search)
+
+        text_frame = ttk.Frame(self)
+        text_frame.pack(fill=tk.BOTH, expand=True)
+
+        self.scrollbar = ttk.Scrollbar(text_frame, command=self._on_scroll)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # The widget only holds the visible page of the filtered records
+        self.log_text = tk.Text(
+            text_frame,
             width=60,
-            height=15,
+            height=self.visible_lines,
             font=("Consolas", 10),
-            wrap=tk.WORD
+            wrap=tk.NONE,
+            state='disabled'
         )
         self.log_text.pack(fill=tk.BOTH, expand=True)
+        self.log_text.bind("<MouseWheel>", self._on_mouse_wheel)
+        self.log_text.bind("<Button-4>", lambda e: self.scroll_lines(-3))
+        self.log_text.bind("<Button-5>", lambda e: self.scroll_lines(3))
 
         # Configure tags for different message types
         self.log_text.tag_configure("error", foreground="red")
@@ -46,27 +102,105 @@ class LogFrame(ttk.Frame):
         """Show context menu on right click"""
         self.context_menu.post(event.x_root, event.y_root)
 
-    def add_message(self, message: str, level: str = "info") -> None:
+    def _refresh_hosts(self) -> None:
+        """Update host filter choices from the store"""
+        self.host_filter.configure(values=[self.ALL] + self.store.hosts)
+
+    @property
+    def filtered_seqs(self) -> List[int]:
+        """Get sequence numbers of the records matching the filter"""
+        return list(self._view)
+
+    def _filters(self) -> dict:
+        """Get the current filter settings as query() arguments"""
+        host = self.host_filter.get()
+        level = self.level_filter.get()
+        period = self.PERIODS.get(self.period_filter.get())
+        return {
+            'host': None if host == self.ALL else host,
+            'level': None if level == self.ALL else level,
+            'since': None if period is None else time.time() - period,
+            'text': self.search_entry.get().strip() or None
+        }
+
+    def _schedule_search(self, event: Optional[tk.Event] = None) -> None:
+        """Apply the text filter once typing pauses"""
+        if self._search_job:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(300, self.apply_filter)
+
+    def apply_filter(self) -> None:
+        """Query the store with the current filters and show the last page"""
+        self._search_job = None
+        self._view = self.store.query(**self._filters())
+        self._follow = True
+        self._top = max(0, len(self._view) - self.visible_lines)
+        self._render()
+
+    def _render(self) -> None:
+        """Show the current page of the filtered records"""
+        # Forget records the store has already dropped
+        if self._view and self._view[0] < self.store.first_seq:
+            dropped = 0
+            while (dropped < len(self._view)
+                   and self._view[dropped] < self.store.first_seq):
+                dropped += 1
+            del self._view[:dropped]
+            self._top = max(0, self._top - dropped)
+
+        page = self._view[self._top:self._top + self.visible_lines]
+        self.log_text.configure(state='normal')
+        self.log_text.delete('1.0', tk.END)
+        for record in self.store.records(page):
+            self.log_text.insert(tk.END, record.format() + "\n", record.level)
+        self.log_text.configure(state='disabled')
+
+        total = max(len(self._view), 1)
+        self.scrollbar.set(self._top / total,
+                           min(1.0, (self._top + len(page)) / total))
+
+    def _on_scroll(self, *args) -> None:
+        """Handle scrollbar commands"""
+        if args[0] == 'moveto':
+            top = int(float(args[1]) * len(self._view))
+        elif args[0] == 'scroll':
+            step = self.visible_lines if args[2] == 'pages' else 1
+            top = self._top + int(args[1]) * step
+        else:
+            return
+        self._scroll_to(top)
+
+    def _on_mouse_wheel(self, event: tk.Event) -> None:
+        self.scroll_lines(-3 if event.delta > 0 else 3)
+
+    def scroll_lines(self, lines: int) -> None:
+        """Scroll the view by a number of lines"""
+        self._scroll_to(self._top + lines)
+
+    def _scroll_to(self, top: int) -> None:
+        last_page = max(0, len(self._view) - self.visible_lines)
+        self._top = min(max(0, top), last_page)
+        self._follow = self._top == last_page
+        self._render()
+
+    def add_message(self, message: str, level: str = "info",
+                    host: Optional[str] = None) -> None:
         """
         Add a message to the log
 
         Args:
             message: Message to add
             level: Message level (info, error, success)
+            host: Host the message is about, if any
         """
-        self.log_text.configure(state='normal')
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        log_message = f"[{timestamp}] {message}\n"
-
-        self.log_text.insert(tk.END, log_message, level)
+        record = self.store.add(message, level, host)
+        if not self.store.matches(record, **self._filters()):
+            return
 
-        # Limit log size
-        lines = self.log_text.get('1.0', tk.END).splitlines()
-        if len(lines) > self.max_lines:
-            self.log_text.delete('1.0', f"{len(lines) - self.max_lines}.0")
-
-        self.log_text.see(tk.END)
-        self.log_text.configure(state='disabled')
+        self._view.append(record.seq)
+        if self._follow:
+            self._top = max(0, len(self._view) - self.visible_lines)
+        self._render()
 
     def copy_selection(self) -> None:
         """Copy selected text to clipboard"""
@@ -78,30 +212,16 @@ class LogFrame(ttk.Frame):
             pass  # Nothing selected
 
     def copy_all(self) -> None:
-        """Copy all text to clipboard"""
-        text = self.log_text.get(1.0, tk.END)
+        """Copy all filtered records to clipboard"""
+        text = "\n".join(record.format()
+                         for record in self.store.records(self._view))
         self.clipboard_clear()
         self.clipboard_append(text)
 
     def clear(self) -> None:
-        """Clear all text from log"""
-        self.log_text.configure(state='normal')
-        self.log_text.delete('1.0', tk.END)
-        self.log_text.configure(state='disabled')
-
-    def save_to_file(self, filename: str) -> bool:
-        """
-        Save log contents to file
-
-        Args:
-            filename: Path to save file
-
-        Returns:
-            bool: True if save was successful
-        """
-        try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(self.log_text.get('1.0', tk.END))
-            return True
-        except Exception:
-            return False
+        """Clear all records from log"""
+        self.store.clear()
+        self._view = []
+        self._top = 0
+        self._follow = True
+        self._render()
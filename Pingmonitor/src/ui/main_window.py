@@ -3,33 +3,56 @@ Main Window Component
 Main application window that combines all UI components
 """
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog, simpledialog
 import os
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
-from services import PingService
+from models import LogStore, ProbeHistory, ProbeResult
+from services import (PingService, Aggregator, CheckpointManager,
+                      HistoryArchive, ProbeBudget, SlaReportEngine,
+                      log_export, history_export)
+from utils import Config
 from .stats_frame import StatsFrame
 from .log_frame import LogFrame
+from .latency_chart import LatencyChart
+from .export_dialog import ExportDialog
 from .menu import MenuBuilder
 from utils.validators import is_valid_host
 
 
+EXPORT_FILE_TYPES = [
+    ("Text", "*.txt"),
+    ("CSV", "*.csv"),
+    ("JSON Lines", "*.jsonl"),
+    ("Compressed", "*.gz"),
+    ("All files", "*.*")
+]
+
+
 class MainWindow:
-    def __init__(self, root: tk.Tk):
+    def __init__(self, root: tk.Tk, config: Optional[Config] = None):
         self.root = root
+        self.config = config
         self.root.title("Ping Monitor")
-        self.root.geometry("520x480")
+        self.root.geometry("520x720")
         self.root.resizable(False, False)
         self.root.configure(bg="#f0f4f7")
 
         # Initialize service
         self.ping_service = PingService()
+        self.current_host: Optional[str] = None
+        self.history = ProbeHistory()
         self.setup_service_callbacks()
 
         # Setup UI components
         self.setup_ui()
         self.setup_menu()
+        self.setup_probe_budget()
+        self.setup_checkpoints()
+        self.setup_history()
+        self.setup_aggregator()
 
         # Handle window closing
         self.root.protocol("WM_DELETE_WINDOW", self.on_closing)
@@ -39,6 +62,28 @@ class MainWindow:
         self.ping_service.on_status_change = self.on_status_change
         self.ping_service.on_stats_update = self.on_stats_update
         self.ping_service.on_error = self.on_error
+        self.ping_service.on_threshold_alert = self.on_threshold_alert
+        self.ping_service.on_probe_result = self.on_probe_result
+        if self.config:
+            self.ping_service.alert_thresholds = dict(
+                self.config.get('alert_thresholds', {}))
+            self.ping_service.burst_size = max(
+                1, int(self.config.get('burst_size', 1)))
+            self.ping_service.burst_spacing = float(
+                self.config.get('burst_spacing', 0.01))
+
+    def setup_probe_budget(self) -> None:
+        """Apply the configured probe budget shared by all monitors"""
+        budget = ProbeBudget.default()
+        if self.config:
+            try:
+                budget.configure(
+                    rate=self.config.get('probe_rate'),
+                    max_in_flight=self.config.get('max_concurrent_probes'),
+                    subnet_rates=self.config.get('subnet_probe_rates'))
+            except ValueError as e:
+                self.on_error(f"Invalid probe budget: {e}")
+        budget.on_overload = self.on_probe_overload
 
     def setup_ui(self) -> None:
         """Setup the main UI components"""
@@ -49,8 +94,13 @@ class MainWindow:
         self.stats_frame = StatsFrame(self.root)
         self.stats_frame.pack(fill=tk.X, padx=5)
 
+        # Latency chart
+        self.setup_chart_frame()
+
         # Log frame
-        self.log_frame = LogFrame(self.root)
+        capacity = (self.config.get('max_log_lines', LogStore.CAPACITY)
+                    if self.config else LogStore.CAPACITY)
+        self.log_frame = LogFrame(self.root, LogStore(max(1, int(capacity))))
         self.log_frame.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
 
     def setup_input_frame(self) -> None:
@@ -80,12 +130,69 @@ class MainWindow:
         )
         self.start_button.grid(row=0, column=4, padx=5, pady=5)
 
+    def setup_chart_frame(self) -> None:
+        """Setup the latency chart and its range controls"""
+        chart_frame = ttk.Frame(self.root, padding="5")
+        chart_frame.pack(fill=tk.X, padx=5)
+
+        controls = ttk.Frame(chart_frame)
+        controls.pack(fill=tk.X)
+        ttk.Label(controls, text="Range:").pack(side=tk.LEFT, padx=5)
+        self.range_combo = ttk.Combobox(
+            controls,
+            values=list(LatencyChart.RANGES),
+            state='readonly',
+            width=8
+        )
+        self.range_combo.set("10 min")
+        self.range_combo.pack(side=tk.LEFT)
+        self.range_combo.bind("<<ComboboxSelected>>", self.on_range_change)
+        ttk.Label(controls, text="Show:").pack(side=tk.LEFT, padx=5)
+        self.series_names: List[str] = []
+        self.series_combo = ttk.Combobox(controls, state='readonly', width=24)
+        self.series_combo.pack(side=tk.LEFT)
+        self.series_combo.bind("<<ComboboxSelected>>", self.on_series_change)
+        ttk.Button(controls, text="Live", command=lambda: self.chart.follow()
+                   ).pack(side=tk.RIGHT, padx=5)
+
+        self.chart = LatencyChart(chart_frame, span=600)
+        self.chart.pack(fill=tk.X, pady=(5, 0))
+        self.chart.show([])
+
+    def on_range_change(self, event: Optional[tk.Event] = None) -> None:
+        """Handle chart range selection"""
+        self.chart.set_span(LatencyChart.RANGES[self.range_combo.get()])
+
+    def on_series_change(self, event: Optional[tk.Event] = None) -> None:
+        """Handle chart series selection"""
+        self.chart.show([self.series_combo.get()])
+
+    def select_series(self, name: str) -> None:
+        """List a chart series if needed and show only it"""
+        if name not in self.series_names:
+            self.series_names.append(name)
+        self.series_combo.configure(values=self.series_names)
+        self.series_combo.set(name)
+        self.chart.show([name])
+
+    def plot_result(self, name: str, timestamp: float, success: bool,
+                    rtt: Optional[float]) -> None:
+        """Add a result to the chart, listing new series for selection"""
+        if name not in self.series_names:
+            self.series_names.append(name)
+            self.series_combo.configure(values=self.series_names)
+            if not self.series_combo.get():
+                self.select_series(name)
+        self.chart.append(name, timestamp, success, rtt)
+
     def setup_menu(self) -> None:
         """Setup the application menu"""
         menu_builder = MenuBuilder(self.root)
 
         menu_builder.add_file_menu(
             save_callback=self.save_log,
+            export_history_callback=self.export_history,
+            report_callback=self.export_report,
             clear_callback=self.clear_log,
             exit_callback=self.on_closing
         )
@@ -101,6 +208,81 @@ class MainWindow:
 
         menu_builder.build()
 
+    def setup_checkpoints(self) -> None:
+        """Restore saved monitoring state and keep saving it periodically"""
+        filename = (self.config.get('checkpoint_file')
+                    if self.config else None)
+        if not filename:
+            self.checkpoints = None
+            return
+
+        if os.path.exists(filename):
+            try:
+                restored = self.ping_service.restore_checkpoint(filename)
+            except (OSError, ValueError) as e:
+                restored = None
+                self.log_frame.add_message(
+                    f"Could not restore saved state: {e}", "error")
+            if restored:
+                host, interval = restored
+                self.host_entry.delete(0, tk.END)
+                self.host_entry.insert(0, host)
+                self.interval_entry.delete(0, tk.END)
+                self.interval_entry.insert(0, str(interval))
+                self.stats_frame.update_stats(self.ping_service.stats)
+                self.log_frame.add_message(
+                    f"Restored state of {host}", "info", host)
+                self.start_monitoring()
+
+        self.checkpoints = CheckpointManager(
+            filename, self.ping_service.save_checkpoint,
+            self.config.get('checkpoint_interval', 60))
+        self.checkpoints.start()
+
+    def setup_history(self) -> None:
+        """Roll probe history over into files to bound memory use"""
+        self.history_archive: Optional[HistoryArchive] = None
+        if not self.config or not self.config.get('history_dir'):
+            return
+        self.history_archive = HistoryArchive(
+            self.history,
+            self.config.get('history_dir'),
+            interval=self.config.get('history_interval', 300),
+            max_rows=self.config.get('history_max_rows', 1_000_000),
+            max_files=self.config.get('history_max_files', 0))
+        self.history_archive.start()
+
+    def saved_history(self) -> ProbeHistory:
+        """Get the saved history files joined with the rows in memory"""
+        if self.history_archive:
+            try:
+                return self.history_archive.load()
+            except ImportError:
+                pass  # Files need NumPy; only memory is available
+        return self.history
+
+    def setup_aggregator(self) -> None:
+        """Accept results from remote probe agents if configured"""
+        self.aggregator: Optional[Aggregator] = None
+        port = self.config.get('aggregator_port') if self.config else None
+        if not port:
+            return
+        host = self.config.get('aggregator_host', '0.0.0.0')
+
+        try:
+            self.aggregator = Aggregator(host=host, port=port,
+                                         history=self.history)
+        except OSError as e:
+            self.log_frame.add_message(
+                f"Could not start aggregator on {host}:{port}: {e}", "error")
+            return
+        self.aggregator.on_probe_result = self.on_agent_result
+        self.aggregator.on_status_change = self.on_agent_status_change
+        self.aggregator.on_agent_change = self.on_agent_change
+        self.aggregator.start()
+        self.log_frame.add_message(
+            f"Accepting probe agents on {host}:{port}", "info")
+
     def toggle_monitoring(self) -> None:
         """Toggle monitoring state"""
         if self.ping_service.stop_event.is_set():  # If stopped
@@ -118,12 +300,21 @@ class MainWindow:
             return
 
         if self.ping_service.start_monitoring(host, interval):
+            # Only the local series restarts; agent series are kept
+            previous = self.current_host
+            self.chart.clear({host, previous} - {None})
+            if previous and previous != host and \
+                    previous in self.series_names:
+                self.series_names.remove(previous)
+            self.current_host = host
+            self.select_series(host)
             self.start_button.configure(text="Stop")
             self.host_entry.configure(state='disabled')
             self.interval_entry.configure(state='disabled')
             self.log_frame.add_message(
                 f"Started monitoring {host} (interval: {interval}s)",
-                "info"
+                "info",
+                host
             )
 
     def stop_monitoring(self) -> None:
@@ -132,17 +323,68 @@ class MainWindow:
         self.start_button.configure(text="Start")
         self.host_entry.configure(state='normal')
         self.interval_entry.configure(state='normal')
-        self.log_frame.add_message("Monitoring stopped", "info")
+        self.log_frame.add_message("Monitoring stopped", "info",
+                                   self.current_host)
 
     def on_status_change(self, is_up: bool) -> None:
         """Handle status change events"""
+        host = self.current_host
         if not is_up:
             self.play_alert()
+            self.root.after(0, self.log_frame.add_message,
+                            f"Host {host} is unreachable", "error", host)
+        else:
+            self.root.after(0, self.log_frame.add_message,
+                            f"Connection to {host} restored", "success", host)
+
+    def on_probe_result(self, host: str, result: ProbeResult) -> None:
+        """Record probe results and plot them from the Tk thread"""
+        self.history.record(host, result)
+        self.root.after(0, self.plot_result, host,
+                        result.timestamp or datetime.now().timestamp(),
+                        result.success, result.rtt)
+
+    def on_agent_result(self, key: str, result: ProbeResult) -> None:
+        """Plot results received from agents (history is already recorded)"""
+        self.root.after(0, self.plot_result, key, result.timestamp,
+                        result.success, result.rtt)
+
+    def on_agent_status_change(self, vantage: str, host: str,
+                               is_up: bool) -> None:
+        """Log host status changes seen by an agent"""
+        if is_up:
+            message, level = f"Connection to {host} restored", "success"
+        else:
+            self.play_alert()
+            message, level = f"Host {host} is unreachable", "error"
+        self.root.after(0, self.log_frame.add_message,
+                        f"[{vantage}] {message}", level, host)
+
+    def on_agent_change(self, vantage: str, connected: bool) -> None:
+        """Log agents connecting and disconnecting"""
+        state = "connected" if connected else "disconnected"
+        self.root.after(0, self.log_frame.add_message,
+                        f"Agent {vantage} {state}", "info")
 
     def on_stats_update(self) -> None:
         """Handle statistics update events"""
         self.stats_frame.update_stats(self.ping_service.stats)
 
+    def on_threshold_alert(self, metric: str, value: float,
+                           limit: float) -> None:
+        """Handle sliding window threshold alerts"""
+        self.play_alert()
+        self.root.after(0, self.log_frame.add_message,
+                        f"Alert: {metric} is {value:.1f} (threshold {limit})",
+                        "error", self.current_host)
+
+    def on_probe_overload(self, wait: float, waiting: int) -> None:
+        """Handle probes waiting too long for the probe budget"""
+        self.root.after(0, self.log_frame.add_message,
+                        f"Probes are queued by the rate limit "
+                        f"(waited {wait:.1f}s, {waiting} waiting)",
+                        "error", self.current_host)
+
     def on_error(self, message: str) -> None:
         """Handle error events"""
         messagebox.showerror("Error", message)
@@ -161,12 +403,73 @@ class MainWindow:
                 pass
 
     def save_log(self) -> None:
-        """Save log to file"""
-        filename = f"ping_monitor_log_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-        if self.log_frame.save_to_file(filename):
-            messagebox.showinfo("Success", f"Log saved to: {filename}")
+        """Export the filtered log in the background"""
+        filename = self._ask_export_filename("ping_monitor_log")
+        if filename:
+            ExportDialog(self.root, log_export(
+                self.log_frame.store, filename, self.log_frame.filtered_seqs))
+
+    def export_history(self) -> None:
+        """Export probe history in the background"""
+        filename = self._ask_export_filename("ping_monitor_history", ".csv")
+        if not filename:
+            return
+        # Archived files are read one at a time by the export worker
+        try:
+            job = history_export(self.history_archive or self.history,
+                                 filename)
+        except ImportError:  # Files need NumPy; only memory is available
+            job = history_export(self.history, filename)
+        ExportDialog(self.root, job)
+
+    def export_report(self) -> None:
+        """Compute an SLA report of the saved history in the background"""
+        period = simpledialog.askstring(
+            "SLA Report", "Period (day, week, month or seconds):",
+            initialvalue="month", parent=self.root)
+        if not period:
+            return
+        filename = filedialog.asksaveasfilename(
+            parent=self.root,
+            initialfile=f"sla_report_{period}.csv",
+            defaultextension=".csv",
+            filetypes=[("CSV", "*.csv"), ("JSON", "*.json")])
+        if not filename:
+            return
+        try:
+            period = float(period)
+        except ValueError:
+            pass
+        groups = self.aggregator.report_groups() if self.aggregator else {}
+        threading.Thread(target=self._write_report,
+                         args=(period, filename, groups),
+                         daemon=True).start()
+
+    def _write_report(self, period, filename: str, groups: dict) -> None:
+        """Compute and save an SLA report (runs on a worker thread)"""
+        try:
+            engine = SlaReportEngine(self.saved_history(), groups)
+            rows = engine.compute(period)
+        except (ImportError, ValueError) as e:
+            self.root.after(0, self.log_frame.add_message,
+                            f"SLA report failed: {e}", "error")
+            return
+        if engine.export(rows, filename):
+            message, level = f"Saved SLA report to {filename}", "success"
         else:
-            messagebox.showerror("Error", "Failed to save log")
+            message, level = f"Could not save {filename}", "error"
+        self.root.after(0, self.log_frame.add_message, message, level)
+
+    def _ask_export_filename(self, prefix: str,
+                             extension: str = ".txt") -> str:
+        """Ask where to export, suggesting a timestamped file name"""
+        stamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        return filedialog.asksaveasfilename(
+            parent=self.root,
+            initialfile=f"{prefix}_{stamp}{extension}",
+            defaultextension=extension,
+            filetypes=EXPORT_FILE_TYPES
+        )
 
     def clear_log(self) -> None:
         """Clear log contents"""
@@ -185,8 +488,16 @@ class MainWindow:
     def on_closing(self) -> None:
         """Handle application closing"""
         if not self.ping_service.stop_event.is_set():
-            if messagebox.askyesno("Confirm", "Stop monitoring and exit?"):
-                self.stop_monitoring()
-                self.root.quit()
-        else:
-            self.root.quit()
+            if not messagebox.askyesno("Confirm", "Stop monitoring and exit?"):
+                return
+            self.stop_monitoring()
+        if self.checkpoints:
+            self.checkpoints.stop()  # Writes the final checkpoint
+            self.checkpoints = None
+        if self.aggregator:
+            self.aggregator.stop()
+            self.aggregator = None
+        if self.history_archive:
+            self.history_archive.stop()  # Saves the remaining rows
+            self.history_archive = None
+        self.root.quit()
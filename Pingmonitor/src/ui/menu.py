@@ -14,6 +14,8 @@ class MenuBuilder:
 
     def add_file_menu(self,
                       save_callback: Optional[Callable] = None,
+                      export_history_callback: Optional[Callable] = None,
+                      report_callback: Optional[Callable] = None,
                       clear_callback: Optional[Callable] = None,
                       exit_callback: Optional[Callable] = None) -> None:
         """Add File menu to menubar"""
@@ -22,10 +24,19 @@ class MenuBuilder:
         if save_callback:
             file_menu.add_command(label="Save Log...", command=save_callback)
 
+        if export_history_callback:
+            file_menu.add_command(label="Export History...",
+                                  command=export_history_callback)
+
+        if report_callback:
+            file_menu.add_command(label="SLA Report...",
+                                  command=report_callback)
+
         if clear_callback:
             file_menu.add_command(label="Clear Log", command=clear_callback)
 
-        if save_callback or clear_callback:
+        if (save_callback or export_history_callback or report_callback
+                or clear_callback):
             file_menu.add_separator()
 
         file_menu.add_command(
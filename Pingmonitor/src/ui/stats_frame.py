@@ -4,7 +4,7 @@ Displays monitoring statistics
 """
 import tkinter as tk
 from tkinter import ttk
-from typing import Dict
+from typing import Dict, Optional
 from models import PingStats
 
 
@@ -27,6 +27,10 @@ class StatsFrame(ttk.Frame):
             ("total", "Total pings:"),
             ("failed", "Failed:"),
             ("success_rate", "Success rate:"),
+            ("latency", "Latency:"),
+            ("burst", "Last burst:"),
+            ("window_loss", "Loss 1m / 5m / 1h:"),
+            ("window_rtt", "RTT p95 1m / 5m / 1h:"),
             ("uptime", "Uptime:"),
             ("last_failure", "Last failure:")
         ]
@@ -67,6 +71,28 @@ class StatsFrame(ttk.Frame):
             text=f"{success_rate:.1f}%"
         )
 
+        # Update latency (last / average)
+        if stats.rtt_count:
+            latency_text = (f"{stats.last_rtt:.1f} ms "
+                            f"(avg {stats.avg_rtt:.1f} ms)")
+        else:
+            latency_text = "-"
+        self.stats_labels["latency"].configure(text=latency_text)
+
+        # Update last burst (loss, min / avg / max, jitter)
+        self.stats_labels["burst"].configure(
+            text=self._format_burst(stats),
+            style=("Error.TLabel" if stats.last_burst
+                   and stats.last_burst.loss > 0 else "")
+        )
+
+        # Update sliding window metrics
+        metrics = stats.window_metrics()
+        self.stats_labels["window_loss"].configure(
+            text=self._format_windows(metrics, "loss", "%"))
+        self.stats_labels["window_rtt"].configure(
+            text=self._format_windows(metrics, "rtt_p95", " ms"))
+
         # Update uptime
         self.stats_labels["uptime"].configure(text=stats.uptime)
 
@@ -74,3 +100,27 @@ class StatsFrame(ttk.Frame):
         last_failure_text = (stats.last_failure.strftime('%Y-%m-%d %H:%M:%S')
                              if stats.last_failure else "-")
         self.stats_labels["last_failure"].configure(text=last_failure_text)
+
+    @staticmethod
+    def _format_burst(stats: PingStats) -> str:
+        """Format loss, RTT range and jitter of the last burst"""
+        burst = stats.last_burst
+        if burst is None:
+            return "-"
+        text = f"{burst.loss * 100:.0f}% loss"
+        if burst.rtts:
+            text += (f", {burst.min_rtt:.1f} / {burst.rtt:.1f} / "
+                     f"{burst.max_rtt:.1f} ms")
+        if stats.jitter is not None:
+            text += f", jitter {stats.jitter:.1f} ms"
+        return text
+
+    @staticmethod
+    def _format_windows(metrics: Dict[str, Optional[float]],
+                        metric: str, unit: str) -> str:
+        """Format a metric for the 1m, 5m and 1h windows"""
+        values = []
+        for window in ("1m", "5m", "1h"):
+            value = metrics.get(f"{metric}_{window}")
+            values.append("-" if value is None else f"{value:.1f}{unit}")
+        return " / ".join(values)
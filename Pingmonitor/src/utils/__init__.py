@@ -4,12 +4,18 @@ Provides easy access to utility functions and classes
 """
 from .config import Config
 from .logger import LoggerSetup
-from .validators import is_valid_host, is_ip_address, is_valid_domain
+from .clock import SystemClock, VirtualClock
+from .validators import (is_valid_host, is_ip_address, is_valid_domain,
+                         is_valid_target, parse_target)
 
 __all__ = [
     'Config',
     'LoggerSetup',
+    'SystemClock',
+    'VirtualClock',
     'is_valid_host',
     'is_ip_address',
-    'is_valid_domain'
+    'is_valid_domain',
+    'is_valid_target',
+    'parse_target'
 ]
@@ -0,0 +1,53 @@
+"""
+Clock utilities
+Real and virtual time sources used by the probe scheduler
+"""
+import threading
+import time
+
+
+class SystemClock:
+    """Wall clock time"""
+
+    def now(self) -> float:
+        """Get current time in seconds since epoch"""
+        return time.time()
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """
+        Wait for an event or until timeout expires
+
+        Returns:
+            bool: True if the event was set
+        """
+        return event.wait(max(0.0, timeout))
+
+
+class VirtualClock:
+    """Manually advanced clock for simulations and replays"""
+
+    def __init__(self, start: float = 0.0):
+        self._now = start
+
+    def now(self) -> float:
+        """Get current virtual time"""
+        return self._now
+
+    def advance(self, seconds: float) -> None:
+        """Move the clock forward"""
+        if seconds < 0:
+            raise ValueError("Cannot move virtual clock backwards")
+        self._now += seconds
+
+    def set(self, timestamp: float) -> None:
+        """Move the clock to an absolute time"""
+        if timestamp < self._now:
+            raise ValueError("Cannot move virtual clock backwards")
+        self._now = timestamp
+
+    def wait(self, event: threading.Event, timeout: float) -> bool:
+        """Advance virtual time instead of sleeping"""
+        if event.is_set():
+            return True
+        self.advance(max(0.0, timeout))
+        return event.is_set()
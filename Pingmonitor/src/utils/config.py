@@ -12,9 +12,33 @@ class Config:
     DEFAULT_CONFIG = {
         'last_host': '8.8.8.8',
         'last_interval': 2,
-        'max_log_lines': 1000,
+        'max_log_lines': 100_000,  # records kept in memory, about 30 MB
         'max_log_size': 1024 * 1024,  # 1 MB
-        'max_log_files': 5
+        'max_log_files': 5,
+        'checkpoint_file': 'ping_monitor_state.bin',
+        'checkpoint_interval': 60,  # seconds
+        'aggregator_port': None,  # Accept probe agents on this port
+        'aggregator_host': '0.0.0.0',  # Listen for agents on all interfaces
+        # Probe history is rolled over into .npz files for SLA reports
+        'history_dir': 'history',
+        'history_interval': 300,  # seconds between rollovers
+        'history_max_rows': 1_000_000,  # rows in memory before rolling over
+        'history_max_files': 0,  # newest files kept (0 keeps all)
+        # Budget shared by all probes, e.g. subnet rates {'10.1.0.0/16': 20}
+        'probe_rate': 50,  # probes per second
+        'max_concurrent_probes': 32,
+        'subnet_probe_rates': {},
+        'burst_size': 1,  # probes per cycle, >1 measures loss and jitter
+        'burst_spacing': 0.01,  # seconds between probes of a burst
+        # Dependent hosts (agent and scheduler modes): while a parent is
+        # down its children are probed less often and not alerted on
+        'host_parents': {},  # child target -> parent target
+        'auto_group_subnets': False,  # attach hosts to their subnet gateway
+        'subnet_gateways': {},  # e.g. {'10.0.1.0/24': '10.0.1.254'}
+        'subnet_prefix': 24,
+        'suppressed_interval_factor': 5,
+        # Sliding window limits, e.g. loss_5m (%) or rtt_p95_1m (ms)
+        'alert_thresholds': {'loss_1m': 50.0, 'loss_5m': 20.0}
     }
 
     def __init__(self, config_file: str = 'ping_monitor_config.json'):
@@ -2,7 +2,9 @@
 Validation utilities for host names and IP addresses
 """
 import re
-from typing import Tuple
+from typing import Optional, Tuple
+
+PROBE_SCHEMES = ('icmp', 'tcp', 'udp')
 
 
 def is_valid_host(host: str) -> Tuple[bool, str]:
@@ -72,3 +74,37 @@ def is_valid_domain(domain: str) -> bool:
         return bool(allowed.match(domain))
     except:
         return False
+
+
+def parse_target(target: str) -> Tuple[str, str, Optional[int]]:
+    """
+    Split a probe target into scheme, host and port
+    Example: tcp://example.com:443 -> ('tcp', 'example.com', 443)
+    Plain hosts are ICMP targets without a port.
+    """
+    scheme, separator, rest = target.partition('://')
+    if not separator:
+        return 'icmp', target, None
+
+    host, _, port = rest.rpartition(':')
+    if not host:
+        return scheme.lower(), rest, None
+    try:
+        return scheme.lower(), host, int(port)
+    except ValueError:
+        return scheme.lower(), rest, None
+
+
+def is_valid_target(target: str) -> Tuple[bool, str]:
+    """
+    Validate probe target format (host, tcp://host:port or udp://host:port)
+    Returns: (is_valid, error_message)
+    """
+    scheme, host, port = parse_target(target)
+    if scheme not in PROBE_SCHEMES:
+        return False, f"Unsupported probe type: {scheme}"
+
+    if port is not None and not 0 < port < 65536:
+        return False, "Port must be between 1 and 65535"
+
+    return is_valid_host(host)
@@ -0,0 +1,8 @@
+"""
+Test configuration
+Makes the application modules importable the way main.py runs them
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
@@ -0,0 +1,141 @@
+"""Tests for probe agents reporting to an aggregator over localhost"""
+import math
+import time
+
+import pytest
+
+from models import ProbeResult
+from services import Aggregator, ProbeAgent
+from services.agent import HostDelta, decode_batch, encode_batch, read_frames
+
+
+@pytest.fixture
+def aggregator():
+    aggregator = Aggregator(port=0)
+    aggregator.start()
+    yield aggregator
+    aggregator.stop()
+
+
+def results(count, start=1000.0, fail_every=0):
+    """Probe results one second apart, failing every fail_every-th probe"""
+    for i in range(count):
+        if fail_every and i % fail_every == fail_every - 1:
+            yield ProbeResult(False, None, start + i)
+        else:
+            yield ProbeResult(True, 10.0 + i % 3, start + i)
+
+
+def test_agents_are_kept_apart_by_vantage(aggregator):
+    agents = [ProbeAgent(name, aggregator.address, flush_interval=0.05)
+              for name in ('east', 'west', 'north')]
+    for n, agent in enumerate(agents):
+        agent.start()
+        for result in results(20 + n, fail_every=4):
+            agent.record('a.example', result)
+        for result in results(5):
+            agent.record('b.example', result)
+    for agent in agents:
+        agent.stop()
+        assert agent.unacked == 0 and agent.pending_hosts == 0
+
+    assert aggregator.hosts() == ['a.example', 'b.example']
+    stats = aggregator.host_stats('a.example')
+    assert sorted(stats) == ['east', 'north', 'west']
+    assert [stats[name].total_pings for name in ('east', 'west', 'north')] \
+        == [20, 21, 22]
+    assert stats['east'].failed_pings == 5
+    assert len(aggregator.history) == 20 + 21 + 22 + 3 * 5
+    assert aggregator.report_groups()['a.example@west'] == 'a.example'
+    assert not aggregator.gaps
+
+
+def test_agent_buffers_until_the_aggregator_serves():
+    aggregator = Aggregator(port=0)  # Listening but not accepting yet
+    agent = ProbeAgent('east', aggregator.address, flush_interval=0.05)
+    agent.start()
+    try:
+        for result in results(10):
+            agent.record('a.example', result)
+        time.sleep(0.3)
+        assert aggregator.host_stats('a.example') == {}
+
+        aggregator.start()
+        deadline = time.monotonic() + 5.0
+        while agent.unacked or agent.pending_hosts:
+            assert time.monotonic() < deadline
+            time.sleep(0.05)
+        assert aggregator.host_stats('a.example')['east'].total_pings == 10
+    finally:
+        agent.stop()
+        aggregator.stop()
+
+
+def test_capped_samples_are_backfilled_from_counters(aggregator):
+    agent = ProbeAgent('east', aggregator.address, max_samples=10)
+    for result in results(50, fail_every=5):
+        agent.record('a.example', result)
+    agent.start()
+    agent.stop()
+
+    stats = aggregator.host_stats('a.example')['east']
+    assert stats.total_pings == 50
+    assert aggregator.gaps[('east', 'a.example')] == 40
+
+    history = aggregator.history
+    assert len(history) == 50
+    assert len(history) - sum(history.success) == stats.failed_pings == 10
+    assert list(history.timestamp) == sorted(history.timestamp)
+    rtts = [rtt for rtt in history.rtt if rtt == rtt]
+    assert len(rtts) == stats.rtt_count
+    assert sum(rtts) == pytest.approx(stats.rtt_total, rel=1e-6)
+
+
+def test_delta_round_trip_keeps_first_timestamp():
+    delta = HostDelta()
+    for result in results(5, fail_every=2):
+        delta.add(result.timestamp, result.success, result.rtt, 3)
+    buffer = bytearray(encode_batch(7, {'a': delta}))
+    (_, payload), = read_frames(buffer)
+    seq, decoded = decode_batch(payload)
+
+    assert seq == 7
+    copy = decoded['a']
+    assert copy.first_timestamp == 1000.0
+    assert (copy.count, copy.failed, copy.dropped) == (5, 2, 2)
+    backfilled = copy.backfill()
+    assert [r.timestamp for r in backfilled] == [1000.0, 1001.0]
+    assert [r.success for r in backfilled] == [True, False]
+    assert not math.isnan(backfilled[0].rtt)
+
+
+def test_host_down_in_the_first_batch_is_alerted(aggregator):
+    changes = []
+    aggregator.on_status_change = lambda *change: changes.append(change)
+    agent = ProbeAgent('east', aggregator.address)
+    agent.record('down.example', ProbeResult(False, None, 1000.0))
+    agent.record('up.example', ProbeResult(True, 5.0, 1000.0))
+    agent.start()
+    agent.stop()
+    assert changes == [('east', 'down.example', False)]
+
+    # A restarted agent starts a new session; the host stays down
+    again = ProbeAgent('east', aggregator.address)
+    again.record('down.example', ProbeResult(False, None, 1010.0))
+    again.start()
+    again.stop()
+    assert changes == [('east', 'down.example', False)]
+
+
+def test_host_still_down_after_an_aggregator_restart():
+    changes = []
+    for _ in range(2):
+        aggregator = Aggregator(port=0)
+        aggregator.on_status_change = lambda *change: changes.append(change)
+        aggregator.start()
+        agent = ProbeAgent('east', aggregator.address)
+        agent.record('down.example', ProbeResult(False, None, 1000.0))
+        agent.start()
+        agent.stop()
+        aggregator.stop()
+    assert changes == [('east', 'down.example', False)] * 2
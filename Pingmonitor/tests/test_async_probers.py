@@ -0,0 +1,159 @@
+"""
+Async prober tests against loopback listeners
+"""
+import asyncio
+import socket
+import threading
+import time
+
+import pytest
+
+from services import TcpConnectProber, UdpProber
+from services.async_probers import _AsyncProber
+
+
+@pytest.fixture
+def tcp_listener():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    sock.listen(16)
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+@pytest.fixture
+def closed_port():
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.bind(('127.0.0.1', 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class UdpServer:
+    """Loopback UDP server answering each request after a delay"""
+
+    def __init__(self, delay: float = 0.0, reply: bytes = None):
+        self.delay = delay
+        self.reply = reply  # Echo the request when None
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.bind(('127.0.0.1', 0))
+        self.sock.settimeout(0.1)
+        self.port = self.sock.getsockname()[1]
+        self.received = 0
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._serve, daemon=True)
+        self.thread.start()
+
+    def _serve(self):
+        while not self.stop_event.is_set():
+            try:
+                data, addr = self.sock.recvfrom(2048)
+            except socket.timeout:
+                continue
+            self.received += 1
+            timer = threading.Timer(self.delay, self._answer,
+                                    (self.reply or data, addr))
+            timer.daemon = True
+            timer.start()
+
+    def _answer(self, data, addr):
+        try:
+            self.sock.sendto(data, addr)
+        except OSError:
+            pass  # Closed by the test
+
+    def close(self):
+        self.stop_event.set()
+        self.thread.join()
+        self.sock.close()
+
+
+@pytest.fixture
+def udp_server():
+    servers = []
+
+    def start(**kwargs):
+        server = UdpServer(**kwargs)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def test_tcp_connect_measures_rtt(tcp_listener):
+    prober = TcpConnectProber(timeout=1.0)
+    result = prober.probe_port('127.0.0.1', tcp_listener)
+    assert result.success
+    assert 0 < result.rtt < 1000
+
+
+def test_tcp_refused_port_fails(closed_port):
+    result = TcpConnectProber(timeout=1.0).probe_port('127.0.0.1',
+                                                      closed_port)
+    assert not result.success
+    assert result.rtt is None
+
+
+def test_udp_echo_is_answered(udp_server):
+    server = udp_server()
+    prober = UdpProber(timeout=1.0)
+    try:
+        results = [prober.probe_port('127.0.0.1', server.port)
+                   for _ in range(5)]
+        burst = prober.probe_burst_port('127.0.0.1', server.port, 5, 0.0)
+    finally:
+        prober.close()
+    assert all(result.success and result.rtt < 1000 for result in results)
+    assert (burst.sent, burst.received, len(burst.rtts)) == (5, 5, 5)
+
+
+@pytest.mark.parametrize('tag_requests, reply', [(True, None),
+                                                 (False, b'pong')])
+def test_late_udp_replies_are_dropped(udp_server, tag_requests, reply):
+    # Every answer arrives after its probe timed out, while the next probe
+    # is waiting; it must not be credited to that probe
+    server = udp_server(delay=0.3, reply=reply)
+    prober = UdpProber(timeout=0.2, tag_requests=tag_requests)
+    try:
+        results = [prober.probe_port('127.0.0.1', server.port)
+                   for _ in range(4)]
+    finally:
+        prober.close()
+    assert server.received == 4
+    assert not any(result.success for result in results)
+
+
+def test_untagged_udp_accepts_any_reply(udp_server):
+    server = udp_server(reply=b'pong')
+    prober = UdpProber(timeout=1.0, tag_requests=False)
+    try:
+        result = prober.probe_port('127.0.0.1', server.port)
+    finally:
+        prober.close()
+    assert result.success
+
+
+def test_async_prober_requires_measure():
+    with pytest.raises(TypeError):
+        _AsyncProber(7)
+
+
+class _SlowTcpProber(TcpConnectProber):
+    """TCP prober for a destination that takes a while to answer"""
+
+    async def _measure(self, host, port):
+        await asyncio.sleep(0.2)
+        return await super()._measure(host, port)
+
+
+def test_tcp_burst_runs_in_one_window(tcp_listener):
+    prober = _SlowTcpProber(tcp_listener, max_per_destination=4)
+    started = time.monotonic()
+    result = prober.probe_burst('127.0.0.1', 10, spacing=0.01)
+    elapsed = time.monotonic() - started
+
+    assert result.received == 10
+    assert elapsed < 0.4  # Waves of four would take at least 0.6 s
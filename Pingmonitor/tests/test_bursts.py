@@ -0,0 +1,120 @@
+"""
+Burst probe tests
+"""
+import struct
+import threading
+
+import pytest
+
+from models import BurstResult, PingStats, ProbeResult
+from services import (ProbeBudget, ProbeScheduler, Prober,
+                      RateLimitedProber, load_checkpoint, save_checkpoint)
+from services.checkpoint import HostState
+from utils.clock import VirtualClock
+
+
+def test_window_loss_is_packet_loss():
+    stats = PingStats()
+    stats.record_burst(BurstResult(10, 7, [5.0] * 7, 1000.0))
+    stats.record_burst(BurstResult(10, 10, [6.0] * 10, 1010.0))
+
+    metrics = stats.window_metrics(now=1010.0)
+    assert metrics['count_1m'] == 20
+    assert metrics['loss_1m'] == pytest.approx(15.0)
+    assert stats.packet_loss == pytest.approx(15.0)
+
+
+def test_burst_fields_survive_a_checkpoint(tmp_path):
+    stats = PingStats()
+    stats.record_burst(BurstResult(5, 4, [10.0, 12.0, 11.0, 15.0], 1000.0))
+    filename = str(tmp_path / 'state.bin')
+    save_checkpoint(filename, [HostState('10.0.0.1', 5, 0.0, 0, False,
+                                         stats)])
+
+    states, _ = load_checkpoint(filename)
+    restored = states[0].stats
+    assert restored.packets_sent == 5
+    assert restored.packets_lost == 1
+    assert restored.jitter == pytest.approx(stats.jitter)
+
+
+def test_version_1_checkpoint_still_loads(tmp_path):
+    stats = PingStats({})  # No windows, so the burst columns end the file
+    stats.total_pings = 3
+    filename = str(tmp_path / 'state.bin')
+    save_checkpoint(filename, [HostState('10.0.0.1', 5, 0.0, 0, False,
+                                         stats)])
+
+    # Rewrite as version 1: drop packets_sent, packets_lost and jitter
+    with open(filename, 'rb') as f:
+        data = bytearray(f.read())
+    struct.pack_into('<H', data, 4, 1)
+    with open(filename, 'wb') as f:
+        f.write(data[:-24])
+
+    restored = load_checkpoint(filename)[0][0].stats
+    assert restored.total_pings == 3
+    assert restored.packets_sent == 0
+    assert restored.jitter is None
+
+
+class _BlockingProber(Prober):
+    """Holds every probe until released"""
+
+    def __init__(self):
+        self.release = threading.Event()
+
+    def probe(self, host, token=None):
+        self.release.wait(5)
+        return ProbeResult(True, rtt=1.0)
+
+
+def test_burst_takes_one_slot_per_probe():
+    budget = ProbeBudget(max_in_flight=8)
+    backend = _BlockingProber()
+    prober = RateLimitedProber(backend, budget)
+
+    burst = threading.Thread(target=prober.probe_burst,
+                             args=('10.0.0.1', 6, 0.0))
+    burst.start()
+    while budget.in_flight < 6:
+        threading.Event().wait(0.01)
+    assert budget.in_flight == 6
+
+    # A burst larger than the limit waits until nothing else is in flight
+    waiting = threading.Thread(target=prober.probe_burst,
+                               args=('10.0.0.2', 10, 0.0))
+    waiting.start()
+    threading.Event().wait(0.1)
+    assert budget.in_flight == 6
+
+    backend.release.set()
+    burst.join(5)
+    waiting.join(5)
+    assert budget.in_flight == 0
+    assert budget.wait_stats()['probes'] == 2
+
+
+@pytest.mark.parametrize('limits', [
+    {'rate': 0},
+    {'rate': -5},
+    {'burst': 0},
+    {'max_in_flight': 0},
+    {'subnet_rates': {'10.0.0.0/8': 0}},
+    {'subnet_rates': {'10.0.0.0/8': None}},
+    {'subnet_rates': {'10.0.0.0/8': '20'}},
+])
+def test_budget_rejects_limits_that_are_not_positive(limits):
+    budget = ProbeBudget(rate=10.0, subnet_rates={'10.0.0.0/8': 5})
+    with pytest.raises(ValueError):
+        budget.configure(**limits)
+    assert budget.acquire('10.0.0.1') < 0.1  # Old limits still apply
+    budget.release()
+
+
+def test_scheduler_probes_within_the_shared_budget():
+    prober = _BlockingProber()
+    assert ProbeScheduler(prober).budget is ProbeBudget.default()
+    assert ProbeScheduler(prober, clock=VirtualClock()).budget is None
+    budget = ProbeBudget(rate=5.0)
+    assert ProbeScheduler(prober, budget=budget).budget is budget
@@ -0,0 +1,93 @@
+"""
+Cancellation tests
+Stopping monitors must abort their probes in flight without waiting for
+the probe timeout
+"""
+import socket
+import time
+
+import pytest
+
+from services import PingService, ProbeScheduler, TargetProber, UdpProber
+
+MONITORS = 40
+
+
+@pytest.fixture
+def silent_targets():
+    """UDP ports on loopback that receive requests and never answer"""
+    sockets = []
+    for _ in range(MONITORS):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.bind(('127.0.0.1', 0))
+        sockets.append(sock)
+    yield [f"udp://127.0.0.1:{sock.getsockname()[1]}" for sock in sockets]
+    for sock in sockets:
+        sock.close()
+
+
+@pytest.fixture
+def prober():
+    prober = TargetProber(udp=UdpProber(timeout=30.0))
+    yield prober
+    prober.close()
+
+
+def start_all(services, targets):
+    for service, target in zip(services, targets):
+        assert service.start_monitoring(target, 60)
+    time.sleep(0.2)  # Let every monitor block on its probe
+
+
+def stop_times(services):
+    durations = []
+    for service in services:
+        started = time.perf_counter()
+        service.stop_monitoring()
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def test_stop_and_restart_are_fast(silent_targets, prober):
+    services = [PingService(prober) for _ in range(MONITORS)]
+    start_all(services, silent_targets)
+
+    assert max(stop_times(services)) < 0.1
+    time.sleep(0.2)
+    assert all(service.stats.total_pings == 0 for service in services)
+    assert not any(service.monitoring_thread.is_alive()
+                   for service in services)
+
+    started = time.perf_counter()
+    start_all(services, silent_targets)
+    assert time.perf_counter() - started - 0.2 < 0.1
+    assert max(stop_times(services)) < 0.1
+    assert all(service.stats.total_pings == 0 for service in services)
+
+
+def test_stop_leaves_other_monitors_running(silent_targets, prober):
+    services = [PingService(prober) for _ in range(4)]
+    start_all(services, silent_targets)
+
+    services[0].stop_monitoring()
+    time.sleep(0.1)
+    assert all(service.monitoring_thread.is_alive()
+               for service in services[1:])
+    assert all(service.stats.total_pings == 0 for service in services[1:])
+    stop_times(services[1:])
+
+
+def test_scheduler_stop_aborts_probes(silent_targets, prober):
+    scheduler = ProbeScheduler(prober, max_workers=MONITORS)
+    for target in silent_targets:
+        assert scheduler.add_host(target, 60.0, phase=0.0)
+    scheduler.start()
+    time.sleep(0.2)
+
+    started = time.perf_counter()
+    scheduler.stop()
+    assert time.perf_counter() - started < 0.1
+    time.sleep(0.2)
+    assert scheduler.hosts.aggregate()['total_pings'] == 0
+    assert all(state['status'] == 'pending'
+               for state in scheduler.host_states())
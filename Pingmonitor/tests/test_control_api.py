@@ -0,0 +1,114 @@
+"""
+Control API tests against a server on localhost
+"""
+import json
+import time
+import urllib.error
+import urllib.request
+
+import pytest
+
+from models import ProbeResult
+from services import ControlServer, ProbeScheduler, Prober
+
+
+class _UpProber(Prober):
+    def probe(self, host, token=None):
+        return ProbeResult(True, rtt=2.0)
+
+
+@pytest.fixture
+def api():
+    scheduler = ProbeScheduler(_UpProber())
+    server = ControlServer(scheduler, port=0)
+    server.start()
+    host, port = server.address
+    yield scheduler, f"http://{host}:{port}"
+    server.stop()
+    scheduler.stop()
+
+
+def request(url, body=None, content_type='application/json'):
+    data = None if body is None else json.dumps(body).encode('utf-8')
+    req = urllib.request.Request(url, data=data)
+    if content_type:
+        req.add_header('Content-Type', content_type)
+    try:
+        with urllib.request.urlopen(req, timeout=5) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_add_and_query_hosts(api):
+    scheduler, base = api
+    status, reply = request(f"{base}/hosts/add", {
+        'hosts': ['10.0.0.1', {'host': '10.0.0.2', 'interval': 5}],
+        'interval': 10})
+    assert status == 200
+    assert reply == {'applied': 2, 'errors': {}}
+
+    status, reply = request(f"{base}/hosts?host=10.0.0.2")
+    assert [state['interval'] for state in reply['hosts']] == [5]
+
+    request(f"{base}/hosts/pause", {'hosts': ['10.0.0.1']})
+    status, reply = request(f"{base}/status")
+    assert status == 200
+    assert reply['hosts'] == 2
+    assert reply['paused'] == 1
+    assert reply['running'] is False
+
+
+def test_status_counts_probes(api):
+    scheduler, base = api
+    request(f"{base}/hosts/add", {'hosts': ['10.0.0.1'], 'interval': 60})
+    scheduler.start()
+    scheduler.set_intervals({'10.0.0.1': 0.05})
+    deadline = 50
+    while scheduler.summary()['total_pings'] < 2 and deadline:
+        deadline -= 1
+        time.sleep(0.05)
+
+    status, reply = request(f"{base}/status")
+    assert reply['running'] is True
+    assert reply['total_pings'] >= 2
+    assert reply['success_rate'] == 100.0
+    assert reply['avg_rtt'] == 2.0
+
+
+@pytest.mark.parametrize('interval, error', [
+    (True, 'must be a number'),
+    ('10', 'must be a number'),
+    (None, 'No interval'),
+])
+def test_invalid_intervals_are_rejected(api, interval, error):
+    scheduler, base = api
+    status, reply = request(f"{base}/hosts/add",
+                            {'hosts': ['10.0.0.1'], 'interval': interval})
+    assert status == 400
+    assert error in reply['error']
+    assert '10.0.0.1' not in scheduler.hosts
+
+
+def test_non_positive_interval_is_reported(api):
+    _, base = api
+    status, reply = request(f"{base}/hosts/add",
+                            {'hosts': ['10.0.0.1'], 'interval': 0})
+    assert reply['errors'] == {'10.0.0.1': 'Interval must be positive'}
+
+
+@pytest.mark.parametrize('content_type', ['text/plain',
+                                          'application/x-www-form-urlencoded'])
+def test_post_requires_json_content_type(api, content_type):
+    scheduler, base = api
+    status, _ = request(f"{base}/hosts/add",
+                        {'hosts': ['10.0.0.1'], 'interval': 10},
+                        content_type=content_type)
+    assert status == 415
+    assert '10.0.0.1' not in scheduler.hosts
+
+
+def test_unknown_endpoint(api):
+    _, base = api
+    status, reply = request(f"{base}/nothing")
+    assert status == 404
@@ -0,0 +1,114 @@
+"""
+Dependent-host suppression tests for independently running monitors
+"""
+import threading
+import time
+
+from models import ProbeResult
+from services import PingService, Prober, SuppressionGroup, build_dependencies
+
+GATEWAY = '10.0.0.1'
+CHILDREN = ['10.0.0.2', '10.0.0.3', '10.0.0.4']
+
+
+class _SwitchProber(Prober):
+    """Answers only for hosts in up"""
+
+    def __init__(self):
+        self.up = set()
+        self.probes = {}
+        self._lock = threading.Lock()
+
+    def probe(self, host, token=None):
+        with self._lock:
+            self.probes[host] = self.probes.get(host, 0) + 1
+        return ProbeResult(host in self.up, rtt=1.0 if host in self.up
+                           else None, timestamp=time.time())
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.02)
+    return condition()
+
+
+def test_build_dependencies_groups_by_subnet():
+    dependencies = build_dependencies(
+        [GATEWAY, *CHILDREN, '10.0.1.9'], parents={'10.0.1.9': GATEWAY},
+        auto_group=True)
+    assert dependencies.parents == {'10.0.1.9': GATEWAY,
+                                    **{child: GATEWAY for child in CHILDREN}}
+
+
+def test_children_of_a_down_parent_are_suppressed():
+    prober = _SwitchProber()
+    group = SuppressionGroup(
+        build_dependencies([GATEWAY, *CHILDREN], auto_group=True),
+        interval_factor=5)
+    events = []
+    group.on_root_cause = events.append
+
+    alerts = []
+    services = {}
+    for host in [GATEWAY, *CHILDREN]:
+        service = PingService(prober)
+        service.dependencies = group
+        service.on_status_change = (
+            lambda up, host=host: alerts.append((host, up)))
+        services[host] = service
+    try:
+        # Everything is down: only the gateway alerts
+        assert services[GATEWAY].start_monitoring(GATEWAY, 1)
+        assert wait_for(lambda: events)
+        for child in CHILDREN:
+            assert services[child].start_monitoring(child, 1)
+        assert wait_for(lambda: all(services[child].failed_attempts
+                                    for child in CHILDREN))
+        assert {host for host, up in alerts if not up} == {GATEWAY}
+        assert len(events) == 1 and events[0].active
+        assert events[0].suppressed == set(CHILDREN)
+
+        # Children are probed at a fifth of the rate
+        before = {child: prober.probes[child] for child in CHILDREN}
+        time.sleep(2.5)
+        assert prober.probes[GATEWAY] >= 3
+        assert all(prober.probes[child] - before[child] <= 1
+                   for child in CHILDREN)
+
+        # The gateway recovers: children resume at once, with no alerts
+        prober.up.update([GATEWAY, *CHILDREN])
+        services[GATEWAY].probe_now()
+        assert wait_for(lambda: all(services[child].failed_attempts == 0
+                                    for child in CHILDREN), timeout=1.0)
+        assert not events[-1].active
+        assert [alert for alert in alerts if alert[1]] == [(GATEWAY, True)]
+        assert {host for host, _ in alerts} == {GATEWAY}
+    finally:
+        for service in services.values():
+            service.stop_monitoring()
+
+
+def test_child_failure_checks_parent_first():
+    prober = _SwitchProber()
+    prober.up.add(GATEWAY)
+    group = SuppressionGroup(build_dependencies(
+        [GATEWAY, CHILDREN[0]], parents={CHILDREN[0]: GATEWAY}))
+    alerts = []
+    gateway, child = PingService(prober), PingService(prober)
+    for service in (gateway, child):
+        service.dependencies = group
+    child.on_status_change = alerts.append
+    try:
+        gateway.start_monitoring(GATEWAY, 60)
+        assert wait_for(lambda: prober.probes.get(GATEWAY) == 1)
+        child.start_monitoring(CHILDREN[0], 1)
+
+        # The first failure probes the gateway at once and is held back
+        assert wait_for(lambda: prober.probes.get(GATEWAY) == 2)
+        assert alerts == []
+        # The gateway is fine, so the next failure is alerted
+        assert wait_for(lambda: alerts == [False], timeout=2.0)
+    finally:
+        gateway.stop_monitoring()
+        child.stop_monitoring()
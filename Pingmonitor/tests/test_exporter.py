@@ -0,0 +1,113 @@
+"""Tests for streaming log and history exports"""
+import csv
+import gzip
+import json
+
+from models import LogStore, ProbeHistory
+from services import ExportJob, history_export, log_export
+from services.exporter import detect_format
+
+
+def store_with(count, capacity=1000):
+    store = LogStore(capacity=capacity)
+    for i in range(count):
+        store.add(f"Message {i}", level='error' if i % 2 else 'info',
+                  host='a' if i % 3 else None, timestamp=1000.0 + i)
+    return store
+
+
+def test_detect_format_ignores_gz():
+    assert detect_format('log.CSV') == 'csv'
+    assert detect_format('log.jsonl.gz') == 'jsonl'
+    assert detect_format('log.log') == 'txt'
+    assert detect_format('log') == 'txt'
+
+
+def test_log_export_writes_in_chunks(tmp_path):
+    store = store_with(10)
+    filename = tmp_path / 'log.csv'
+    job = log_export(store, str(filename), chunk_size=4)
+    progress, done = [], []
+    job.on_progress = lambda written, total: progress.append((written, total))
+    job.on_done = done.append
+
+    assert job.run()
+    assert progress == [(4, 10), (8, 10), (10, 10)]
+    assert done == [job] and job.error is None
+    with open(filename, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert [row['message'] for row in rows] == \
+        [f"Message {i}" for i in range(10)]
+    assert (rows[0]['host'], rows[1]['host'], rows[1]['level']) \
+        == ('', 'a', 'error')
+
+
+def test_log_export_of_selected_records(tmp_path):
+    store = store_with(10, capacity=8)  # Records 0 and 1 were dropped
+    seqs = [0] + store.query(level='error')
+    filename = tmp_path / 'log.txt'
+    job = log_export(store, str(filename), seqs=seqs, chunk_size=2)
+    assert job.total == 5
+    assert job.run()
+    lines = filename.read_text().splitlines()
+    assert len(lines) == job.written == 4
+    assert lines[0].endswith('] Message 3')
+
+
+def test_compressed_jsonl_export(tmp_path):
+    store = store_with(5)
+    filename = tmp_path / 'log.jsonl.gz'
+    assert log_export(store, str(filename)).run()
+    with gzip.open(filename, 'rt', encoding='utf-8') as f:
+        rows = [json.loads(line) for line in f]
+    assert [row['message'] for row in rows] == \
+        [f"Message {i}" for i in range(5)]
+
+
+def test_history_export_from_memory(tmp_path):
+    history = ProbeHistory()
+    for i in range(7):
+        history.append('b' if i % 2 else 'a', 100.0 + i, i != 3,
+                       None if i == 3 else 1.23456)
+    filename = tmp_path / 'history.jsonl'
+    job = history_export(history, str(filename), chunk_size=3)
+    progress = []
+    job.on_progress = lambda written, total: progress.append(written)
+    assert job.run()
+    assert progress == [3, 6, 7]
+    rows = [json.loads(line) for line in filename.read_text().splitlines()]
+    assert rows[3] == {'host': 'b', 'timestamp': 103.0, 'success': False,
+                       'rtt': None}
+    assert rows[0]['rtt'] == 1.235
+
+
+def test_cancelled_export_removes_the_partial_file(tmp_path):
+    store = store_with(100)
+    filename = tmp_path / 'log.txt'
+    job = log_export(store, str(filename), chunk_size=10)
+    job.on_progress = lambda written, total: job.cancel()
+    done = []
+    job.on_done = done.append
+
+    assert not job.run()
+    assert job.cancelled and job.written == 10
+    assert job.error is None and done == [job]
+    assert not filename.exists()
+
+
+def test_failed_export_reports_the_error(tmp_path):
+    def chunks():
+        yield [{'value': 1}]
+        raise RuntimeError('source went away')
+
+    filename = tmp_path / 'rows.txt'
+    job = ExportJob(str(filename), chunks(), 2, ['value'])
+    assert not job.run()
+    assert job.error == 'source went away' and job.written == 1
+    assert not filename.exists()
+
+    job = ExportJob(str(tmp_path / 'missing' / 'rows.txt'), iter([]), 0,
+                    ['value'])
+    job.start()
+    job.thread.join(timeout=2.0)
+    assert job.error is not None
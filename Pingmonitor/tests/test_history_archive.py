@@ -0,0 +1,146 @@
+"""Tests for rolling probe history over into files and reporting on it"""
+import csv
+import json
+import time
+
+import pytest
+
+from models import ProbeHistory
+from services import HistoryArchive
+
+
+def fill(history, hosts, start, count):
+    """Add count probes per host one minute apart, every fourth failing"""
+    for i in range(count):
+        for host in hosts:
+            failed = i % 4 == 3
+            history.append(host, start + 60 * i, not failed,
+                           None if failed else 20.0)
+
+
+def test_take_and_extend_keep_rows_and_hosts():
+    history = ProbeHistory()
+    fill(history, ['a', 'b'], 0.0, 3)
+    taken = history.take()
+    assert len(history) == 0 and len(taken) == 6
+
+    other = ProbeHistory()
+    fill(other, ['b'], 1000.0, 2)
+    taken.extend(other)
+    assert taken.hosts == ['a', 'b']
+    assert [taken.hosts[i] for i in taken.host_id[-2:]] == ['b', 'b']
+    assert list(taken.timestamp[-2:]) == [1000.0, 1060.0]
+
+
+def test_rollover_moves_rows_to_files(tmp_path):
+    pytest.importorskip('numpy')
+    history = ProbeHistory()
+    archive = HistoryArchive(history, str(tmp_path), max_files=2)
+    for n in range(3):
+        fill(history, ['a', f"h{n}"], 600.0 * n, 5)
+        assert archive.roll_over()
+        assert len(history) == 0
+    assert archive.roll_over() is None  # Nothing new to save
+
+    assert len(archive.files()) == 2  # The oldest file was pruned
+    fill(history, ['a'], 5000.0, 1)
+    joined = archive.load()
+    assert len(joined) == 2 * 10 + 1
+    assert set(joined.hosts) == {'a', 'h1', 'h2'}
+    assert list(joined.timestamp) == sorted(joined.timestamp)
+
+
+def test_full_memory_rolls_over_early(tmp_path, monkeypatch):
+    pytest.importorskip('numpy')
+    monkeypatch.setattr(HistoryArchive, 'CHECK_INTERVAL', 0.02)
+    history = ProbeHistory()
+    archive = HistoryArchive(history, str(tmp_path), interval=3600,
+                             max_rows=100)
+    archive.start()
+    try:
+        fill(history, ['a'], 0.0, 150)
+        deadline = time.monotonic() + 2.0
+        while len(history):
+            assert time.monotonic() < deadline
+            time.sleep(0.02)
+    finally:
+        archive.stop()
+    assert len(archive.load()) == 150
+
+
+def test_report_command_covers_saved_history(tmp_path):
+    pytest.importorskip('numpy')
+    import main
+
+    history = ProbeHistory()
+    archive = HistoryArchive(history, str(tmp_path / 'history'))
+    fill(history, ['a@east', 'a@west'], 0.0, 8)
+    archive.roll_over()
+    fill(history, ['a@east'], 3600.0, 4)
+    archive.roll_over()
+
+    output = tmp_path / 'report.json'
+    args = main.parse_args(['--report', 'day', '--history-dir',
+                            str(tmp_path / 'history'), '--output',
+                            str(output)])
+    assert main.run_report(args) == 0
+    rows = {(row['scope'], row['name']): row
+            for row in json.loads(output.read_text())}
+    assert rows[('host', 'a@east')]['probes'] == 12
+    assert rows[('group', 'a')]['probes'] == 20
+    assert rows[('group', 'a')]['failures'] == 5
+
+    output = tmp_path / 'report.csv'
+    args = main.parse_args(['--report', '86400', '--history-dir',
+                            str(tmp_path / 'history'), '--output',
+                            str(output)])
+    assert main.run_report(args) == 0
+    with open(output, newline='') as f:
+        assert len(list(csv.DictReader(f))) == 3
+
+
+def test_report_command_rejects_unknown_periods(tmp_path):
+    pytest.importorskip('numpy')
+    import main
+
+    history = ProbeHistory()
+    fill(history, ['a'], 0.0, 2)
+    HistoryArchive(history, str(tmp_path)).roll_over()
+    args = main.parse_args(['--report', 'year', '--history-dir',
+                            str(tmp_path), '--output',
+                            str(tmp_path / 'report.csv')])
+    assert main.run_report(args) == 1
+
+
+def test_export_reads_archived_files_one_at_a_time(tmp_path, monkeypatch):
+    pytest.importorskip('numpy')
+    from services import history_export
+
+    history = ProbeHistory()
+    archive = HistoryArchive(history, str(tmp_path / 'history'))
+    for n in range(3):
+        fill(history, ['a'], 600.0 * n, 5)
+        archive.roll_over()
+    fill(history, ['b'], 5000.0, 2)
+
+    loaded = []
+    original = ProbeHistory.load
+
+    def load(filename):
+        loaded.append(filename)
+        return original(filename)
+
+    monkeypatch.setattr(ProbeHistory, 'load', staticmethod(load))
+    output = tmp_path / 'history.csv'
+    job = history_export(archive, str(output), chunk_size=4)
+    assert job.total == 17
+    assert loaded == []  # Nothing is read before the worker runs
+
+    assert job.run()
+    with open(output, newline='') as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 17 and job.written == 17
+    assert [row['host'] for row in rows[-2:]] == ['b', 'b']
+    assert [float(row['timestamp']) for row in rows] == sorted(
+        float(row['timestamp']) for row in rows)
+    assert loaded == archive.files()
@@ -0,0 +1,126 @@
+"""Tests for the column bookkeeping of HostRegistry"""
+import math
+from array import array
+
+import pytest
+
+from models import HostRegistry
+from models.host_registry import COLUMNS
+from models.ping_stats import WINDOW_SPANS
+
+
+def saved_columns(count, failed=2):
+    """Columns as a checkpoint would hold them for count hosts"""
+    return {
+        'interval': array('d', [5.0]) * count,
+        'start_time': array('d', [100.0]) * count,
+        'total_pings': array('Q', [10]) * count,
+        'failed_pings': array('Q', [failed]) * count,
+        'failed_attempts': array('I', [failed]) * count,
+        'min_rtt': array('d', [1.5]) * count
+    }
+
+
+def assert_columns_aligned(registry):
+    for name, _ in COLUMNS:
+        assert len(getattr(registry, name)) == len(registry.names), name
+
+
+def test_add_sets_defaults_and_rejects_duplicates():
+    registry = HostRegistry()
+    view = registry.add('a', 2.0, 50.0, start_time=10.0)
+    assert (view.id, view.interval, view.next_due) == (0, 2.0, 50.0)
+    assert registry.active[0] == 1 and registry.total_pings[0] == 0
+    assert math.isnan(registry.min_rtt[0]) and view.min_rtt is None
+    assert set(registry.windows[0]) == set(WINDOW_SPANS)
+    with pytest.raises(ValueError):
+        registry.add('a', 1.0, 0.0)
+    assert len(registry) == 1 and 'a' in registry
+
+
+def test_removed_ids_are_reused_with_cleared_columns():
+    registry = HostRegistry({})
+    registry.add('a', 1.0, 0.0)
+    registry.add('b', 1.0, 0.0)
+    registry.record(0, 1.0, False)
+    registry.record(0, 2.0, True, 4.0)
+    assert registry.remove('a').id == 0
+    assert registry.remove('a') is None
+    assert registry.active[0] == 0 and registry.names[0] is None
+    assert registry.down_hosts() == []
+
+    view = registry.add('c', 3.0, 0.0)
+    assert view.id == 0 and registry.names == ['c', 'b']
+    assert (view.total_pings, view.failed_pings, view.min_rtt) \
+        == (0, 0, None)
+    assert registry.windows == {}  # Empty window_spans keeps none
+    assert_columns_aligned(registry)
+
+
+def test_id_with_a_probe_in_flight_is_freed_on_release():
+    registry = HostRegistry({})
+    view = registry.add('a', 1.0, 0.0)
+    view.in_flight = True
+    registry.remove('a')
+    assert not registry.is_current(view)
+    assert registry.add('b', 1.0, 0.0).id == 1  # Id 0 is still probing
+
+    registry.release(view)
+    registry.release(view)  # A second release frees the id only once
+    assert registry.add('c', 1.0, 0.0).id == 0
+    assert registry.add('d', 1.0, 0.0).id == 2
+
+
+def test_extend_appends_whole_columns():
+    registry = HostRegistry()
+    registry.add('a', 1.0, 0.0)
+    hosts = ['h1', 'h2', 'h3']
+    added = registry.extend(hosts, array('d', [7.0, 8.0, 9.0]),
+                            saved_columns(3))
+    assert added == 3
+    assert_columns_aligned(registry)
+    assert [registry.ids[host] for host in hosts] == [1, 2, 3]
+    assert list(registry.next_due) == [0.0, 7.0, 8.0, 9.0]
+    assert list(registry.interval) == [1.0, 5.0, 5.0, 5.0]
+    assert list(registry.active) == [1] * 4
+    assert list(registry.total_pings)[1:] == [10] * 3
+    assert math.isnan(registry.max_rtt[2])  # Missing NaN column
+    assert registry.in_flight[3] == 0  # Missing column starts at zero
+    assert set(registry.windows) == {0, 1, 2, 3}
+    assert registry.down_hosts() == hosts
+    assert registry.aggregate()['total_pings'] == 30
+
+
+def test_extend_skips_registered_hosts_and_fills_free_ids():
+    registry = HostRegistry({})
+    for host in ('a', 'b', 'c'):
+        registry.add(host, 1.0, 0.0)
+    registry.remove('b')
+
+    added = registry.extend(['c', 'x', 'y'], array('d', [1.0, 2.0, 3.0]),
+                            saved_columns(3, failed=0))
+    assert added == 2
+    assert_columns_aligned(registry)
+    assert (registry.ids['x'], registry.ids['y']) == (1, 3)
+    assert registry.total_pings[registry.ids['c']] == 0  # Left as it was
+    x = registry.get('x')
+    assert (x.next_due, x.interval, x.total_pings, x.min_rtt) \
+        == (2.0, 5.0, 10, 1.5)
+    assert x.start_time.timestamp() == 100.0
+
+
+def test_reset_clears_counters_but_keeps_the_schedule():
+    registry = HostRegistry()
+    registry.extend(['a', 'b'], array('d', [7.0, 8.0]), saved_columns(2))
+    registry.record(0, 1.0, True, 3.0)
+
+    registry.reset(['a', 'unknown'])
+    assert (registry.total_pings[0], registry.total_pings[1]) == (0, 10)
+    assert registry.windows[0]['1m'].snapshot(1.0)['count'] == 0
+
+    registry.reset()
+    assert list(registry.total_pings) == [0, 0]
+    assert list(registry.failed_attempts) == [0, 0]
+    assert all(math.isnan(value) for value in registry.min_rtt)
+    assert list(registry.next_due) == [7.0, 8.0]
+    assert list(registry.interval) == [5.0, 5.0]
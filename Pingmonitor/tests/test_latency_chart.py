@@ -0,0 +1,78 @@
+"""
+Latency chart data structure tests
+"""
+import math
+import random
+
+import pytest
+
+from ui.latency_chart import ChartSeries, MinMaxPyramid
+
+
+def brute_force(points, start, end):
+    """Min, max and loss count of points[start:end] the slow way"""
+    values = [value for value, _ in points[start:end] if value is not None]
+    return (min(values, default=math.inf), max(values, default=-math.inf),
+            sum(1 for _, lost in points[start:end] if lost))
+
+
+def random_points(count, seed=1):
+    rng = random.Random(seed)
+    points = []
+    for _ in range(count):
+        lost = rng.random() < 0.1
+        value = None if lost or rng.random() < 0.05 else rng.uniform(1, 300)
+        points.append((value, lost))
+    return points
+
+
+@pytest.mark.parametrize('count', [1, 2, 7, 64, 1000])
+def test_query_matches_brute_force(count):
+    points = random_points(count)
+    pyramid = MinMaxPyramid()
+    for value, lost in points:
+        pyramid.append(value, lost)
+
+    assert len(pyramid) == count
+    rng = random.Random(count)
+    ranges = [(0, count), (0, 0), (count - 1, count)]
+    ranges += [tuple(sorted(rng.randrange(count + 1) for _ in range(2)))
+               for _ in range(300)]
+    for start, end in ranges:
+        assert pyramid.query(start, end) == brute_force(points, start, end)
+
+
+def test_query_after_trimming_matches_brute_force():
+    points = random_points(3000, seed=2)
+    pyramid = MinMaxPyramid()
+    rng = random.Random(3)
+    for index, (value, lost) in enumerate(points):
+        pyramid.append(value, lost)
+        if rng.random() < 0.01:
+            pyramid.trim(rng.randrange(len(pyramid) + 1))
+        if index % 50 == 0:
+            count = index + 1
+            for _ in range(20):
+                start, end = sorted(rng.randrange(pyramid.offset, count + 1)
+                                    for _ in range(2))
+                assert pyramid.query(start, end) == \
+                    brute_force(points, start, end)
+
+    assert len(pyramid) == len(points) - pyramid.offset
+    assert pyramid.query(0, len(points)) == \
+        brute_force(points, pyramid.offset, len(points))
+
+
+def test_series_keeps_only_its_span():
+    series = ChartSeries('black', keep=100.0)
+    for second in range(10 * ChartSeries.TRIM_EVERY):
+        series.append(float(second), second % 10 != 9, float(second % 50))
+
+    newest = series.times[-1]
+    assert newest - series.times[0] <= 100.0 + ChartSeries.TRIM_EVERY
+    assert len(series.times) <= 100 + ChartSeries.TRIM_EVERY + 1
+    assert sum(len(level) for level in series.pyramid.mins) \
+        < 4 * len(series.times) + 64
+
+    low, high, loss = series.summarize(newest - 99, newest + 1)
+    assert (low, high, loss) == (0.0, 48.0, 10)  # 49 s are lost
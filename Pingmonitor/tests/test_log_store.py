@@ -0,0 +1,84 @@
+"""
+Log record store tests
+"""
+from models import LogStore
+
+
+def test_sequence_numbers_continue_after_clear():
+    store = LogStore(capacity=4)
+    old = [store.add(f"old {i}", host='a').seq for i in range(6)]
+    store.clear()
+    assert len(store) == 0
+    assert list(store.records(old)) == []  # Held seqs do not resolve
+
+    new = [store.add(f"new {i}", host='a').seq for i in range(6)]
+    assert new[0] == old[-1] + 1
+    assert [r.message for r in store.records(new)] == \
+        ['new 2', 'new 3', 'new 4', 'new 5']
+    assert store.query(host='a') == new[2:]
+    assert store.query(text='new 3') == [new[3]]
+
+
+def fill(store, count, start=1000.0):
+    """Add records for three hosts and levels, two per second"""
+    for i in range(count):
+        store.add(f"Message {i} {'timeout' if i % 7 == 0 else 'ok'}",
+                  level=('info', 'error', 'success')[i % 3],
+                  host=(None, 'a', 'b', 'c')[i % 4],
+                  timestamp=start + i // 2)
+
+
+def brute_force(store, **filters):
+    return [seq for seq in range(store.first_seq, store.next_seq)
+            if store.matches(store.get(seq), **filters)]
+
+
+def test_query_intersects_indexes_and_filters():
+    store = LogStore(capacity=1000)
+    fill(store, 600)
+    cases = [{}, {'host': 'a'}, {'level': 'error'},
+             {'host': 'b', 'level': 'success'},
+             {'host': 'c', 'level': 'info', 'text': 'TIMEOUT'},
+             {'host': 'missing'}, {'host': 'a', 'level': 'missing'},
+             {'text': 'message 59 '}]
+    for filters in cases:
+        assert store.query(**filters) == brute_force(store, **filters), \
+            filters
+    assert store.query(host='b', level='success')  # Not empty by accident
+
+
+def test_query_bisects_time_ranges():
+    store = LogStore(capacity=1000)
+    fill(store, 600)
+    assert store.query(since=1010.0, until=1012.0) == [20, 21, 22, 23]
+    assert store.query(since=1010.5, until=1011.0) == []
+    assert store.query(since=2000.0) == []
+    assert store.query(until=1000.0) == []
+    for filters in ({'since': 1100.0, 'host': 'a'},
+                    {'until': 1050.0, 'level': 'error', 'text': 'timeout'},
+                    {'since': 1020.0, 'until': 1290.0, 'host': 'c',
+                     'level': 'info'}):
+        assert store.query(**filters) == brute_force(store, **filters), \
+            filters
+
+
+def test_eviction_trims_the_indexes():
+    store = LogStore(capacity=1000)
+    fill(store, 5000)
+    assert (store.first_seq, len(store)) == (4000, 1000)
+    assert store.get(3999) is None and store.get(4000).seq == 4000
+
+    index = store._by_host['a']
+    assert len(index) == 250
+    assert len(index.seqs) < 2 * 1024 + 250  # Trimmed entries compacted
+    for filters in ({'host': 'a'}, {'level': 'info'},
+                    {'host': 'b', 'level': 'error', 'since': 3000.0}):
+        assert store.query(**filters) == brute_force(store, **filters), \
+            filters
+    assert store.query(since=1000.0)[0] == 4000
+
+    store.add('Only host', host='d', timestamp=4000.0)
+    for _ in range(1000):
+        store.add('Filler', timestamp=4000.0)
+    assert store.hosts == []
+    assert store.query(host='d') == []
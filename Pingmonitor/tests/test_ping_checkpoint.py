@@ -0,0 +1,120 @@
+"""
+PingService checkpoint tests
+"""
+import random
+import time
+
+from models import PingStats, ProbeResult
+from services import PingService, Prober, save_checkpoint
+from services.checkpoint import HostState
+
+
+class _FixedProber(Prober):
+    """Answers every probe the same way"""
+
+    def __init__(self, success: bool):
+        self.success = success
+
+    def probe(self, host, token=None):
+        return ProbeResult(self.success, 5.0 if self.success else None,
+                           time.time())
+
+
+class _NoisyProber(Prober):
+    """Answers at once with random RTTs and losses"""
+
+    def probe(self, host, token=None):
+        if random.random() < 0.2:
+            return ProbeResult(False, None, time.time())
+        return ProbeResult(True, random.uniform(1.0, 500.0), time.time())
+
+
+def _lossy_checkpoint(filename):
+    """Save a host with a full loss window and a sent down alert"""
+    stats = PingStats()
+    now = time.time()
+    for i in range(10):
+        stats.record_window(now - 10 + i, False, None)
+    stats.total_pings = stats.failed_pings = 10
+    save_checkpoint(filename, [HostState('10.0.0.1', 1, 0.0, 10, True,
+                                         stats)])
+
+
+def _run_once(service, host='10.0.0.1'):
+    """Monitor until the first probe has been recorded"""
+    done = []
+    service.on_stats_update = lambda: done.append(True)
+    assert service.start_monitoring(host, 1)
+    deadline = time.monotonic() + 2.0
+    while not done:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    service.stop_monitoring()
+
+
+def _service(success):
+    service = PingService(_FixedProber(success))
+    service.alert_thresholds = {'loss_1m': 50.0}
+    alerts, changes = [], []
+    service.on_threshold_alert = lambda *args: alerts.append(args)
+    service.on_status_change = changes.append
+    return service, alerts, changes
+
+
+def test_restored_alerts_are_not_raised_again(tmp_path):
+    filename = str(tmp_path / 'state.bin')
+    _lossy_checkpoint(filename)
+
+    service, alerts, _ = _service(False)
+    assert service.restore_checkpoint(filename) == ('10.0.0.1', 1)
+    _run_once(service)
+    assert alerts == []
+
+    fresh, alerts, _ = _service(False)
+    _run_once(fresh)
+    assert [alert[0] for alert in alerts] == ['loss_1m']
+
+
+def test_restored_down_alert_is_cleared_on_recovery(tmp_path):
+    filename = str(tmp_path / 'state.bin')
+    _lossy_checkpoint(filename)
+
+    service, _, changes = _service(True)
+    service.restore_checkpoint(filename)
+    _run_once(service)
+    assert changes == [True]
+
+    service.save_checkpoint(filename)
+    again, _, changes = _service(True)
+    again.restore_checkpoint(filename)
+    _run_once(again)
+    assert changes == []  # Recovery was already reported
+
+
+def test_checkpoint_snapshot_blocks_stats_updates(tmp_path, monkeypatch):
+    service = PingService(_NoisyProber())
+    monkeypatch.setattr(service, '_wait_next', lambda host, interval: None)
+    seen = []
+
+    def slow_save(filename, states):
+        # The monitor loop keeps probing but must not touch the stats
+        before = states[0].stats.total_pings
+        time.sleep(0.2)
+        seen.append((before, states[0].stats.total_pings))
+        return save_checkpoint(filename, states)
+
+    monkeypatch.setattr('services.ping_service.save_checkpoint', slow_save)
+    filename = str(tmp_path / 'state.bin')
+    assert service.start_monitoring('10.0.0.1', 1)
+    try:
+        time.sleep(0.05)
+        for _ in range(3):
+            service.save_checkpoint(filename)
+    finally:
+        service.stop_monitoring()
+
+    assert all(before == after for before, after in seen)
+    assert seen[-1][1] > seen[0][0]  # Probing went on between snapshots
+    restored = PingService()
+    assert restored.restore_checkpoint(filename) == ('10.0.0.1', 1)
+    assert restored.stats.total_pings == seen[-1][1]
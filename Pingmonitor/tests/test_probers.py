@@ -0,0 +1,57 @@
+"""
+Prober tests
+"""
+import os
+import stat
+
+import pytest
+
+from services import CancelToken, SystemPingProber
+
+pytestmark = pytest.mark.skipif(os.name == 'nt',
+                                reason="fake ping is a shell script")
+
+
+def fake_ping(tmp_path, monkeypatch, output, exit_code=0):
+    """Put a ping command printing output first on the PATH"""
+    script = tmp_path / 'ping'
+    script.write_text(f"#!/bin/sh\ncat <<'EOF'\n{output}\nEOF\n"
+                      f"exit {exit_code}\n")
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv('PATH', f"{tmp_path}{os.pathsep}{os.environ['PATH']}")
+
+
+@pytest.mark.parametrize('line, rtt', [
+    ("Reply from 10.0.0.1: bytes=32 time=12ms TTL=57", 12.0),
+    ("Reply from 10.0.0.1: bytes=32 time<1ms TTL=128", 1.0),
+    ("64 bytes from 10.0.0.1: icmp_seq=1 ttl=57 time=0.045 ms", 0.045),
+    ("Antwort von 10.0.0.1: Bytes=32 Zeit=7,5ms TTL=57", 7.5),
+])
+def test_icmp_rtt_is_parsed(tmp_path, monkeypatch, line, rtt):
+    fake_ping(tmp_path, monkeypatch, f"Pinging 10.0.0.1\n{line}\n")
+    result = SystemPingProber().probe('10.0.0.1')
+    assert result.success
+    assert result.rtt == pytest.approx(rtt)
+
+
+def test_icmp_rtt_falls_back_to_process_time(tmp_path, monkeypatch):
+    fake_ping(tmp_path, monkeypatch, "unexpected output")
+    result = SystemPingProber().probe('10.0.0.1')
+    assert result.success
+    assert 0 < result.rtt < 5000
+
+
+def test_icmp_failure_has_no_rtt(tmp_path, monkeypatch):
+    fake_ping(tmp_path, monkeypatch, "Request timed out.", exit_code=1)
+    result = SystemPingProber().probe('10.0.0.1')
+    assert not result.success
+    assert result.rtt is None
+
+
+def test_icmp_probe_cancelled_by_token(tmp_path, monkeypatch):
+    fake_ping(tmp_path, monkeypatch, "")
+    (tmp_path / 'ping').write_text("#!/bin/sh\nexec sleep 30\n")
+    token = CancelToken()
+    token.cancel()
+    result = SystemPingProber().probe('10.0.0.1', token)
+    assert not result.success
@@ -0,0 +1,109 @@
+"""Tests for the shared probe rate and concurrency budget"""
+import threading
+import time
+
+import pytest
+
+from services import ProbeBudget
+from services.rate_limit import TokenBucket
+
+
+def start_acquire(budget, host, cancel=None, count=1):
+    """Call acquire() on a thread; the result is appended to a list"""
+    results = []
+    thread = threading.Thread(
+        target=lambda: results.append(budget.acquire(host, cancel, count)))
+    thread.start()
+    deadline = time.monotonic() + 2.0
+    while not budget.waiting and not results:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    return thread, results
+
+
+def test_token_bucket_refills_up_to_the_burst():
+    bucket = TokenBucket(10.0, burst=5)
+    bucket.updated = 0.0
+    assert bucket.delay(0.0, 5) == 0.0
+    bucket.take(5)
+    assert bucket.delay(0.0) == pytest.approx(0.1)
+    assert bucket.delay(0.05) == pytest.approx(0.05)  # Half a token back
+    assert bucket.delay(10.0) == 0.0
+    assert bucket.tokens == 5  # Capped at the burst
+    assert bucket.delay(10.0, 20) == 0.0  # Oversized: a full bucket
+    bucket.take(20)
+    assert bucket.delay(10.0, 20) == pytest.approx(2.0)
+    assert TokenBucket(0.5).burst == 1.0
+    assert TokenBucket(8.0).burst == 8.0
+
+
+def test_rate_limit_spaces_out_probes():
+    budget = ProbeBudget(rate=20.0, burst=1)
+    started = time.monotonic()
+    waits = []
+    for _ in range(5):
+        waits.append(budget.acquire('10.0.0.1'))
+        budget.release()
+    assert time.monotonic() - started >= 0.18
+    assert waits[0] < 0.01 and min(waits[1:]) > 0.03
+    stats = budget.wait_stats()
+    assert (stats['probes'], stats['in_flight']) == (5, 0)
+    assert stats['max_wait'] == pytest.approx(max(waits))
+
+
+def test_hosts_use_the_most_specific_subnet():
+    budget = ProbeBudget(subnet_rates={'10.0.0.0/8': 1000,
+                                       '10.1.0.0/16': 2})
+    assert budget._subnet_bucket('10.1.2.3').rate == 2
+    assert budget._subnet_bucket('tcp://10.1.2.3:443').rate == 2
+    assert budget._subnet_bucket('10.2.0.1').rate == 1000
+    assert budget._subnet_bucket('192.168.1.1') is None
+    assert budget._subnet_bucket('example.com') is None
+
+    for _ in range(2):
+        assert budget.acquire('10.1.0.5') < 0.01
+    assert budget.acquire('10.2.0.1') < 0.01  # Other subnets are not held
+    assert budget.acquire('example.com') < 0.01
+    assert budget.acquire('10.1.0.6') > 0.3  # Waits for a token of its own
+
+
+def test_max_in_flight_holds_probes_until_release():
+    budget = ProbeBudget(max_in_flight=2)
+    budget.acquire('10.0.0.1')
+    budget.acquire('10.0.0.2')
+    thread, results = start_acquire(budget, '10.0.0.3')
+    time.sleep(0.05)
+    assert results == [] and budget.waiting == 1
+
+    budget.release()
+    thread.join(2.0)
+    assert len(results) == 1 and results[0] >= 0.05
+    assert (budget.in_flight, budget.waiting) == (2, 0)
+
+    budget.release(2)
+    assert budget.acquire('10.0.0.4', count=5) < 0.01  # Nothing else runs
+    assert budget.in_flight == 5
+
+
+def test_cancelled_wait_returns_none():
+    budget = ProbeBudget(max_in_flight=1)
+    budget.acquire('10.0.0.1')
+    cancel = threading.Event()
+    thread, results = start_acquire(budget, '10.0.0.2', cancel)
+    cancel.set()
+    budget.wake()
+    thread.join(2.0)
+    assert results == [None]
+    assert (budget.in_flight, budget.waiting) == (1, 0)
+    assert budget.wait_stats()['probes'] == 1
+
+
+def test_overload_is_reported_once_per_interval():
+    budget = ProbeBudget(rate=100.0, burst=1, warn_wait=0.001,
+                         warn_interval=60.0)
+    reports = []
+    budget.on_overload = lambda wait, waiting: reports.append(wait)
+    for _ in range(3):
+        budget.acquire('10.0.0.1')
+        budget.release()
+    assert len(reports) == 1 and reports[0] > 0.001
@@ -0,0 +1,87 @@
+"""
+Batched simulator replay tests
+"""
+import time
+
+import pytest
+
+from services import (DependencyMap, NetworkSimulator, ProbeScheduler,
+                      SimulatedProber)
+from utils.clock import VirtualClock
+
+np = pytest.importorskip('numpy')
+
+DAY = 86400.0
+
+
+def build(hosts=300, interval=60.0, seed=3, **kwargs):
+    clock = VirtualClock(0.0)
+    simulator = NetworkSimulator(seed=seed, clock=clock)
+    fleet = simulator.generate_fleet(hosts, DAY, outages_per_day=2,
+                                     flapping_fraction=0.05)
+    scheduler = ProbeScheduler(SimulatedProber(simulator), clock=clock,
+                               **kwargs)
+    scheduler.add_hosts({host: interval for host in fleet})
+    return scheduler
+
+
+def test_replay_matches_run_until_statistically():
+    exact, batched = build(), build()
+    end = 6 * 3600.0
+    assert batched.replay_until(end) == exact.run_until(end)
+
+    expected, actual = exact.summary(), batched.summary()
+    assert actual['total_pings'] == expected['total_pings']
+    assert actual['success_rate'] == pytest.approx(
+        expected['success_rate'], abs=0.5)
+    assert actual['avg_rtt'] == pytest.approx(expected['avg_rtt'], rel=0.02)
+    assert list(batched.hosts.next_due) == pytest.approx(
+        list(exact.hosts.next_due))
+    # Outages and flapping are not random, so mostly the same hosts are down
+    assert len(set(batched.hosts.down_hosts())
+               ^ set(exact.hosts.down_hosts())) <= 10
+
+
+def test_replay_in_chunks_is_deterministic():
+    whole, chunked = build(), build()
+    whole.replay_until(DAY)
+    for hour in range(1, 25):
+        chunked.replay_until(hour * 3600.0)
+
+    for column in ('total_pings', 'failed_pings', 'failed_attempts',
+                   'rtt_count'):
+        assert (list(getattr(whole.hosts, column))
+                == list(getattr(chunked.hosts, column)))
+    assert np.allclose(whole.hosts.last_failure, chunked.hosts.last_failure,
+                       equal_nan=True)
+    assert whole.summary()['avg_rtt'] == pytest.approx(
+        chunked.summary()['avg_rtt'])
+
+
+def test_replay_fills_windows_with_recent_probes():
+    scheduler = build(hosts=20, window_spans={'5m': 300})
+    scheduler.replay_until(3600.0)
+    for host in scheduler.hosts:
+        window = scheduler.hosts.windows[scheduler.hosts.ids[host]]['5m']
+        assert window.snapshot(3600.0)['count'] == 5
+
+
+def test_replay_with_dependencies_falls_back_to_run_until():
+    schedulers = []
+    for _ in range(2):
+        dependencies = DependencyMap()
+        scheduler = build(hosts=50, dependencies=dependencies)
+        hosts = list(scheduler.hosts)
+        dependencies.set_parent(hosts[1], hosts[0])
+        schedulers.append(scheduler)
+    assert (schedulers[0].replay_until(3600.0)
+            == schedulers[1].run_until(3600.0))
+    assert schedulers[0].summary() == schedulers[1].summary()
+
+
+def test_replay_day_of_fleet_is_fast():
+    # About 7.2M probes; per-probe run_until() takes well over a minute
+    scheduler = build(hosts=5000)
+    started = time.perf_counter()
+    assert scheduler.replay_until(DAY) >= 5000 * 1440
+    assert time.perf_counter() - started < 10.0
@@ -0,0 +1,39 @@
+"""
+SLA report tests
+"""
+from datetime import datetime, timezone
+
+import pytest
+
+from models import ProbeHistory
+from services import SlaReportEngine
+
+np = pytest.importorskip('numpy')
+
+
+def utc(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+def test_weeks_start_on_monday():
+    history = ProbeHistory()
+    history.append('a', utc(2023, 12, 31, 23, 59), True, 10.0)  # Sunday
+    history.append('a', utc(2024, 1, 1, 0, 0), True, 10.0)  # Monday
+    history.append('a', utc(2024, 1, 7, 23, 59), False)  # Sunday
+    history.append('a', utc(2024, 1, 8, 0, 0), True, 10.0)  # Monday
+
+    rows = SlaReportEngine(history).compute('week')
+    assert [(row['period'], row['probes']) for row in rows] == [
+        ('2023-12-25', 1), ('2024-01-01', 2), ('2024-01-08', 1)]
+    assert rows[1]['failures'] == 1
+
+
+def test_days_and_months_are_calendar_periods():
+    history = ProbeHistory()
+    history.append('a', utc(2024, 1, 31, 23, 59), True, 10.0)
+    history.append('a', utc(2024, 2, 1, 0, 0), True, 10.0)
+
+    months = SlaReportEngine(history).compute('month')
+    assert [row['period'] for row in months] == ['2024-01', '2024-02']
+    days = SlaReportEngine(history).compute('day')
+    assert [row['period'] for row in days] == ['2024-01-31', '2024-02-01']
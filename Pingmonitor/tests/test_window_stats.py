@@ -0,0 +1,74 @@
+"""Tests for sliding-window loss and latency statistics"""
+import pytest
+
+from models import PingStats
+from models.window_stats import SlidingWindow, load_windows, windows_to_bytes
+
+
+def test_old_slots_expire_as_time_moves_on():
+    window = SlidingWindow(60)  # One-second slots
+    for second in range(60):
+        window.record(second + 0.5, second % 4 != 0, 10.0)
+    assert window.snapshot(59.9)['count'] == 60
+    assert window.snapshot(59.9)['loss'] == 25.0
+
+    # Without new probes, stale slots are left out of the snapshot only
+    assert window.snapshot(89.5)['count'] == 30
+    assert window.snapshot(500.0) == {
+        'count': 0, 'loss': None, 'rtt_mean': None,
+        'rtt_p50': None, 'rtt_p95': None, 'rtt_p99': None}
+    assert window.count == 60
+
+    window.record(90.5, False)
+    assert window.count == window.snapshot(90.5)['count'] == 30
+    window.record(10.0, True, 1.0)  # Older than the window
+    assert window.count == 30
+
+    window.record(1000.0, True, 5.0)  # Jumps past the whole ring
+    snapshot = window.snapshot(1000.0)
+    assert (snapshot['count'], snapshot['loss']) == (1, 0.0)
+    assert sum(window.hist.values()) == window.rtt_count == 1
+
+
+def test_percentiles_follow_the_rtt_distribution():
+    window = SlidingWindow(300)
+    for rtt in range(1, 101):
+        window.record(100.0, True, float(rtt))
+    window.record(100.0, False)
+    snapshot = window.snapshot(100.0)
+    assert snapshot['count'] == 101
+    assert snapshot['rtt_mean'] == pytest.approx(50.5)
+    # Buckets are 12% wide, so percentiles are within one bucket
+    for name, expected in (('rtt_p50', 50), ('rtt_p95', 95),
+                           ('rtt_p99', 99)):
+        assert snapshot[name] == pytest.approx(expected, rel=0.12), name
+    assert snapshot['rtt_p50'] < snapshot['rtt_p95'] <= snapshot['rtt_p99']
+
+
+def test_percentiles_drop_expired_samples():
+    window = SlidingWindow(60)
+    for i in range(50):
+        window.record(float(i) / 10, True, 500.0)
+    for i in range(50):
+        window.record(65.0 + i / 10, True, 2.0)
+    snapshot = window.snapshot(70.0)
+    assert snapshot['count'] == 50
+    assert snapshot['rtt_p99'] == pytest.approx(2.0, rel=0.12)
+    assert sum(window.hist.values()) == 50
+
+
+def test_windows_round_trip_and_skip_changed_spans():
+    stats = PingStats()
+    for i in range(20):
+        stats.record_window(1000.0 + i, i % 5 != 0, 3.0 + i)
+    before = stats.window_metrics(1019.0)
+
+    restored = PingStats()
+    assert restored.load_windows(stats.windows_to_bytes()) == 3
+    assert restored.window_metrics(1019.0) == before
+    assert before['loss_1m'] == 20.0 and before['count_1h'] == 20
+
+    changed = {'1m': SlidingWindow(120), '5m': SlidingWindow(300)}
+    assert load_windows(changed, windows_to_bytes(stats.windows)) == 1
+    assert changed['1m'].count == 0 and changed['5m'].count == 20
+    assert load_windows(changed, b'') == 0